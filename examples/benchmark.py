@@ -0,0 +1,191 @@
+"""Benchmarks staging throughput for SQLite and PostgreSQL across input shapes.
+
+Besides rows/sec and peak RSS every record holds the time of each pipeline phase (inference, ddl,
+serialization, transfer, commit), as reported by the stager's instrumentation.
+
+Every case runs in a fresh process, so its peak RSS is its own. Results are appended as JSON lines
+and can be compared against a previous run to catch regressions:
+
+    python examples/benchmark.py --rows 100000 1000000 --output results.jsonl
+    python examples/benchmark.py --rows 1000000 --compare results.jsonl --tolerance 0.15
+
+PostgreSQL cases need a local server, passed with --pg-url or the STAGEIT_PG_URL environment variable.
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import platform
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+
+# Add the parent directory of 'src' to the system path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+SHAPES = {
+    "numeric": ["integer", "float", "boolean"] * 4,
+    "temporal": ["date", "timestamp"] * 3,
+    "text": ["text", "mixed"] * 3,
+    "mixed": ["integer", "float", "boolean", "date", "timestamp", "text", "mixed", "nulls"],
+    "wide": ["integer", "float", "boolean", "date", "timestamp", "text", "mixed"] * 43,
+}
+INPUTS = ["dataframe", "rows", "stream"]
+BACKENDS = ["sqlite", "postgres"]
+
+
+def build_input(kind, num_rows, column_types, null_fraction, chunk_size):
+    from generate_test_data import generate_dataframe, iter_dataframes
+    if kind == "dataframe":
+        return generate_dataframe(num_rows, column_types, null_fraction=null_fraction)
+    elif kind == "rows":
+        frame = generate_dataframe(num_rows, column_types, null_fraction=null_fraction)
+        # Plain python rows, the shape of data coming from a DB-API cursor or a CSV reader
+        return list(frame.astype(object).itertuples(index=False, name=None))
+    elif kind == "stream":
+        return iter_dataframes(num_rows, chunk_size, column_types, null_fraction=null_fraction)
+    raise ValueError(f"Unknown input kind '{kind}'.")
+
+
+async def count_rows(case, table_name):
+    if case["backend"] == "sqlite":
+        import sqlite3
+        with sqlite3.connect(case["url"]) as conn:
+            return conn.execute(f"SELECT COUNT(*) FROM {table_name}").fetchone()[0]
+    import asyncpg
+    conn = await asyncpg.connect(case["url"])
+    try:
+        return await conn.fetchval(f"SELECT COUNT(*) FROM {table_name}")
+    finally:
+        await conn.close()
+
+
+def run_case(case: dict) -> dict:
+    """Runs one case in the current (fresh) process and returns its result record."""
+    from src.stageit.instrumentation import Instrumentation, InMemoryRecorder
+    from src.stageit.stager import Stager
+    from src.stageit.utils import DB_Enum
+
+    phases = {}
+    start = time.perf_counter()
+    data = build_input(case["input"], case["rows"], SHAPES[case["shape"]], case["null_fraction"], case["chunk_size"])
+    phases["generate"] = time.perf_counter() - start
+
+    db_type = DB_Enum.SQLITE if case["backend"] == "sqlite" else DB_Enum.PSQL
+    recorder = InMemoryRecorder()
+    stager = Stager(case["url"], db_type, instrumentation=Instrumentation([recorder]), **case["options"])
+    table_name = f"bench_{case['shape']}"
+    start = time.perf_counter()
+    asyncio.run(stager.stage_data_async(data, table_name=table_name, drop_first=True, chunk_size=case["chunk_size"]))
+    phases["stage"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    staged_rows = asyncio.run(count_rows(case, table_name))
+    phases["verify"] = time.perf_counter() - start
+    if staged_rows != case["rows"]:
+        raise RuntimeError(f"Expected {case['rows']} rows in {table_name}, found {staged_rows}.")
+
+    return {
+        **case,
+        "url": None,
+        "rows_per_sec": case["rows"] / phases["stage"],
+        # ru_maxrss is in KiB on Linux and in bytes on macOS
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 ** 2 if sys.platform == "darwin" else 1024),
+        "phases": phases,
+        # Breakdown of the stage phase, reported by the staging pipeline itself
+        "stage_phases": recorder.summary()["phases"],
+        "counters": recorder.summary()["counters"],
+    }
+
+
+def case_key(record: dict) -> tuple:
+    return (record["backend"], record["shape"], record["input"], record["rows"],
+            record["null_fraction"], record["chunk_size"], json.dumps(record["options"], sort_keys=True))
+
+
+def compare(results: list, baseline_path: str, tolerance: float) -> list:
+    """Returns the results whose rows/sec dropped more than `tolerance` below the baseline's latest run of the same case."""
+    baseline = {}
+    with open(baseline_path) as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                baseline[case_key(record)] = record
+    regressions = []
+    for record in results:
+        previous = baseline.get(case_key(record))
+        if previous and record["rows_per_sec"] < previous["rows_per_sec"] * (1 - tolerance):
+            regressions.append((record, previous))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=BACKENDS)
+    parser.add_argument("--shapes", nargs="+", choices=list(SHAPES), default=list(SHAPES))
+    parser.add_argument("--inputs", nargs="+", choices=INPUTS, default=INPUTS)
+    parser.add_argument("--rows", nargs="+", type=int, default=[100_000])
+    parser.add_argument("--null-fraction", type=float, default=0.1)
+    parser.add_argument("--chunk-size", type=int, default=50_000)
+    parser.add_argument("--options", type=json.loads, default={},
+                        help='Backend options as JSON, e.g. \'{"bulk_load": true}\'')
+    parser.add_argument("--sqlite-path", default="benchmark.sqlite")
+    parser.add_argument("--pg-url", default=os.environ.get("STAGEIT_PG_URL"))
+    parser.add_argument("--output", default="benchmark_results.jsonl")
+    parser.add_argument("--compare", help="JSON lines file of a previous run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Allowed rows/sec drop against --compare")
+    args = parser.parse_args()
+
+    backends = list(args.backends)
+    if "postgres" in backends and not args.pg_url:
+        print("Skipping PostgreSQL, no --pg-url or STAGEIT_PG_URL given.")
+        backends.remove("postgres")
+
+    run_meta = {
+        "run_at": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+    }
+    results = []
+    for backend in backends:
+        for shape in args.shapes:
+            for input_kind in args.inputs:
+                for rows in args.rows:
+                    case = {
+                        **run_meta,
+                        "backend": backend,
+                        "url": args.sqlite_path if backend == "sqlite" else args.pg_url,
+                        "shape": shape,
+                        "input": input_kind,
+                        "rows": rows,
+                        "null_fraction": args.null_fraction,
+                        "chunk_size": args.chunk_size,
+                        "options": args.options,
+                    }
+                    # A fresh process per case so that peak RSS is measured per case
+                    with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as executor:
+                        record = executor.submit(run_case, case).result()
+                    results.append(record)
+                    print(f"{backend:8} {shape:8} {input_kind:9} {rows:>10} rows  "
+                          f"{record['rows_per_sec']:>12,.0f} rows/s  {record['peak_rss_mb']:>8.1f} MiB peak")
+
+    # Compared before writing, so --compare and --output may be the same file
+    regressions = compare(results, args.compare, args.tolerance) if args.compare else []
+    with open(args.output, "a") as f:
+        for record in results:
+            f.write(json.dumps(record) + "\n")
+
+    if regressions:
+        for record, previous in regressions:
+            print(f"REGRESSION {record['backend']} {record['shape']} {record['input']} {record['rows']}: "
+                  f"{record['rows_per_sec']:,.0f} rows/s vs {previous['rows_per_sec']:,.0f} rows/s")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 import numpy as np
+import pandas as pd
 import random
 import datetime
 import sys
@@ -54,3 +55,73 @@ def generate_csv_like_test_data(num_rows=50, max_cols=10):
         data.append(row)
         
     return selected_columns, data
+
+
+POSSIBLE_DATA_TYPES = ["integer", "float", "boolean", "date", "timestamp", "text", "mixed"]
+TEXT_VALUES = np.array(['apple', 'banana', 'cherry', 'date', 'fig', 'grape', None], dtype=object)
+MIXED_VALUES = np.array([42, 'mixed_data', 3.14, 'random_string', None], dtype=object)
+BASE_DATE = np.datetime64("2000-01-01")
+BASE_TIMESTAMP = np.datetime64("2000-01-01T12:00:00")
+
+
+def generate_column(base_type, num_rows, rng):
+    """Vectorized counterpart of generate_value, returns a whole column at once."""
+    if base_type == "integer":
+        return rng.integers(0, 100000, size=num_rows)
+    elif base_type == "float":
+        return rng.random(num_rows) * 100
+    elif base_type == "boolean":
+        return rng.random(num_rows) < 0.5
+    elif base_type == "date":
+        # datetime64[D] -> object gives datetime.date values, as generate_value does
+        return (BASE_DATE + rng.integers(0, 365, size=num_rows).astype("timedelta64[D]")).astype(object)
+    elif base_type == "timestamp":
+        return BASE_TIMESTAMP + rng.integers(0, 8760, size=num_rows).astype("timedelta64[h]")
+    elif base_type == "text":
+        return TEXT_VALUES[rng.integers(0, len(TEXT_VALUES), size=num_rows)]
+    elif base_type == "mixed":
+        return MIXED_VALUES[rng.integers(0, len(MIXED_VALUES), size=num_rows)]
+    elif base_type == "nulls":
+        return np.full(num_rows, None, dtype=object)
+    raise ValueError(f"Unknown column type '{base_type}'.")
+
+
+def generate_dataframe(num_rows=1_000_000, column_types=None, max_cols=10, null_fraction=0.0, seed=42):
+    """Generates a DataFrame column by column, fast enough for tens of millions of rows.
+
+    Args:
+        num_rows (int, optional): Number of rows. Defaults to 1_000_000.
+        column_types (list, optional): The type of every column, from POSSIBLE_DATA_TYPES or "nulls".
+            Defaults to max_cols random types.
+        max_cols (int, optional): Number of random columns when column_types is not given. Defaults to 10.
+        null_fraction (float, optional): Fraction of every column replaced by nulls. Defaults to 0.0.
+        seed (int, optional): Seed for reproducibility. Defaults to 42.
+
+    Returns:
+        pd.DataFrame: The generated data, with columns named like generate_csv_like_test_data
+    """
+    rng = np.random.default_rng(seed)
+    if column_types is None:
+        column_types = [POSSIBLE_DATA_TYPES[i] for i in rng.integers(0, len(POSSIBLE_DATA_TYPES), size=max_cols)]
+
+    columns = {}
+    for i, base_type in enumerate(column_types):
+        values = generate_column(base_type, num_rows, rng)
+        if null_fraction > 0 and base_type != "nulls":
+            mask = rng.random(num_rows) < null_fraction
+            # Nullable dtypes keep integer and boolean columns from decaying to float/object
+            nullable_dtype = {"integer": "Int64", "boolean": "boolean"}.get(base_type)
+            values = pd.Series(values, dtype=nullable_dtype).mask(mask)
+        columns[f"{base_type}_{i+1}"] = values
+    return pd.DataFrame(columns)
+
+
+def iter_dataframes(total_rows, chunk_rows=1_000_000, column_types=None, max_cols=10, null_fraction=0.0, seed=42):
+    """Yields total_rows rows as DataFrames of chunk_rows rows, so feeds of any size fit in memory.
+    Every chunk has the same columns."""
+    rng = np.random.default_rng(seed)
+    if column_types is None:
+        column_types = [POSSIBLE_DATA_TYPES[i] for i in rng.integers(0, len(POSSIBLE_DATA_TYPES), size=max_cols)]
+    for chunk_index, start in enumerate(range(0, total_rows, chunk_rows)):
+        yield generate_dataframe(min(chunk_rows, total_rows - start), column_types, null_fraction=null_fraction,
+                                 seed=seed + chunk_index)
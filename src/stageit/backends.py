@@ -0,0 +1,103 @@
+import importlib
+from typing import Union
+from .utils import DB_Enum
+
+
+def _resolve(reference):
+    """Imports "module:attribute" (relative modules are resolved against this package),
+    anything else is returned as is."""
+    if not isinstance(reference, str):
+        return reference
+    module_name, _, attribute = reference.partition(":")
+    module = importlib.import_module(module_name, package=__package__)
+    return getattr(module, attribute)
+
+
+class BackendSpec():
+    """A registered backend. The backend class and its type mapping are given as objects or as
+    "module:attribute" references, which are only imported when the backend is first used."""
+
+    def __init__(self, name:str, backend, type_mapping, uses_schema:bool = True):
+        """
+        Args:
+            name (str): The name the backend is selected by, e.g. "postgresql"
+            backend (Union[type, str]): A BaseDB subclass, or a "module:attribute" reference to it
+            type_mapping (Union[dict, str]): python/NumPy type -> Database type, or a "module:attribute" reference
+            uses_schema (bool, optional): The backend takes the Stager's schema, otherwise it gets None. Defaults to True.
+        """
+        self.name = name
+        self._backend = backend
+        self._type_mapping = type_mapping
+        self.uses_schema = uses_schema
+
+    @property
+    def backend_class(self) -> type:
+        self._backend = _resolve(self._backend)
+        return self._backend
+
+    @property
+    def type_mapping(self) -> dict:
+        self._type_mapping = _resolve(self._type_mapping)
+        return self._type_mapping
+
+    def create(self, conn_url, schema=None, **db_options):
+        """Instantiates the backend."""
+        return self.backend_class(conn_url, schema=schema if self.uses_schema else None, **db_options)
+
+    def __repr__(self):
+        return f"BackendSpec(name={self.name!r})"
+
+
+# name -> BackendSpec
+_BACKENDS:dict = {}
+
+# The built-in backends, by their DB_Enum member
+_ENUM_NAMES = {
+    DB_Enum.PSQL: "postgresql",
+    DB_Enum.SQLITE: "sqlite",
+}
+
+
+def register_backend(name:str, backend, type_mapping, uses_schema:bool = True, aliases:tuple = ()) -> BackendSpec:
+    """Registers a backend under `name` (and its aliases), replacing any backend of that name.
+    Stager(conn_url, name) then uses it. Nothing is imported until the backend is selected.
+
+    Args:
+        name (str): The backend name, case-insensitive
+        backend (Union[type, str]): A BaseDB subclass, or a "module:attribute" reference to it
+        type_mapping (Union[dict, str]): python/NumPy type -> Database type, or a "module:attribute" reference
+        uses_schema (bool, optional): The backend takes the Stager's schema. Defaults to True.
+        aliases (tuple, optional): Other names for the backend. Defaults to ().
+
+    Returns:
+        BackendSpec: The registered backend
+    """
+    spec = BackendSpec(name.lower(), backend, type_mapping, uses_schema=uses_schema)
+    for key in (name, *aliases):
+        _BACKENDS[key.lower()] = spec
+    return spec
+
+
+def get_backend(db_type:Union[DB_Enum, str, BackendSpec]) -> BackendSpec:
+    """Returns the registered backend for a DB_Enum member or a backend name.
+
+    Raises:
+        ValueError: Raised if no backend of that name is registered
+    """
+    if isinstance(db_type, BackendSpec):
+        return db_type
+    name = _ENUM_NAMES.get(db_type, db_type)
+    spec = _BACKENDS.get(name.lower()) if isinstance(name, str) else None
+    if spec is None:
+        raise ValueError(f"Unknown backend '{db_type}', registered backends: {available_backends()}.")
+    return spec
+
+
+def available_backends() -> list:
+    """The names of the registered backends, without aliases."""
+    return sorted({spec.name for spec in _BACKENDS.values()})
+
+
+register_backend("postgresql", ".databases.postgresql_db:PostgresDB", ".config:PSQL_TYPE_MAPPING",
+                 aliases=("postgres", "psql"))
+register_backend("sqlite", ".databases.sqlite_db:SQLiteDB", ".config:SQLITE_TYPE_MAPPING", uses_schema=False)
@@ -0,0 +1,147 @@
+import asyncio
+import atexit
+import threading
+from concurrent.futures import Future
+from .chunking import iter_chunks
+from .config import DEFAULT_CHUNK_SIZE
+
+
+class BackgroundStager():
+    """Runs a Stager on a dedicated event loop thread, so synchronous code can stage data.
+
+    The loop keeps one StagingSession open, so connections stay warm across calls. Submissions
+    are bounded: once max_pending of them are queued or running, submitting blocks until one
+    of them finishes.
+    """
+
+    def __init__(self, stager, max_pending:int = 64, **session_options):
+        """
+        Args:
+            stager (Stager): The stager to run
+            max_pending (int, optional): Maximum number of submissions queued or running. Defaults to 64.
+            **session_options: Options of the StagingSession, see Stager.session().
+        """
+        self._stager = stager
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._session_options = session_options
+        self._loop:asyncio.AbstractEventLoop = None
+        self._thread:threading.Thread = None
+        self._session = None
+        self._start_lock = threading.Lock()
+        self._errors:list = []
+
+    def start(self):
+        """Starts the event loop thread and opens the session. Called on the first submission."""
+        with self._start_lock:
+            if self._thread is not None:
+                return self
+            self._loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(target=self._loop.run_forever, name="stageit-loop", daemon=True)
+            self._thread.start()
+            self._session = self._stager.session(**self._session_options)
+            asyncio.run_coroutine_threadsafe(self._session.start(), self._loop).result()
+            # Buffered fire-and-forget rows are flushed if the interpreter exits without close()
+            atexit.register(self.close)
+        return self
+
+    def submit(self, data, table_name="staging", drop_first=False, chunk_size=None, flush=True) -> Future:
+        """Schedules the data to be staged and returns immediately, unless max_pending submissions
+        are outstanding in which case it blocks until one finishes.
+
+        Args:
+            data: Anything stage_data_async accepts.
+            table_name (str, optional): Target table. Defaults to "staging".
+            drop_first (bool, optional): Drop the table before staging. Defaults to False.
+            chunk_size (int, optional): Rows per chunk. Defaults to config.DEFAULT_CHUNK_SIZE.
+            flush (bool, optional): Resolve the future only once the rows are written. Without it the
+                rows may still sit in the session's buffer when the future resolves. Defaults to True.
+
+        Returns:
+            Future: Resolves to None once the data are staged
+        """
+        self.start()
+        self._slots.acquire()
+        try:
+            future = asyncio.run_coroutine_threadsafe(
+                self._stage(data, table_name, drop_first, chunk_size or DEFAULT_CHUNK_SIZE, flush), self._loop
+            )
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def stage_data(self, data, table_name="staging", drop_first=False, chunk_size=None):
+        """Stages the data and blocks until they are written."""
+        self.submit(data, table_name, drop_first, chunk_size).result()
+
+    def stage_data_nowait(self, data, table_name="staging", drop_first=False, chunk_size=None):
+        """Stages the data without waiting. The rows are coalesced with other small batches and
+        written by the session's next flush. Errors are re-raised by flush() or close().
+        """
+        future = self.submit(data, table_name, drop_first, chunk_size, flush=False)
+        future.add_done_callback(self._keep_error)
+
+    def stage_file(self, path, table_name="staging", drop_first=False, **file_options) -> int:
+        """Stages a CSV or Parquet file and blocks until it is written, see Stager.stage_file_async.
+        Returns the number of rows staged."""
+        self.start()
+        with self._slots:
+            return asyncio.run_coroutine_threadsafe(
+                self._session.stage_file(path, table_name, drop_first, **file_options), self._loop
+            ).result()
+
+    def read(self, table_name="staging", **read_options):
+        """Reads the table back once its buffered rows are written, see Stager.read_async."""
+        self.start()
+        with self._slots:
+            return asyncio.run_coroutine_threadsafe(
+                self._session.read(table_name, **read_options), self._loop
+            ).result()
+
+    def _keep_error(self, future: Future):
+        if not future.cancelled() and future.exception() is not None:
+            self._errors.append(future.exception())
+
+    async def _stage(self, data, table_name, drop_first, chunk_size, flush):
+        if drop_first:
+            await self._session.drop_table(table_name)
+        async for chunk in iter_chunks(data, chunk_size):
+            await self._session.stage(chunk, table_name)
+        if flush:
+            await self._session.flush(table_name)
+
+    def flush(self):
+        """Writes every buffered row and blocks until done."""
+        if self._thread is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._session.flush(), self._loop).result()
+        self._raise_errors()
+
+    def _raise_errors(self):
+        if self._errors:
+            error = self._errors[0]
+            self._errors.clear()
+            raise error
+
+    def close(self):
+        """Flushes, closes the session and stops the event loop thread."""
+        with self._start_lock:
+            if self._thread is None:
+                return
+            try:
+                asyncio.run_coroutine_threadsafe(self._session.close(), self._loop).result()
+            finally:
+                self._loop.call_soon_threadsafe(self._loop.stop)
+                self._thread.join()
+                self._loop.close()
+                self._thread = None
+                self._session = None
+                atexit.unregister(self.close)
+        self._raise_errors()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,182 @@
+import hashlib
+from typing import AsyncIterator, Iterable, Union
+import numpy as np
+import pandas as pd
+
+
+def default_column_names(total_columns: int) -> list:
+    """Generates the positional column names used when the data carry no names of their own."""
+    return [f"column_{i}" for i in range(total_columns)]
+
+
+def is_arrow(data) -> bool:
+    """True for a pyarrow Table or RecordBatch. Duck-typed, so pyarrow is only imported by its users."""
+    return hasattr(data, "schema") and hasattr(data, "column_names") and hasattr(data, "slice")
+
+
+def is_column_mapping(data) -> bool:
+    """True for a non-empty dict of columns, i.e. every value is an array, Series or list of values."""
+    return isinstance(data, dict) and len(data) > 0 and all(
+        isinstance(values, (np.ndarray, pd.Series, list, tuple)) or is_arrow_array(values)
+        for values in data.values()
+    )
+
+
+def is_arrow_array(values) -> bool:
+    return hasattr(values, "to_pandas") and hasattr(values, "null_count")
+
+
+def _arrow_to_frame(data) -> pd.DataFrame:
+    """Converts an Arrow table column by column: one block per column (no consolidation copy),
+    zero-copy for primitive columns without nulls, integers with nulls as python ints and None."""
+    return data.to_pandas(split_blocks=True, integer_object_nulls=True, date_as_object=True)
+
+
+def _columns_to_frame(data: dict) -> pd.DataFrame:
+    """Wraps a dict of columns without copying the NumPy arrays, one block per column."""
+    columns = {
+        name: values.to_pandas(integer_object_nulls=True, date_as_object=True) if is_arrow_array(values) else values
+        for name, values in data.items()
+    }
+    return pd.DataFrame(columns, copy=False)
+
+
+def _is_chunk_list(data) -> bool:
+    """A list/tuple of DataFrames or Arrow batches (e.g. table.to_batches()) is streamed chunk by chunk."""
+    return isinstance(data, (list, tuple)) and len(data) > 0 and (isinstance(data[0], pd.DataFrame) or is_arrow(data[0]))
+
+
+def _is_row_batch(item) -> bool:
+    """A list/tuple whose first element is itself a row (list, tuple or dict) is treated as a batch of rows."""
+    return isinstance(item, (list, tuple)) and len(item) > 0 and isinstance(item[0], (list, tuple, dict))
+
+
+def to_frame(chunk, col_names: list = None) -> pd.DataFrame:
+    """Wraps a chunk (DataFrame, ndarray, list of rows, dict of columns or Arrow table) into a DataFrame.
+
+    Args:
+        chunk: The chunk to be wrapped. DataFrames are returned as they are.
+        col_names (list, optional): Column names for positional data. Defaults to column_0..column_n.
+
+    Returns:
+        pd.DataFrame: The chunk as a DataFrame
+    """
+    if isinstance(chunk, pd.DataFrame):
+        return chunk
+    if is_arrow(chunk):
+        return _arrow_to_frame(chunk)
+    if is_column_mapping(chunk):
+        return _columns_to_frame(chunk)
+    frame = pd.DataFrame(chunk)
+    if not (len(chunk) > 0 and isinstance(chunk[0], dict)):
+        if col_names is not None and len(col_names) >= frame.shape[1]:
+            frame.columns = col_names[:frame.shape[1]]
+        else:
+            frame.columns = default_column_names(frame.shape[1])
+    return frame
+
+
+def hash_values(values: pd.Series) -> np.ndarray:
+    """64-bit hashes of the values, vectorized through pandas' row hashing. Values pandas cannot
+    hash (e.g. lists) are hashed as their string form."""
+    try:
+        hashed = pd.util.hash_pandas_object(values, index=False)
+    except TypeError:
+        hashed = pd.util.hash_pandas_object(values.astype(str), index=False)
+    return hashed.to_numpy()
+
+
+def content_hash(chunk: pd.DataFrame) -> str:
+    """A hash of the chunk's column names and values."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update("\x1f".join(map(str, chunk.columns)).encode())
+    for col in range(chunk.shape[1]):
+        digest.update(hash_values(chunk.iloc[:, col]).tobytes())
+    return digest.hexdigest()
+
+
+def _split(frame: pd.DataFrame, chunk_size: int):
+    """Slices a frame into views of at most chunk_size rows."""
+    if len(frame) <= chunk_size:
+        yield frame
+        return
+    for start in range(0, len(frame), chunk_size):
+        yield frame.iloc[start:start + chunk_size]
+
+
+async def iter_chunks(data: Union[pd.DataFrame, np.ndarray, list, tuple, dict, Iterable, AsyncIterator],
+                      chunk_size: int, col_names: list = None) -> AsyncIterator[pd.DataFrame]:
+    """Yields the data as DataFrame chunks of at most chunk_size rows.
+
+    In-memory inputs (DataFrame, ndarray, list, tuple, dict of columns, pyarrow Table or
+    RecordBatch) are sliced so that only one chunk is materialised as a DataFrame at a time.
+    Columnar inputs are wrapped column by column, without copying primitive columns.
+    Iterators and async iterators may yield any of these, batches of rows or single rows;
+    single rows are buffered up to chunk_size.
+
+    Args:
+        data: The data to be chunked.
+        chunk_size (int): Maximum number of rows per chunk.
+        col_names (list, optional): Column names for positional data. Defaults to column_0..column_n.
+
+    Yields:
+        pd.DataFrame: The next chunk of data
+    """
+    if chunk_size is None or chunk_size <= 0:
+        raise ValueError("chunk_size must be a positive integer.")
+
+    if isinstance(data, pd.DataFrame):
+        for frame in _split(data, chunk_size):
+            yield frame
+        return
+
+    if isinstance(data, (np.ndarray, list, tuple)) and not _is_chunk_list(data):
+        for start in range(0, len(data), chunk_size):
+            yield to_frame(data[start:start + chunk_size], col_names)
+        return
+
+    if is_arrow(data):
+        # Arrow slices are zero-copy
+        for start in range(0, data.num_rows, chunk_size):
+            yield _arrow_to_frame(data.slice(start, chunk_size))
+        return
+
+    if is_column_mapping(data):
+        total_rows = len(next(iter(data.values())))
+        for start in range(0, total_rows, chunk_size):
+            yield _columns_to_frame({name: values[start:start + chunk_size] for name, values in data.items()})
+        return
+
+    rows = []
+    if hasattr(data, "__aiter__"):
+        async for item in data:
+            for frame in _consume_item(item, rows, chunk_size, col_names):
+                yield frame
+    elif hasattr(data, "__iter__"):
+        for item in data:
+            for frame in _consume_item(item, rows, chunk_size, col_names):
+                yield frame
+    else:
+        raise ValueError("Unsupported data instance.")
+
+    if rows:
+        yield to_frame(rows, col_names)
+
+
+def _consume_item(item, rows: list, chunk_size: int, col_names: list):
+    """Turns one item of a streamed input into zero or more chunks.
+
+    Whole chunks (DataFrames, arrays, row batches) flush any buffered single rows first so
+    that row order is preserved.
+    """
+    if isinstance(item, (pd.DataFrame, np.ndarray)) or _is_row_batch(item) or is_arrow(item) or is_column_mapping(item):
+        if rows:
+            yield to_frame(list(rows), col_names)
+            rows.clear()
+        for frame in _split(to_frame(item, col_names), chunk_size):
+            yield frame
+    else:
+        rows.append(item)
+        if len(rows) >= chunk_size:
+            yield to_frame(list(rows), col_names)
+            rows.clear()
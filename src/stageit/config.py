@@ -6,6 +6,22 @@ import pandas as pd
 TURN_LOGGING_ON=False
 LOGGING_DIR = None
 
+# Maximum number of rows that are materialised and sent to the database at once
+DEFAULT_CHUNK_SIZE = 50_000
+
+# Number of non-null values per column inspected when a type cannot be read from the dtype
+DEFAULT_INFERENCE_SAMPLE_SIZE = 1_000
+
+# Table recording the committed chunks of resumable loads (stage_data_async with a load_id)
+MANIFEST_TABLE = "stageit_manifest"
+
+# Table holding the rebuild statements of the indexes a load deferred (PostgresDB with defer_indexes)
+# until they are restored, so a crashed load does not lose their definitions
+DEFERRED_INDEXES_TABLE = "stageit_deferred_indexes"
+
+# Column of a merge's scratch table numbering its rows in load order, so the last row of a repeated key wins
+MERGE_SEQUENCE_COLUMN = "stageit_load_seq"
+
 PSQL_TYPE_MAPPING = {
     np.int8: "SMALLINT",
     np.int16: "SMALLINT",
@@ -2,13 +2,26 @@ from abc import ABC, abstractmethod
 from typing import Union
 import numpy as np
 import pandas as pd
+from ..instrumentation import Instrumentation
 
 
 class BaseDB(ABC):
+    # True when the database accepts a single writer at a time, so concurrent loads must take turns
+    single_writer = False
+    # True when the backend implements copy_csv_stream, i.e. loads raw CSV bytes without parsing them
+    streams_csv = False
+    # True when the backend implements get_column_types and alter_column_types. Only then are column
+    # types widened when a later chunk does not fit them, otherwise the types of the first chunk stay
+    alters_column_types = False
+    # The type get_column_types reports for the ID column that create_table adds
+    id_type = "INTEGER"
+
     def __init__(self, db_url:str, schema:str=None):
         super().__init__()
         self.db_url = db_url
         self.schema = schema
+        # Replaced by the DB_Manager's instrumentation, so the backend reports into the same callbacks
+        self.instrumentation = Instrumentation()
     
     @abstractmethod
     async def connect(self):
@@ -53,15 +66,91 @@ class BaseDB(ABC):
         """
         
     @abstractmethod
-    async def insert(self, table_name, data: Union[np.ndarray, pd.DataFrame], columns_and_types):
+    async def insert(self, table_name, data: Union[np.ndarray, pd.DataFrame], columns_and_types, existing_columns:set = None,
+                     checkpoint:tuple = None):
         """Inserts data into the table specified
 
         Args:
             table_name (_type_): Table Name
             data (Union[np.ndarray, pd.DataFrame]): The data to be inserted. (np array or dataframe)
+            existing_columns (set, optional): The columns the table already has. When given the
+                table's columns are not queried. Defaults to None.
+            checkpoint (tuple, optional): A (manifest table, row dict) written in the same transaction as
+                the data, so the manifest lists exactly the committed chunks. Defaults to None.
         """
         pass
     
+    async def begin_load(self, table_name:str):
+        """Called before a load into the table, e.g. to defer index maintenance. A no-op by default."""
+        pass
+
+    async def end_load(self, table_name:str):
+        """Called after a load into the table, also when it failed. A no-op by default."""
+        pass
+
+    def read(self, table_name:str, columns:list, python_types:dict, where:str = None, chunk_size:int = 50_000):
+        """An async iterator over the rows of the table (matching the SQL condition `where`) as DataFrames
+        of at most chunk_size rows. `python_types` maps every column to the python/NumPy type its values
+        are decoded to, see readback.decode_column."""
+        raise NotImplementedError(f"{type(self).__name__} does not support reading tables back.")
+
+    async def analyze(self, table_name:str):
+        """Refreshes the planner statistics of the table. A no-op by default."""
+        pass
+
+    async def create_staging_table(self, table_name:str, columns:dict):
+        """Creates a scratch table for a merge, cheaper to write than a regular table
+        (e.g. UNLOGGED or TEMP). Dropped with drop_table."""
+        raise NotImplementedError(f"{type(self).__name__} does not support merges.")
+
+    async def ensure_unique_index(self, table_name:str, key_columns:list):
+        """Creates a unique index on the key columns, unless the table already has one on exactly these columns."""
+        raise NotImplementedError(f"{type(self).__name__} does not support merges.")
+
+    async def merge(self, source_table:str, target_table:str, key_columns:list, columns:list) -> int:
+        """Upserts the rows of source_table into target_table in one statement: rows whose key
+        exists are updated, the others inserted. Of the source rows sharing a key, the one with the
+        highest config.MERGE_SEQUENCE_COLUMN wins. Returns the number of rows inserted or updated.
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support merges.")
+
+    async def read_checkpoints(self, manifest_table:str, load_id:str, table_name:str) -> dict:
+        """Returns chunk index -> content hash of the chunks the load committed into the table."""
+        raise NotImplementedError(f"{type(self).__name__} does not support resumable loads.")
+
+    async def get_column_types(self, table_name:str) -> dict:
+        """Returns the columns of the table with their SQL types, spelled like the type mapping's.
+        Optional, see alters_column_types. Reading tables back needs it."""
+        raise NotImplementedError(f"{type(self).__name__} does not report column types.")
+
+    async def alter_column_types(self, table_name:str, column_types:dict):
+        """Changes the types of existing columns (name -> SQL type), e.g. to widen a compacted column.
+        Optional, see alters_column_types."""
+        raise NotImplementedError(f"{type(self).__name__} does not support changing column types.")
+
+    async def read_dictionary(self, table_name:str) -> dict:
+        """Reads a dictionary lookup table (id, value) as a value -> id dict."""
+        raise NotImplementedError(f"{type(self).__name__} does not support dictionary encoding.")
+
+    def serializer(self):
+        """Returns a picklable function that converts a DataFrame into the payload accepted by
+        insert(..., serialized=...), or None if the backend serializes inside insert().
+        Lets a scheduler convert chunks in parallel while a single writer inserts them.
+        """
+        return None
+
+    def reserve_connections(self, count:int):
+        """Makes room for `count` concurrent inserts. Called before connect(), a no-op by default."""
+        pass
+
+    def release_connections(self):
+        """Undoes reserve_connections once the concurrent inserts are done. A no-op by default."""
+        pass
+
+    def shutdown(self):
+        """Releases what the backend keeps across connections, e.g. worker processes. A no-op by default."""
+        pass
+
     @abstractmethod
     async def close(self):
         """Close the database connection."""
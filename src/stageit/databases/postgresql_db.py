@@ -1,19 +1,303 @@
+import asyncio
 import asyncpg
+import csv
+import datetime
+import logging
+import re
 from abc import ABC
-from typing import Union
+from contextlib import asynccontextmanager, nullcontext
+from typing import AsyncIterable, AsyncIterator, Union
 import pandas as pd
 import numpy as np
-from io import StringIO
+from concurrent.futures import Executor
+from functools import partial
+from io import BytesIO, StringIO
 from .base_db import BaseDB
+from ..config import DEFERRED_INDEXES_TABLE, MERGE_SEQUENCE_COLUMN
+from ..instrumentation import log_event
+from ..pipeline import pipelined, row_slices, timed_call
+from ..readback import decode_frame, parse_dtype
+
+
+def _encode_object(values: pd.Series) -> list:
+    """Python objects with NaN/NaT/None replaced by None."""
+    return values.astype(object).where(values.notna(), None).tolist()
+
+
+def _encode_number(values: pd.Series) -> list:
+    """Numeric columns without nulls are unboxed straight from the NumPy buffer."""
+    if values.dtype.kind in "iufb" and not values.hasnans:
+        return values.tolist()
+    return _encode_object(values)
+
+
+def _encode_integer(values: pd.Series) -> list:
+    """asyncpg's integer codecs truncate floats, so float values must be integral."""
+    if values.dtype.kind == "f" or values.dtype == object:
+        non_null = values.dropna()
+        if values.dtype == object:
+            non_null = non_null[non_null.map(lambda v: isinstance(v, (float, np.floating)))]
+        floats = non_null.to_numpy(dtype=np.float64)
+        if len(floats) and not np.all(np.mod(floats, 1) == 0):
+            raise ValueError(f"Column '{values.name}' holds non-integral values, which an integer column cannot store.")
+    return _encode_number(values)
+
+
+def _encode_boolean(values: pd.Series) -> list:
+    """asyncpg's bool codec only accepts bool, integer 0/1 columns (compacted to BOOLEAN) are cast."""
+    if values.dtype.kind in "iuf":
+        values = (values != 0).astype(object).where(values.notna(), None)
+    elif values.dtype.kind == "b" and not values.hasnans:
+        return values.tolist()
+    return _encode_object(values)
+
+
+def _encode_text(values: pd.Series) -> list:
+    """asyncpg's text codec only accepts str, so non-null values are stringified."""
+    return values.astype(str).astype(object).where(values.notna(), None).tolist()
+
+
+def _encode_timestamp(values: pd.Series) -> list:
+    if values.dtype.kind != "M":
+        values = pd.to_datetime(values)
+    pydatetimes = pd.Series(np.asarray(values.dt.to_pydatetime(), dtype=object), index=values.index)
+    return _encode_object(pydatetimes.where(values.notna()))
+
+
+def _encode_date(values: pd.Series) -> list:
+    """asyncpg's date codec and .dt.date drop the time of day, so timestamps must be at midnight."""
+    if values.dtype == object and values.map(lambda v: isinstance(v, datetime.datetime)).any():
+        values = pd.to_datetime(values)
+    if values.dtype.kind == "M":
+        timestamps = values.dropna()
+        if (timestamps != timestamps.dt.normalize()).any():
+            raise ValueError(f"Column '{values.name}' holds timestamps with a time of day, which a DATE column cannot store.")
+        values = values.dt.date.where(values.notna())
+    return _encode_object(values)
+
+
+def _encode_interval(values: pd.Series) -> list:
+    if values.dtype.kind == "m":
+        values = pd.Series(np.asarray(values.dt.to_pytimedelta(), dtype=object), index=values.index).where(values.notna())
+    return _encode_object(values)
+
+
+# Column encoders for binary COPY, chosen from the SQL types the SchemaManager inferred
+BINARY_COPY_ENCODERS = {
+    "SMALLINT": _encode_integer,
+    "INTEGER": _encode_integer,
+    "BIGINT": _encode_integer,
+    "REAL": _encode_number,
+    "DOUBLE PRECISION": _encode_number,
+    "BOOLEAN": _encode_boolean,
+    "TIMESTAMP": _encode_timestamp,
+    "DATE": _encode_date,
+    "INTERVAL": _encode_interval,
+    "TEXT": _encode_text,
+    "BYTEA": _encode_object,
+}
+
+
+def encode_binary_columns(data: pd.DataFrame, columns_and_types: dict) -> list:
+    """Converts every column once, with the encoder picked from its SQL type. Returns the column lists."""
+    return [
+        BINARY_COPY_ENCODERS.get(columns_and_types.get(col), _encode_object)(data[col])
+        for col in data.columns
+    ]
+
+
+# information_schema spellings that differ from the type mapping's
+PG_TYPE_NAMES = {"TIMESTAMP WITHOUT TIME ZONE": "TIMESTAMP"}
+
+# Targets of alter_column_types that a BOOLEAN column is cast to through INTEGER, its only numeric cast
+NUMERIC_TYPES = ("SMALLINT", "INTEGER", "BIGINT", "REAL", "DOUBLE PRECISION")
+
+# Time intervals of range partitioned tables: pandas period alias and partition name suffix
+PARTITION_INTERVALS = {
+    "day": ("D", "%Y%m%d"),
+    "month": ("M", "%Y%m"),
+    "year": ("Y", "%Y"),
+}
+
+
+def range_partition_bounds(values: pd.Series, interval) -> tuple:
+    """Returns the lower and upper bound of every value's range partition, NaN/NaT for nulls.
+    interval is "day", "month" or "year" for temporal columns, or a number (the width) for numeric ones."""
+    if interval in PARTITION_INTERVALS:
+        timestamps = pd.to_datetime(values)
+        if timestamps.dt.tz is not None:
+            timestamps = timestamps.dt.tz_localize(None)
+        periods = timestamps.dt.to_period(PARTITION_INTERVALS[interval][0])
+        return periods.dt.start_time, (periods + 1).dt.start_time
+    numbers = pd.Series(pd.to_numeric(values), index=values.index).astype("Float64").to_numpy(dtype=float, na_value=np.nan)
+    lower = np.floor(numbers / interval) * interval
+    return pd.Series(lower, index=values.index), pd.Series(lower + interval, index=values.index)
+
+
+def _bound_literal(bound) -> str:
+    if isinstance(bound, pd.Timestamp):
+        return f"'{bound.isoformat()}'"
+    return str(int(bound)) if float(bound).is_integer() else repr(float(bound))
+
+
+def _partition_suffix(lower, interval) -> str:
+    if interval in PARTITION_INTERVALS:
+        return lower.strftime(PARTITION_INTERVALS[interval][1])
+    return _bound_literal(lower).replace("-", "m").replace(".", "_").replace("+", "")
+
+
+def encode_csv(data: pd.DataFrame) -> bytes:
+    """Renders the rows as CSV bytes for COPY ... WITH CSV."""
+    output = StringIO()
+    data.to_csv(output, index=False, header=False)
+    return output.getvalue().encode()
+
+
+# Backslash sequences of COPY's text format, see decode_copy_text
+COPY_TEXT_ESCAPES = {"b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t", "v": "\v"}
+_COPY_TEXT_ESCAPE = re.compile(r"\\(.)")
+
+
+def _unescape_copy_text(values: pd.Series) -> pd.Series:
+    """Undoes the backslash escaping of COPY's text format, only for the values that contain one."""
+    escaped = values.str.contains("\\", regex=False, na=False)
+    if not escaped.any():
+        return values
+    values = values.copy()
+    values[escaped] = values[escaped].map(
+        lambda v: _COPY_TEXT_ESCAPE.sub(lambda m: COPY_TEXT_ESCAPES.get(m.group(1), m.group(1)), v)
+    )
+    return values
+
+
+def decode_copy_text(payload: bytes, columns: list, python_types: dict) -> pd.DataFrame:
+    """Decodes whole rows of COPY ... TO STDOUT text output into a DataFrame, column-wise.
+
+    The text format escapes tabs and newlines inside values, so every raw newline ends a row and
+    pandas' C parser splits the fields. Numbers are parsed straight to their dtype, the other columns
+    are unescaped and converted by readback.decode_frame.
+    """
+    frame = pd.read_csv(
+        BytesIO(payload), sep="\t", header=None, names=columns, index_col=False, quoting=csv.QUOTE_NONE,
+        na_values={col: ["\\N"] for col in columns}, keep_default_na=False, skip_blank_lines=False,
+        float_precision="round_trip",
+        dtype={col: parse_dtype(python_types.get(col, str)) for col in columns},
+    )
+    for col in columns:
+        if frame[col].dtype == object:
+            frame[col] = _unescape_copy_text(frame[col])
+    return decode_frame(frame, python_types)
+
 
 class PostgresDB(BaseDB):
-    def __init__(self, db_url: str, schema: str = 'public'):
+    # COPY accepts CSV bytes as they are, see copy_csv_stream
+    streams_csv = True
+    alters_column_types = True
+
+    def __init__(self, db_url: str, schema: str = 'public', copy_format: str = "binary",
+                 parallelism: int = 1, atomic: bool = False, min_rows_per_partition: int = 10_000,
+                 serialize_batch_size: int = 10_000, max_in_flight: int = 2, executor: Executor = None,
+                 pool_size: int = None, unlogged: bool = False, defer_indexes: bool = False,
+                 partition_by: str = None, partition_strategy: str = "range", partition_interval="month",
+                 partition_count: int = 8):
+        """
+        Args:
+            db_url (str): Connection url
+            schema (str, optional): Target schema. Defaults to 'public'.
+            copy_format (str, optional): "binary" to COPY through asyncpg's binary codecs, falling back
+                to "csv" if the data cannot be encoded. Defaults to "binary".
+            parallelism (int, optional): Number of connections an insert is COPY'd over. Values above 1
+                open a connection pool. Defaults to 1.
+            atomic (bool, optional): Commit the partitions of a parallel insert only if all of them
+                were copied. Such an insert holds a pooled connection per partition until the last
+                one is copied, so it takes them all before starting and concurrent atomic inserts
+                get theirs one insert at a time. An insert with more partitions than pooled
+                connections is copied on one connection instead. Defaults to False.
+            min_rows_per_partition (int, optional): Inserts are only split while every partition
+                gets at least this many rows. Defaults to 10_000.
+            serialize_batch_size (int, optional): Rows per COPY batch. Batch N+1 is serialized off the
+                event loop while batch N is copied. Defaults to 10_000.
+            max_in_flight (int, optional): Maximum serialized batches held per COPY stream. Defaults to 2.
+            executor (Executor, optional): Where serialization runs, a ProcessPoolExecutor also works.
+                Defaults to the event loop's default thread pool.
+            pool_size (int, optional): Open a pool of this many COPY connections even without
+                parallelism, e.g. to stage several tables concurrently. Defaults to None.
+            unlogged (bool, optional): Create tables UNLOGGED. They skip the WAL, so they load faster
+                but are truncated after a crash and not replicated. Defaults to False.
+            defer_indexes (bool, optional): Drop the table's non-unique indexes and foreign key constraints
+                before a load and rebuild them once after it, instead of maintaining them row by row.
+                Primary keys, unique and exclusion constraints and unique indexes are kept, so duplicates
+                are rejected during the load. The rebuild statements are saved in the
+                config.DEFERRED_INDEXES_TABLE table until they succeed. Defaults to False.
+            partition_by (str, optional): Create new tables that have this column as declaratively
+                partitioned tables. Rows are routed to their partition client-side, partitions are
+                created on demand and COPY'd concurrently over the pool. Defaults to None.
+            partition_strategy (str, optional): "range" or "hash". Defaults to "range".
+            partition_interval (optional): Width of a range partition: "day", "month" or "year" for
+                temporal columns, a number for numeric ones. Defaults to "month".
+            partition_count (int, optional): Number of hash partitions (the modulus). Defaults to 8.
+        """
         super().__init__(db_url, schema)
+        if copy_format not in ("binary", "csv"):
+            raise ValueError("copy_format must be either 'binary' or 'csv'.")
+        if parallelism < 1:
+            raise ValueError("parallelism must be at least 1.")
+        if partition_strategy not in ("range", "hash"):
+            raise ValueError("partition_strategy must be either 'range' or 'hash'.")
+        if partition_strategy == "range" and partition_interval not in PARTITION_INTERVALS and (
+                not isinstance(partition_interval, (int, float)) or partition_interval <= 0):
+            raise ValueError(f"partition_interval must be one of {list(PARTITION_INTERVALS)} or a positive number.")
+        self.copy_format = copy_format
+        self.parallelism = parallelism
+        self.atomic = atomic
+        self.min_rows_per_partition = min_rows_per_partition
+        self.serialize_batch_size = serialize_batch_size
+        self.max_in_flight = max_in_flight
+        self.executor = executor
+        self.pool_size = pool_size
+        self.unlogged = unlogged
+        self.defer_indexes = defer_indexes
+        self.partition_by = partition_by
+        self.partition_strategy = partition_strategy
+        self.partition_interval = partition_interval
+        self.partition_count = partition_count
+        # table -> "range", "hash" or None (not partitioned), and table -> names of its partitions
+        self._partition_strategies:dict = {}
+        self._known_partitions:dict = {}
+        self._copy_connections = 0
+        # COPY connections reserved by a scheduler for its next connect, on top of pool_size
+        self._reserved_connections = 0
         self.conn:asyncpg.Connection = None
+        self.pool:asyncpg.Pool = None
+        # self.conn serves DDL and catalog queries, which may be issued by concurrent loads
+        self._conn_lock:asyncio.Lock = None
+        # Held while an atomic parallel insert acquires its connections, see _acquire_connections
+        self._acquire_lock:asyncio.Lock = None
+
+    def reserve_connections(self, count: int):
+        """Sizes the COPY pool of the next connect for `count` concurrent inserts, each with all of its
+        partitions. pool_size is left as configured, see release_connections."""
+        self._reserved_connections = count * self.parallelism
+
+    def release_connections(self):
+        self._reserved_connections = 0
 
     async def connect(self):
-        """Establish a connection to PostgreSQL."""
-        self.conn = await asyncpg.connect(self.db_url)
+        """Establish a connection to PostgreSQL, or a pool when inserts are parallel."""
+        self._conn_lock = asyncio.Lock()
+        self._acquire_lock = asyncio.Lock()
+        copy_connections = max(
+            self.parallelism if self.parallelism > 1 else 0, self.pool_size or 0, self._reserved_connections
+        )
+        self._copy_connections = copy_connections
+        if copy_connections:
+            # One connection is held for DDL and catalog queries, the rest serve the COPYs
+            self.pool = await asyncpg.create_pool(
+                self.db_url, min_size=1, max_size=copy_connections + 1
+            )
+            self.conn = await self.pool.acquire()
+        else:
+            self.conn = await asyncpg.connect(self.db_url)
 
     async def get_columns(self, table_name: str):
         """Fetch existing columns in the specified PostgreSQL table."""
@@ -22,21 +306,30 @@ class PostgresDB(BaseDB):
         FROM information_schema.columns
         WHERE table_schema = '{self.schema}' AND table_name = '{table_name}';
         """
-        rows = await self.conn.fetch(query)
+        async with self._conn_lock:
+            rows = await self.conn.fetch(query)
         return {row['column_name'] for row in rows}
 
     async def add_columns(self, table_name: str, new_columns: dict):
         """Add missing columns to the PostgreSQL table based on incoming data."""
-        for column_name, dtype in new_columns.items():
-            sql_type = self._map_dtype_to_sql(dtype, "postgresql")
-            alter_table_query = f"ALTER TABLE {self.schema}.{table_name} ADD COLUMN {column_name} {sql_type};"
-            await self.conn.execute(alter_table_query)
+        # One ALTER TABLE for all the columns, a single round trip and table rewrite check
+        additions = ", ".join(f"ADD COLUMN {column_name} {sql_type}" for column_name, sql_type in new_columns.items())
+        alter_table_query = f"ALTER TABLE {self.schema}.{table_name} {additions};"
+        with self.instrumentation.phase("ddl", table=table_name):
+            async with self._conn_lock:
+                await self.conn.execute(alter_table_query)
+
+    async def insert(self, table_name, data: pd.DataFrame, columns_and_types: dict, existing_columns: set = None,
+                     checkpoint: tuple = None):
+        """Insert data into the PostgreSQL table, adding columns dynamically if necessary.
 
-    async def insert(self, table_name, data: pd.DataFrame, columns_and_types: dict):
-        """Insert data into the PostgreSQL table, adding columns dynamically if necessary."""
+        With a checkpoint, a (manifest table, row), the data and the manifest row are written in one
+        transaction on one connection, so its partitions are not copied in parallel.
+        """
         
-        # Step 1: Get existing columns
-        existing_columns = await self.get_columns(table_name)
+        # Step 1: Get existing columns, unless the caller already knows them
+        if existing_columns is None:
+            existing_columns = await self.get_columns(table_name)
         
         # Step 2: Identify and add new columns if necessary
         new_columns = set(data.columns) - set(existing_columns)
@@ -44,38 +337,629 @@ class PostgresDB(BaseDB):
             new_cols_and_types = {k: columns_and_types[k] for k in new_columns if k in columns_and_types}
             await self.add_columns(table_name, new_cols_and_types)
 
-        # Step 3: Prepare CSV format for insertion
-        output = StringIO()
-        data.to_csv(output, index=False, header=False)
-        output.seek(0)
+        # Step 3: COPY the rows, into their partitions for a partitioned table, otherwise split over
+        # the pool when the data are large enough
+        strategy = await self._partition_strategy(table_name) if self.partition_by in data.columns else None
+        if strategy is not None:
+            targets = await self._route(table_name, data, columns_and_types, strategy)
+        else:
+            targets = [(table_name, partition) for partition in self._partitions(data)]
+
+        if checkpoint is not None:
+            async with self._copy_connection() as conn:
+                async with conn.transaction():
+                    for target, rows in targets:
+                        await self._copy(conn, target, rows, columns_and_types, label=table_name)
+                    manifest_table, row = checkpoint
+                    placeholders = ", ".join(f"${i}" for i in range(1, len(row) + 1))
+                    await conn.execute(
+                        f"INSERT INTO {self.schema}.{manifest_table} ({', '.join(row)}) VALUES ({placeholders})",
+                        *row.values()
+                    )
+        elif len(targets) == 1:
+            async with self._copy_connection() as conn:
+                await self._copy(conn, targets[0][0], targets[0][1], columns_and_types, label=table_name)
+        elif self.pool is not None and not (self.atomic and len(targets) > self._copy_connections):
+            await self._parallel_copy(table_name, targets, columns_and_types)
+        else:
+            # Without a pool, or atomic with more partitions than connections, on one connection
+            async with self._copy_connection() as conn:
+                async with (conn.transaction() if self.atomic else nullcontext()):
+                    for target, rows in targets:
+                        await self._copy(conn, target, rows, columns_and_types, label=table_name)
+
+    async def read(self, table_name, columns: list, python_types: dict, where: str = None,
+                   chunk_size: int = 50_000) -> AsyncIterator[pd.DataFrame]:
+        """Streams the columns of the table's rows (matching `where`) out with COPY ... TO STDOUT
+        and yields them as DataFrames of at most chunk_size rows, see decode_copy_text.
+
+        COPY uses the text format: its fields are parsed by pandas' C parser, while the binary format
+        would need a Python decoder per value. The COPY is paused while chunks wait to be consumed.
+        Without a pool it holds the shared connection until the generator is exhausted or closed.
+        """
+        query = f"SELECT {', '.join(columns)} FROM {self.schema}.{table_name}"
+        if where:
+            query += f" WHERE {where}"
+        blocks = asyncio.Queue(maxsize=self.max_in_flight)
+        done = object()
+
+        async def produce():
+            try:
+                async with self._copy_connection() as conn:
+                    await conn.copy_from_query(query, output=blocks.put, format="text")
+            except asyncio.CancelledError:
+                # The consumer stopped early and no longer reads the queue
+                raise
+            except Exception:
+                await blocks.put(done)
+                raise
+            await blocks.put(done)
+
+        loop = asyncio.get_running_loop()
+        producer = asyncio.ensure_future(produce())
+        # Blocks received since the last chunk and the rows they complete
+        parts, rows = [], 0
+        try:
+            while True:
+                block = await blocks.get()
+                if block is not done:
+                    parts.append(block)
+                    rows += block.count(b"\n")
+                    if rows < chunk_size:
+                        continue
+                pending = b"".join(parts)
+                if block is done:
+                    if not pending:
+                        break
+                    ends = [len(pending)]
+                else:
+                    # Cut after whole rows, chunk_size of them at a time
+                    newlines = np.flatnonzero(np.frombuffer(pending, dtype=np.uint8) == 10)
+                    ends = newlines[chunk_size - 1::chunk_size] + 1
+                start = 0
+                for end in ends:
+                    with self.instrumentation.phase("serialization", table=table_name):
+                        frame = await loop.run_in_executor(
+                            self.executor, decode_copy_text, pending[start:end], columns, python_types
+                        )
+                    self.instrumentation.count("rows_read", len(frame), table=table_name)
+                    yield frame
+                    start = end
+                rest = pending[start:]
+                parts, rows = ([rest], rest.count(b"\n")) if rest else ([], 0)
+                if block is done:
+                    break
+            # Raises the COPY's error, if any
+            await producer
+        finally:
+            if not producer.done():
+                producer.cancel()
+                try:
+                    await producer
+                except (asyncio.CancelledError, Exception):
+                    pass
 
-        # Step 4: Use `copy_from` with the CSV string data
-        copy_query = f"COPY {self.schema}.{table_name} ({', '.join(data.columns)}) FROM STDIN WITH CSV"
-        await self.conn.copy_from(output, copy_query)
+    async def copy_csv_stream(self, table_name, source: AsyncIterable, columns: list,
+                              delimiter: str = ",", header: bool = True) -> int:
+        """COPY CSV bytes straight from `source`, e.g. the blocks of a file, without parsing them
+        client-side. The table must already have the columns.
+
+        Args:
+            table_name (str): Target table
+            source (AsyncIterable): Yields the CSV as bytes, in blocks of any size
+            columns (list): The table columns, in the order of the CSV fields
+            delimiter (str, optional): Field delimiter. Defaults to ",".
+            header (bool, optional): The first line is a header and is skipped. Defaults to True.
+
+        Returns:
+            int: The number of rows copied
+        """
+        sent = 0
+
+        async def counted():
+            nonlocal sent
+            async for block in source:
+                sent += len(block)
+                yield block
+
+        async with self._copy_connection() as conn:
+            with self.instrumentation.phase("transfer", table=table_name):
+                status = await conn.copy_to_table(
+                    table_name, source=counted(), columns=list(columns), schema_name=self.schema,
+                    format="csv", delimiter=delimiter, header=header
+                )
+        rows = int(status.split()[-1])
+        self.instrumentation.count("bytes_sent", sent, table=table_name)
+        self.instrumentation.count("rows_staged", rows, table=table_name)
+        return rows
+
+    @asynccontextmanager
+    async def _copy_connection(self):
+        """A pooled connection if there is a pool, otherwise the (locked) shared connection."""
+        if self.pool is not None:
+            async with self.pool.acquire() as conn:
+                yield conn
+        else:
+            async with self._conn_lock:
+                yield self.conn
+
+    def _partitions(self, data: pd.DataFrame) -> list:
+        """Splits the data into at most `parallelism` contiguous row ranges (views, not copies)."""
+        if self.pool is None:
+            return [data]
+        total = min(self.parallelism, len(data) // max(self.min_rows_per_partition, 1))
+        if total <= 1:
+            return [data]
+        bounds = np.linspace(0, len(data), total + 1, dtype=int)
+        return [data.iloc[start:stop] for start, stop in zip(bounds[:-1], bounds[1:])]
+
+    async def _parallel_copy(self, table_name, targets: list, columns_and_types: dict):
+        """COPY every (table, rows) target on its own pooled connection, concurrently. The targets
+        are row ranges of the table or its partitions.
+
+        Without `atomic` each partition commits on its own. With `atomic` every partition is copied
+        inside an open transaction and the transactions are committed only after all COPYs
+        succeeded, otherwise they are all rolled back. The commits themselves are not two-phase.
+        The connections of an atomic insert are acquired up front, see _acquire_connections.
+        """
+        copied = asyncio.Event()
+        state = {"remaining": len(targets), "failed": False}
+
+        async def copy_partition(target, partition):
+            async with self.pool.acquire() as conn:
+                await self._copy(conn, target, partition, columns_and_types, label=table_name)
+
+        async def copy_partition_atomic(conn, target, partition):
+            transaction = conn.transaction()
+            await transaction.start()
+            try:
+                await self._copy(conn, target, partition, columns_and_types, label=table_name)
+            except BaseException:
+                state["failed"] = True
+                copied.set()
+                await transaction.rollback()
+                raise
+            state["remaining"] -= 1
+            if state["remaining"] == 0:
+                copied.set()
+            await copied.wait()
+            with self.instrumentation.phase("commit", table=table_name):
+                if state["failed"]:
+                    await transaction.rollback()
+                else:
+                    await transaction.commit()
+
+        if not self.atomic:
+            results = await asyncio.gather(*(copy_partition(t, p) for t, p in targets), return_exceptions=True)
+        else:
+            connections = await self._acquire_connections(len(targets))
+            try:
+                results = await asyncio.gather(
+                    *(copy_partition_atomic(conn, t, p) for conn, (t, p) in zip(connections, targets)),
+                    return_exceptions=True
+                )
+            finally:
+                for conn in connections:
+                    await self.pool.release(conn)
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+
+    async def _acquire_connections(self, count: int) -> list:
+        """Acquires `count` pooled connections for an atomic parallel insert. Its COPYs wait for each
+        other before committing, so two inserts each holding part of the connections the other waits
+        for would deadlock: the connections are taken by one insert at a time, all before any COPY."""
+        connections = []
+        async with self._acquire_lock:
+            try:
+                for _ in range(count):
+                    connections.append(await self.pool.acquire())
+            except BaseException:
+                for conn in connections:
+                    await self.pool.release(conn)
+                raise
+        return connections
+
+    async def _copy(self, conn: asyncpg.Connection, table_name, data: pd.DataFrame, columns_and_types: dict,
+                    label: str = None):
+        """COPY the rows over `conn` in batches, binary first and CSV as the fallback.
+        Batches are serialized in the executor, overlapping with the COPY of the previous batch.
+        The batches are copied in one transaction (a savepoint inside the caller's), so the rows
+        are committed all or none. Phases and counters are labelled with `label` (the parent of a
+        partition), or the table."""
+        label = label or table_name
+        binary = self.copy_format == "binary"
+        encode = partial(encode_binary_columns, columns_and_types=columns_and_types) if binary else encode_csv
+
+        async def send(batch, payload, encode_seconds):
+            self.instrumentation.record_phase("serialization", encode_seconds, table=label)
+            if binary:
+                try:
+                    # A savepoint, so a failed attempt can be retried as CSV
+                    async with conn.transaction():
+                        await self._copy_binary(conn, table_name, batch, payload, label)
+                    self.instrumentation.count("rows_staged", len(batch), table=label)
+                    return
+                except (asyncpg.exceptions.DataError, TypeError, ValueError, OverflowError) as e:
+                    log_event(logging.WARNING, "Binary COPY failed, falling back to CSV", table=label, error=str(e))
+                    self.instrumentation.count("binary_copy_fallbacks", table=label)
+                    loop = asyncio.get_running_loop()
+                    payload, encode_seconds = await loop.run_in_executor(self.executor, timed_call, encode_csv, batch)
+                    self.instrumentation.record_phase("serialization", encode_seconds, table=label)
+            await self._copy_csv(conn, table_name, batch, payload, label)
+            self.instrumentation.count("rows_staged", len(batch), table=label)
+
+        async with conn.transaction():
+            await pipelined(row_slices(data, self.serialize_batch_size), encode, send, self.max_in_flight, self.executor)
+
+    async def _copy_binary(self, conn: asyncpg.Connection, table_name, data: pd.DataFrame, encoded: list,
+                           label: str = None):
+        """COPY the encoded columns in binary format."""
+        with self.instrumentation.phase("transfer", table=label or table_name):
+            await conn.copy_records_to_table(
+                table_name, records=zip(*encoded), columns=list(data.columns), schema_name=self.schema
+            )
+
+    async def _copy_csv(self, conn: asyncpg.Connection, table_name, data: pd.DataFrame, payload: bytes,
+                        label: str = None):
+        """COPY the CSV payload."""
+        self.instrumentation.count("bytes_sent", len(payload), table=label or table_name)
+        with self.instrumentation.phase("transfer", table=label or table_name):
+            await conn.copy_to_table(
+                table_name, source=BytesIO(payload), columns=list(data.columns),
+                schema_name=self.schema, format="csv"
+            )
 
 
     async def close(self):
-        """Close the PostgreSQL database connection."""
-        if self.conn:
+        """Close the PostgreSQL database connection, or the pool."""
+        if self.pool:
+            if self.conn:
+                await self.pool.release(self.conn)
+            await self.pool.close()
+            self.pool = None
+        elif self.conn:
             await self.conn.close()
+        self.conn = None
 
     async def create_table(self, table_name: str, columns: dict = None):
-        """Creates a table in PostgreSQL with the specified columns, or only an ID column if no columns are provided."""
-        if not columns:
-            columns = {"id": "SERIAL"}  # Default to ID-only table
+        """Creates a table in PostgreSQL with an ID column and the specified columns, in one statement."""
+        columns = {"id": "SERIAL", **(columns or {})}
 
         # Build the CREATE TABLE statement
         columns_def = ", ".join(f"{col_name} {col_type}" for col_name, col_type in columns.items())
-        create_table_query = f"CREATE TABLE IF NOT EXISTS {table_name} ({columns_def});"
+        partitioned = self.partition_by is not None and self.partition_by in columns
+        if partitioned:
+            # A partitioned table holds no rows itself, its partitions are created UNLOGGED instead
+            strategy = self.partition_strategy.upper()
+            create_table_query = (
+                f"CREATE TABLE IF NOT EXISTS {self.schema}.{table_name} ({columns_def}) "
+                f"PARTITION BY {strategy} ({self.partition_by});"
+            )
+        else:
+            unlogged = "UNLOGGED " if self.unlogged else ""
+            create_table_query = f"CREATE {unlogged}TABLE IF NOT EXISTS {self.schema}.{table_name} ({columns_def});"
 
         # Execute the query
-        await self.conn.execute(create_table_query)
-        print(f"Table '{table_name}' created in PostgreSQL database with only an ID column.")
+        with self.instrumentation.phase("ddl", table=table_name):
+            async with self._conn_lock:
+                await self.conn.execute(create_table_query)
+        self._partition_strategies.pop(table_name, None)
+        log_event(logging.INFO, "Table created", table=table_name, backend="postgresql", columns=list(columns),
+                  partitioned_by=self.partition_by if partitioned else None)
+
+    async def _partition_strategy(self, table_name: str) -> str:
+        """"range" or "hash" if the table is partitioned that way, otherwise None. Cached per table."""
+        if table_name not in self._partition_strategies:
+            query = "SELECT partstrat::text FROM pg_partitioned_table WHERE partrelid = to_regclass($1);"
+            async with self._conn_lock:
+                strategy = await self.conn.fetchval(query, f"{self.schema}.{table_name}")
+            self._partition_strategies[table_name] = {"r": "range", "h": "hash"}.get(strategy)
+        return self._partition_strategies[table_name]
+
+    async def list_partitions(self, table_name: str) -> dict:
+        """Returns the partitions of a partitioned table: name -> bound, e.g. "FOR VALUES FROM (...) TO (...)"."""
+        query = """
+        SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) AS bound
+        FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = to_regclass($1)
+        ORDER BY c.relname;
+        """
+        async with self._conn_lock:
+            rows = await self.conn.fetch(query, f"{self.schema}.{table_name}")
+        partitions = {row["relname"]: row["bound"] for row in rows}
+        self._known_partitions[table_name] = set(partitions)
+        return partitions
+
+    async def _route(self, table_name: str, data: pd.DataFrame, columns_and_types: dict, strategy: str) -> list:
+        """Splits the rows by partition, creating the missing partitions. Returns (partition, rows) pairs."""
+        if table_name not in self._known_partitions:
+            await self.list_partitions(table_name)
+        known = self._known_partitions[table_name]
+        values = data[self.partition_by]
+        partitions = {}
+        if strategy == "hash":
+            remainders = await self._hash_remainders(table_name, values, columns_and_types.get(self.partition_by))
+            for remainder in np.unique(remainders):
+                name = f"{table_name}_h{remainder}"
+                partitions[name] = (f"FOR VALUES WITH (MODULUS {self.partition_count}, REMAINDER {remainder})",
+                                    np.flatnonzero(remainders == remainder))
+        else:
+            lower, upper = range_partition_bounds(values, self.partition_interval)
+            nulls = lower.isna().to_numpy()
+            if nulls.any():
+                # Range partitions cannot hold NULL keys, the default partition takes them
+                partitions[f"{table_name}_default"] = ("DEFAULT", np.flatnonzero(nulls))
+            codes, bounds = pd.factorize(lower)
+            for code, bound in enumerate(bounds):
+                positions = np.flatnonzero(codes == code)
+                name = f"{table_name}_p{_partition_suffix(bound, self.partition_interval)}"
+                partitions[name] = (
+                    f"FOR VALUES FROM ({_bound_literal(bound)}) TO ({_bound_literal(upper.iloc[positions[0]])})",
+                    positions,
+                )
+
+        missing = {name: bound for name, (bound, _) in partitions.items() if name not in known}
+        if missing:
+            with self.instrumentation.phase("ddl", table=table_name):
+                async with self._conn_lock:
+                    for name, bound in missing.items():
+                        unlogged = "UNLOGGED " if self.unlogged else ""
+                        await self.conn.execute(
+                            f"CREATE {unlogged}TABLE IF NOT EXISTS {self.schema}.{name} "
+                            f"PARTITION OF {self.schema}.{table_name} {bound};"
+                        )
+            known.update(missing)
+            self.instrumentation.count("partitions_created", len(missing), table=table_name)
+            log_event(logging.INFO, "Partitions created", table=table_name, partitions=list(missing))
+        return [(name, data.iloc[positions]) for name, (_, positions) in partitions.items()]
+
+    async def _hash_remainders(self, table_name: str, values: pd.Series, sql_type: str) -> np.ndarray:
+        """PostgreSQL's own hash partition remainder of every value, computed server-side for the
+        distinct values only, since the hash function cannot be reproduced client-side."""
+        codes, uniques = pd.factorize(values, use_na_sentinel=False)
+        encoder = BINARY_COPY_ENCODERS.get(sql_type, _encode_object)
+        query = f"""
+        SELECT v.ord, r.remainder
+        FROM unnest($1::{sql_type or 'TEXT'}[]) WITH ORDINALITY AS v(value, ord)
+        CROSS JOIN LATERAL (
+            SELECT remainder FROM generate_series(0, $2 - 1) AS remainder
+            WHERE satisfies_hash_partition(to_regclass($3)::oid, $2, remainder, v.value)
+        ) AS r;
+        """
+        async with self._conn_lock:
+            rows = await self.conn.fetch(query, encoder(pd.Series(uniques)), self.partition_count,
+                                         f"{self.schema}.{table_name}")
+        remainders = np.empty(len(uniques), dtype=np.int64)
+        for row in rows:
+            remainders[row["ord"] - 1] = row["remainder"]
+        return remainders[codes]
+
+    async def drop_partitions_before(self, table_name: str, value, detach: bool = False) -> list:
+        """Retention for range partitioned tables: drops (or only detaches) every partition whose
+        upper bound is at or before `value`, instead of DELETEing its rows.
+
+        Args:
+            table_name (str): The partitioned table
+            value: A timestamp or number, compared with the partitions' upper bounds
+            detach (bool, optional): DETACH the partitions, keeping them as standalone tables. Defaults to False.
+
+        Returns:
+            list: The names of the dropped or detached partitions
+        """
+        temporal = not isinstance(value, (int, float, np.number))
+        cutoff = pd.Timestamp(value) if temporal else float(value)
+        removed = []
+        for name, bound in (await self.list_partitions(table_name)).items():
+            match = re.search(r"TO \((.*)\)$", bound)
+            if match is None or "MAXVALUE" in match.group(1):
+                continue
+            upper = match.group(1).strip("'")
+            upper = pd.Timestamp(upper) if temporal else float(upper)
+            if upper <= cutoff:
+                removed.append(name)
+        with self.instrumentation.phase("ddl", table=table_name):
+            async with self._conn_lock:
+                for name in removed:
+                    if detach:
+                        await self.conn.execute(f"ALTER TABLE {self.schema}.{table_name} DETACH PARTITION {self.schema}.{name};")
+                    else:
+                        await self.conn.execute(f"DROP TABLE {self.schema}.{name};")
+        self._known_partitions[table_name].difference_update(removed)
+        log_event(logging.INFO, "Partitions detached" if detach else "Partitions dropped", table=table_name, partitions=removed)
+        return removed
     
     
+    async def begin_load(self, table_name: str):
+        """With defer_indexes, drops the table's non-unique indexes and foreign keys, saving their rebuild
+        statements in the DEFERRED_INDEXES_TABLE table in the same transaction."""
+        if not self.defer_indexes:
+            return
+        qualified_name = f"{self.schema}.{table_name}"
+        # Dropping a foreign key drops no index. Constraints that enforce uniqueness stay.
+        constraints_query = """
+        SELECT c.conname, pg_get_constraintdef(c.oid) AS definition
+        FROM pg_constraint c
+        WHERE c.conrelid = to_regclass($1) AND c.contype = 'f';
+        """
+        indexes_query = """
+        SELECT i.relname, pg_get_indexdef(x.indexrelid) AS definition
+        FROM pg_index x JOIN pg_class i ON i.oid = x.indexrelid
+        WHERE x.indrelid = to_regclass($1) AND NOT x.indisunique
+            AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = x.indexrelid);
+        """
+        deferred = []
+        with self.instrumentation.phase("ddl", table=table_name):
+            async with self._conn_lock:
+                await self._ensure_deferred_table()
+                async with self.conn.transaction():
+                    drops = []
+                    for name, definition in await self.conn.fetch(constraints_query, qualified_name):
+                        drops.append(f"ALTER TABLE {qualified_name} DROP CONSTRAINT {name};")
+                        deferred.append(f"ALTER TABLE {qualified_name} ADD CONSTRAINT {name} {definition};")
+                    for name, definition in await self.conn.fetch(indexes_query, qualified_name):
+                        drops.append(f"DROP INDEX {self.schema}.{name};")
+                        deferred.append(f"{definition};")
+                    if deferred:
+                        await self.conn.executemany(
+                            f"INSERT INTO {self.schema}.{DEFERRED_INDEXES_TABLE} (table_name, statement) "
+                            "VALUES ($1, $2) ON CONFLICT DO NOTHING;",
+                            [(table_name, statement) for statement in deferred]
+                        )
+                    for drop in drops:
+                        await self.conn.execute(drop)
+        if deferred:
+            log_event(logging.INFO, "Indexes deferred", table=table_name, statements=len(deferred))
+
+    async def end_load(self, table_name: str):
+        """Rebuilds the indexes and foreign keys dropped by begin_load, also those left over by a load that
+        crashed. Every statement is run, one that succeeds is removed from the DEFERRED_INDEXES_TABLE
+        table, one that fails stays there to be retried by the next load.
+
+        Raises:
+            RuntimeError: Raised if any index or constraint could not be rebuilt, naming them
+        """
+        if not self.defer_indexes:
+            return
+        failures = {}
+        with self.instrumentation.phase("ddl", table=table_name):
+            async with self._conn_lock:
+                rows = await self.conn.fetch(
+                    f"SELECT statement FROM {self.schema}.{DEFERRED_INDEXES_TABLE} WHERE table_name = $1;", table_name
+                )
+                # Foreign keys need the referenced unique indexes, so plain indexes go first
+                deferred = sorted((row["statement"] for row in rows), key=lambda statement: " FOREIGN KEY " in statement)
+                for statement in deferred:
+                    try:
+                        async with self.conn.transaction():
+                            await self.conn.execute(statement)
+                            await self.conn.execute(
+                                f"DELETE FROM {self.schema}.{DEFERRED_INDEXES_TABLE} WHERE table_name = $1 AND statement = $2;",
+                                table_name, statement
+                            )
+                    except asyncpg.PostgresError as e:
+                        failures[statement] = e
+        if deferred:
+            log_event(logging.INFO, "Indexes rebuilt", table=table_name, statements=len(deferred) - len(failures))
+        if failures:
+            log_event(logging.ERROR, "Indexes not rebuilt", table=table_name,
+                      errors={statement: str(e) for statement, e in failures.items()})
+            details = "; ".join(f"{statement} ({e})" for statement, e in failures.items())
+            raise RuntimeError(
+                f"{len(failures)} deferred index(es) or constraint(s) of '{table_name}' could not be rebuilt, "
+                f"they are kept in {self.schema}.{DEFERRED_INDEXES_TABLE} and retried after the next load: {details}"
+            )
+
+    async def _ensure_deferred_table(self):
+        await self.conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.schema}.{DEFERRED_INDEXES_TABLE} "
+            "(table_name TEXT NOT NULL, statement TEXT NOT NULL, PRIMARY KEY (table_name, statement));"
+        )
+
+    async def create_staging_table(self, table_name: str, columns: dict):
+        """Creates an UNLOGGED table, which skips the WAL. Unlike a TEMP table it is visible to
+        every pooled connection, so it can be COPY'd in parallel."""
+        columns_def = ", ".join(f"{col_name} {col_type}" for col_name, col_type in columns.items())
+        with self.instrumentation.phase("ddl", table=table_name):
+            async with self._conn_lock:
+                await self.conn.execute(f"CREATE UNLOGGED TABLE {self.schema}.{table_name} ({columns_def});")
+
+    async def ensure_unique_index(self, table_name: str, key_columns: list):
+        """Creates a unique index on the key columns, unless the table already has one on exactly these columns."""
+        query = """
+        SELECT ARRAY(
+            SELECT a.attname FROM unnest(ix.indkey) AS k(attnum)
+            JOIN pg_attribute a ON a.attrelid = ix.indrelid AND a.attnum = k.attnum
+        ) AS columns
+        FROM pg_index ix
+        WHERE ix.indrelid = $1::regclass AND ix.indisunique
+            AND ix.indpred IS NULL AND ix.indexprs IS NULL;
+        """
+        with self.instrumentation.phase("ddl", table=table_name):
+            async with self._conn_lock:
+                rows = await self.conn.fetch(query, f"{self.schema}.{table_name}")
+                if any(set(row["columns"]) == set(key_columns) for row in rows):
+                    return
+                index_name = f"{table_name}_{'_'.join(key_columns)}_key"
+                await self.conn.execute(
+                    f"CREATE UNIQUE INDEX {index_name} ON {self.schema}.{table_name} ({', '.join(key_columns)});"
+                )
+        log_event(logging.INFO, "Unique index created", table=table_name, columns=list(key_columns))
+
+    async def merge(self, source_table: str, target_table: str, key_columns: list, columns: list) -> int:
+        """INSERT ... ON CONFLICT DO UPDATE from the source into the target table. When a key occurs
+        more than once in the source, only its last loaded row (highest MERGE_SEQUENCE_COLUMN) is merged,
+        whichever connection copied it."""
+        keys = ", ".join(key_columns)
+        column_list = ", ".join(columns)
+        updates = [col for col in columns if col not in key_columns]
+        if updates:
+            on_conflict = "DO UPDATE SET " + ", ".join(f"{col} = EXCLUDED.{col}" for col in updates)
+        else:
+            on_conflict = "DO NOTHING"
+        # ON CONFLICT cannot update a row twice in one statement, so the source is deduplicated
+        query = (
+            f"INSERT INTO {self.schema}.{target_table} ({column_list}) "
+            f"SELECT DISTINCT ON ({keys}) {column_list} FROM {self.schema}.{source_table} "
+            f"ORDER BY {keys}, {MERGE_SEQUENCE_COLUMN} DESC "
+            f"ON CONFLICT ({keys}) {on_conflict};"
+        )
+        with self.instrumentation.phase("merge", table=target_table):
+            async with self._conn_lock:
+                status = await self.conn.execute(query)
+        return int(status.split()[-1])
+
     async def drop_table(self, table_name: str):
         """Drops a table in PostgreSQL."""
-        drop_table_query = f"DROP TABLE IF EXISTS {table_name};"
-        await self.conn.execute(drop_table_query)
-        print(f"Table '{table_name}' dropped in PostgreSQL database.")
+        drop_table_query = f"DROP TABLE IF EXISTS {self.schema}.{table_name};"
+        self._partition_strategies.pop(table_name, None)
+        self._known_partitions.pop(table_name, None)
+        with self.instrumentation.phase("ddl", table=table_name):
+            async with self._conn_lock:
+                await self.conn.execute(drop_table_query)
+        log_event(logging.INFO, "Table dropped", table=table_name, backend="postgresql")
+
+    async def read_checkpoints(self, manifest_table: str, load_id: str, table_name: str) -> dict:
+        query = f"SELECT chunk_index, content_hash FROM {self.schema}.{manifest_table} WHERE load_id = $1 AND table_name = $2;"
+        async with self._conn_lock:
+            rows = await self.conn.fetch(query, load_id, table_name)
+        return {row["chunk_index"]: row["content_hash"] for row in rows}
+
+    async def get_column_types(self, table_name: str) -> dict:
+        query = f"""
+        SELECT column_name, upper(data_type) AS data_type
+        FROM information_schema.columns
+        WHERE table_schema = '{self.schema}' AND table_name = '{table_name}';
+        """
+        async with self._conn_lock:
+            rows = await self.conn.fetch(query)
+        return {row["column_name"]: PG_TYPE_NAMES.get(row["data_type"], row["data_type"]) for row in rows}
+
+    async def analyze(self, table_name: str):
+        with self.instrumentation.phase("analyze", table=table_name):
+            async with self._conn_lock:
+                await self.conn.execute(f"ANALYZE {self.schema}.{table_name};")
+
+    async def alter_column_types(self, table_name: str, column_types: dict):
+        """Changes the column types in one ALTER TABLE. Rewrites the table, which is why columns are
+        only ever widened."""
+        current_types = await self.get_column_types(table_name)
+        changes = ", ".join(
+            # BOOLEAN only casts to INTEGER, other numeric targets go through it
+            f"ALTER COLUMN {column_name} TYPE {sql_type} USING {column_name}::INTEGER::{sql_type}"
+            if current_types.get(column_name) == "BOOLEAN" and sql_type in NUMERIC_TYPES
+            else f"ALTER COLUMN {column_name} TYPE {sql_type} USING {column_name}::{sql_type}"
+            for column_name, sql_type in column_types.items()
+        )
+        with self.instrumentation.phase("ddl", table=table_name):
+            async with self._conn_lock:
+                await self.conn.execute(f"ALTER TABLE {self.schema}.{table_name} {changes};")
+                # The COPYs' cached column codecs (of every pooled connection) still have the old types
+                await self.conn.reload_schema_state()
+        log_event(logging.INFO, "Column types changed", table=table_name, columns=column_types)
+
+    async def read_dictionary(self, table_name: str) -> dict:
+        async with self._conn_lock:
+            rows = await self.conn.fetch(f"SELECT value, id FROM {self.schema}.{table_name};")
+        return {row["value"]: row["id"] for row in rows}
 
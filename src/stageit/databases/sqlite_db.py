@@ -1,14 +1,153 @@
 import aiosqlite
+import asyncio
+import logging
+import multiprocessing
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+import weakref
 from abc import ABC
-from typing import Union
+from functools import partial
+from typing import AsyncIterator, Union
 import pandas as pd
 import numpy as np
+from concurrent.futures import Executor, ProcessPoolExecutor
 from .base_db import BaseDB
+from ..config import MERGE_SEQUENCE_COLUMN
+from ..instrumentation import log_event
+from ..pipeline import pipelined, row_slices, timed_call
+from ..readback import decode_rows
+
+# Pragmas applied for the duration of a bulk load and restored afterwards
+DEFAULT_LOAD_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "OFF",
+    "cache_size": -262144,  # negative values are KiB, i.e. 256 MiB
+}
+
+# Pragmas of the throwaway shard databases: no journal, no fsync, no lock handoffs
+SHARD_PRAGMAS = {
+    "journal_mode": "OFF",
+    "synchronous": "OFF",
+    "locking_mode": "EXCLUSIVE",
+}
+
+# SQLite's default limit on attached databases, i.e. on the shards merged at once
+MAX_SHARDS = 10
+
+
+def _iso_timestamps(values: pd.Series) -> list:
+    """datetime64 column to ISO-8601 strings (the format of pd.Timestamp.isoformat), NaT to None."""
+    if values.dt.tz is not None:
+        return [None if pd.isna(v) else v.isoformat() for v in values]
+    raw = values.to_numpy(dtype="datetime64[ns]")
+    mask = np.isnat(raw)
+    has_fraction = (raw[~mask].astype(np.int64) % 1_000_000_000 != 0).any()
+    strings = np.datetime_as_string(raw, unit="us" if has_fraction else "s").astype(object)
+    strings[mask] = None
+    return strings.tolist()
+
+
+def _column_to_sqlite(values: pd.Series) -> list:
+    """Converts a whole column to values the sqlite3 module accepts: NaN/NaT become None and
+    timestamps become ISO-8601 strings. Numeric columns are unboxed straight from the NumPy buffer."""
+    kind = values.dtype.kind
+    if kind == "M":
+        return _iso_timestamps(values)
+    if kind in "iufb" and not values.hasnans:
+        return values.tolist()
+    if kind == "O" and pd.api.types.infer_dtype(values, skipna=True) in ("datetime", "datetime64", "mixed"):
+        # Only object columns that may hold pd.Timestamps need a per-value pass
+        return [None if pd.isna(v) else v.isoformat() if isinstance(v, pd.Timestamp) else v for v in values]
+    return values.astype(object).where(values.notna(), None).tolist()
+
+
+def to_sqlite_rows(data: pd.DataFrame):
+    """Converts the frame column-wise and returns an iterator of row tuples for `executemany`."""
+    return zip(*(_column_to_sqlite(data[col]) for col in data.columns))
+
+
+def encode_sqlite_rows(data: pd.DataFrame) -> list:
+    """Materialised to_sqlite_rows, so the conversion happens where it is called (e.g. an executor)."""
+    return list(to_sqlite_rows(data))
+
+
+def encode_sqlite_batches(data: pd.DataFrame, batch_size: int) -> list:
+    """encode_sqlite_rows per row slice of batch_size rows, the batches SQLiteDB.insert writes."""
+    return [encode_sqlite_rows(batch) for batch in row_slices(data, batch_size)]
+
+
+def write_shard(path: str, table_name: str, data: pd.DataFrame, columns_and_types: dict, batch_size: int) -> int:
+    """Writes the rows into a new shard database at `path`, a table named like the target with the
+    data's columns. Runs in a worker process, so the conversion and the writes use their own core.
+    Returns the number of rows written."""
+    conn = sqlite3.connect(path)
+    try:
+        for name, value in SHARD_PRAGMAS.items():
+            conn.execute(f"PRAGMA {name} = {value};")
+        columns_def = ", ".join(f"{col} {columns_and_types.get(col, '')}".rstrip() for col in data.columns)
+        conn.execute(f"CREATE TABLE {table_name} ({columns_def});")
+        query = f"INSERT INTO {table_name} ({', '.join(data.columns)}) VALUES ({', '.join(['?'] * len(data.columns))})"
+        for batch in row_slices(data, batch_size):
+            conn.executemany(query, to_sqlite_rows(batch))
+        conn.commit()
+    finally:
+        conn.close()
+    return len(data)
+
 
 class SQLiteDB(BaseDB):
-    def __init__(self, db_url: str, schema: str = None):
+    # SQLite allows one writer per database file
+    single_writer = True
+    alters_column_types = True
+
+    def __init__(self, db_url: str, schema: str = None, bulk_load: bool = False,
+                 batch_size: int = 10_000, load_pragmas: dict = None, max_in_flight: int = 2,
+                 executor: Executor = None, shard_workers: int = None, shard_min_rows: int = 100_000,
+                 shard_dir: str = None):
+        """
+        Args:
+            db_url (str): Path of the database file
+            schema (str, optional): Unused by SQLite. Defaults to None.
+            bulk_load (bool, optional): Insert in batches of batch_size rows inside one explicit
+                transaction per insert, with load_pragmas applied once for the duration of the load
+                (from begin_load to end_load, or from the first insert to close()). Defaults to False.
+            batch_size (int, optional): Rows per executemany call. Batch N+1 is converted off the event
+                loop while batch N is written. Defaults to 10_000.
+            load_pragmas (dict, optional): Pragmas for bulk_load mode, e.g. {"synchronous": "OFF"}.
+                Defaults to DEFAULT_LOAD_PRAGMAS, pass {} to keep the connection's settings.
+            max_in_flight (int, optional): Maximum converted batches held at once. Defaults to 2.
+            executor (Executor, optional): Where the conversion runs, a ProcessPoolExecutor also works.
+                Defaults to the event loop's default thread pool.
+            shard_workers (int, optional): Load inserts of at least shard_min_rows rows in parallel: the rows
+                are split over this many worker processes, each writes a temporary shard database with
+                SHARD_PRAGMAS, and the shards are merged into the table with ATTACH and INSERT INTO ...
+                SELECT in one transaction. At most MAX_SHARDS. The workers are spawned, so a script using
+                them needs the `if __name__ == "__main__":` guard, and are kept across loads until
+                shutdown() or Stager.close(). Defaults to None (one writer).
+            shard_min_rows (int, optional): Smaller inserts are written directly. Defaults to 100_000.
+            shard_dir (str, optional): Directory of the shard files, removed after each merge. Defaults to
+                the directory of the database file.
+        """
         super().__init__(db_url, schema)
         self.conn:aiosqlite.Connection = None
+        self.bulk_load = bulk_load
+        self.batch_size = batch_size
+        self.load_pragmas = DEFAULT_LOAD_PRAGMAS if load_pragmas is None else load_pragmas
+        self.max_in_flight = max_in_flight
+        self.executor = executor
+        self.last_load_stats:dict = None
+        if shard_workers is not None and not 1 <= shard_workers <= MAX_SHARDS:
+            raise ValueError(f"shard_workers must be between 1 and {MAX_SHARDS}.")
+        self.shard_workers = shard_workers
+        self.shard_min_rows = shard_min_rows
+        self.shard_dir = shard_dir
+        self._shard_pool:ProcessPoolExecutor = None
+        # Loads between begin_load and end_load, and the values the load pragmas replaced while applied
+        self._active_loads = 0
+        self._previous_pragmas:dict = None
 
     async def connect(self):
         """Establish a connection to SQLite."""
@@ -22,70 +161,338 @@ class SQLiteDB(BaseDB):
 
     async def add_columns(self, table_name: str, new_columns: dict):
         """Add missing columns to the SQLite table based on incoming data."""
+        # SQLite adds one column per ALTER TABLE, the statements are sent as one script and transaction
         alter_table_commands = "\n".join(
         f"ALTER TABLE {table_name} ADD COLUMN {column_name} {sql_type};"
         for column_name, sql_type in new_columns.items()
     )
 
         # Execute the concatenated command as a single transaction
-        await self.conn.executescript(alter_table_commands)
-        await self.conn.commit()
+        with self.instrumentation.phase("ddl", table=table_name):
+            await self.conn.executescript(f"BEGIN;\n{alter_table_commands}\nCOMMIT;")
 
     
     async def create_table(self, table_name: str, columns: dict = None):
-        """Creates a table in SQLite with the specified columns, or only an ID column if no columns are provided."""
-        if not columns:
-            columns = {"id": "INTEGER PRIMARY KEY AUTOINCREMENT"}  # Default to ID-only table
+        """Creates a table in SQLite with an ID column and the specified columns, in one statement."""
+        columns = {"id": "INTEGER PRIMARY KEY AUTOINCREMENT", **(columns or {})}
 
         # Build the CREATE TABLE statement
         columns_def = ", ".join(f"{col_name} {col_type}" for col_name, col_type in columns.items())
         create_table_query = f"CREATE TABLE IF NOT EXISTS {table_name} ({columns_def});"
 
         # Execute the query
-        async with self.conn.cursor() as cursor:
-            await cursor.execute(create_table_query)
-        await self.conn.commit()
-        print(f"Table '{table_name}' created in SQLite database with only an ID column.")
+        with self.instrumentation.phase("ddl", table=table_name):
+            async with self.conn.cursor() as cursor:
+                await cursor.execute(create_table_query)
+            await self.conn.commit()
+        log_event(logging.INFO, "Table created", table=table_name, backend="sqlite", columns=list(columns))
+
+    async def create_staging_table(self, table_name: str, columns: dict):
+        """Creates a TEMP table, which lives outside of the main database file and its journal."""
+        columns_def = ", ".join(f"{col_name} {col_type}" for col_name, col_type in columns.items())
+        with self.instrumentation.phase("ddl", table=table_name):
+            await self.conn.execute(f"CREATE TEMP TABLE {table_name} ({columns_def});")
+            await self.conn.commit()
+
+    async def ensure_unique_index(self, table_name: str, key_columns: list):
+        """Creates a unique index on the key columns, unless the table already has one on exactly these columns."""
+        with self.instrumentation.phase("ddl", table=table_name):
+            async with self.conn.execute(f"PRAGMA index_list({table_name});") as cursor:
+                indexes = await cursor.fetchall()
+            # (seq, name, unique, origin, partial)
+            for _, index_name, unique, _, partial in indexes:
+                if not unique or partial:
+                    continue
+                async with self.conn.execute(f"PRAGMA index_info({index_name});") as cursor:
+                    if {row[2] for row in await cursor.fetchall()} == set(key_columns):
+                        return
+            index_name = f"{table_name}_{'_'.join(key_columns)}_key"
+            await self.conn.execute(
+                f"CREATE UNIQUE INDEX {index_name} ON {table_name} ({', '.join(key_columns)});"
+            )
+            await self.conn.commit()
+        log_event(logging.INFO, "Unique index created", table=table_name, columns=list(key_columns))
+
+    async def merge(self, source_table: str, target_table: str, key_columns: list, columns: list) -> int:
+        """INSERT ... ON CONFLICT DO UPDATE (SQLite >= 3.24) from the source into the target table.
+        Rows are upserted in load order (MERGE_SEQUENCE_COLUMN), so the last row of a repeated key wins."""
+        column_list = ", ".join(columns)
+        updates = [col for col in columns if col not in key_columns]
+        if updates:
+            on_conflict = "DO UPDATE SET " + ", ".join(f"{col} = excluded.{col}" for col in updates)
+        else:
+            on_conflict = "DO NOTHING"
+        # "WHERE true" resolves the parsing ambiguity between a join's ON and the upsert's ON CONFLICT
+        query = (
+            f"INSERT INTO {target_table} ({column_list}) "
+            f"SELECT {column_list} FROM temp.{source_table} WHERE true ORDER BY {MERGE_SEQUENCE_COLUMN} "
+            f"ON CONFLICT ({', '.join(key_columns)}) {on_conflict};"
+        )
+        with self.instrumentation.phase("merge", table=target_table):
+            try:
+                async with self.conn.execute(query) as cursor:
+                    merged = cursor.rowcount
+                await self.conn.commit()
+            except BaseException:
+                await self.conn.rollback()
+                raise
+        return merged
 
     async def drop_table(self, table_name: str):
         """Drops a table in SQLite."""
         drop_table_query = f"DROP TABLE IF EXISTS {table_name};"
-        async with self.conn.cursor() as cursor:
-            await cursor.execute(drop_table_query)
-        await self.conn.commit()
-        print(f"Table '{table_name}' dropped in SQLite database.")
+        with self.instrumentation.phase("ddl", table=table_name):
+            async with self.conn.cursor() as cursor:
+                await cursor.execute(drop_table_query)
+            await self.conn.commit()
+        log_event(logging.INFO, "Table dropped", table=table_name, backend="sqlite")
 
+    async def read_checkpoints(self, manifest_table: str, load_id: str, table_name: str) -> dict:
+        query = f"SELECT chunk_index, content_hash FROM {manifest_table} WHERE load_id = ? AND table_name = ?;"
+        async with self.conn.execute(query, (load_id, table_name)) as cursor:
+            return dict(await cursor.fetchall())
 
-    async def insert(self, table_name, data: pd.DataFrame, columns_and_types: dict):
-        """Insert data into the SQLite table, adding columns dynamically if necessary."""
+    async def get_column_types(self, table_name: str) -> dict:
+        async with self.conn.execute(f"PRAGMA table_info({table_name});") as cursor:
+            return {row[1]: row[2] for row in await cursor.fetchall()}
+
+    async def read(self, table_name, columns: list, python_types: dict, where: str = None,
+                   chunk_size: int = 50_000) -> AsyncIterator[pd.DataFrame]:
+        """Yields the columns of the table's rows (matching `where`) as DataFrames of at most chunk_size
+        rows, fetched with fetchmany and decoded column-wise in the executor, see readback.decode_rows."""
+        query = f"SELECT {', '.join(columns)} FROM {table_name}"
+        if where:
+            query += f" WHERE {where}"
+        loop = asyncio.get_running_loop()
+        async with self.conn.execute(query) as cursor:
+            while True:
+                with self.instrumentation.phase("transfer", table=table_name):
+                    rows = await cursor.fetchmany(chunk_size)
+                if not rows:
+                    return
+                with self.instrumentation.phase("serialization", table=table_name):
+                    frame = await loop.run_in_executor(self.executor, decode_rows, rows, columns, python_types)
+                self.instrumentation.count("rows_read", len(frame), table=table_name)
+                yield frame
+
+    async def analyze(self, table_name: str):
+        with self.instrumentation.phase("analyze", table=table_name):
+            await self.conn.execute(f"ANALYZE {table_name};")
+            await self.conn.commit()
+
+    async def alter_column_types(self, table_name: str, column_types: dict):
+        """A no-op: SQLite column types are affinities, an INTEGER column already holds any integer."""
+        pass
+
+    async def read_dictionary(self, table_name: str) -> dict:
+        async with self.conn.execute(f"SELECT value, id FROM {table_name};") as cursor:
+            return dict(await cursor.fetchall())
+
+
+    def serializer(self):
+        return partial(encode_sqlite_batches, batch_size=self.batch_size)
+
+    async def insert(self, table_name, data: pd.DataFrame, columns_and_types: dict, existing_columns: set = None,
+                     serialized: list = None, checkpoint: tuple = None):
+        """Insert data into the SQLite table, adding columns dynamically if necessary.
+
+        `serialized` holds the output of serializer() for the data, when it was converted beforehand.
+        `checkpoint` is a (manifest table, row) inserted before the rows are committed.
+        """
         
-        # Step 1: Get existing columns
-        existing_columns = await self.get_columns(table_name)
+        # Step 1: Get existing columns, unless the caller already knows them
+        if existing_columns is None:
+            existing_columns = await self.get_columns(table_name)
         
         # Step 2: Identify and add new columns if necessary
         new_columns = {col: columns_and_types[col] for col in data.columns if col not in existing_columns}
         if new_columns:
             await self.add_columns(table_name, new_columns)
 
-        # Step 3: Replace NaN, NaT, and Timestamp values with compatible types
-        data = data.map(lambda x: x.isoformat() if isinstance(x, pd.Timestamp) and pd.notna(x) 
-                            else None if pd.isna(x) 
-                            else x)
+        if self.shard_workers and self.shard_workers > 1 and serialized is None and len(data) >= self.shard_min_rows:
+            await self._sharded_insert(table_name, data, columns_and_types, checkpoint)
+            return
 
-        # Step 4: Prepare insert statement with placeholders
+        # Step 3: Prepare insert statement with placeholders
         placeholders = ', '.join(['?'] * len(data.columns))
         query = f"INSERT INTO {table_name} ({', '.join(data.columns)}) VALUES ({placeholders})"
 
-        # Step 5: Execute the batch insert
-        # Convert DataFrame to list of tuples compatible with `executemany`
-        await self.conn.executemany(query, data.itertuples(index=False, name=None))
-        await self.conn.commit()
+        # Step 4: Replace NaN, NaT, and Timestamp values with compatible types, column by column and
+        # off the event loop, while the previous batch is being written
+        async def write(batch, rows, encode_seconds):
+            self.instrumentation.record_phase("serialization", encode_seconds, table=table_name)
+            with self.instrumentation.phase("transfer", table=table_name):
+                await self.conn.executemany(query, rows)
+            self.instrumentation.count("rows_staged", len(batch), table=table_name)
+
+        async def load():
+            if serialized is None:
+                await pipelined(row_slices(data, self.batch_size), encode_sqlite_rows, write,
+                                self.max_in_flight, self.executor)
+            else:
+                for batch, rows in zip(row_slices(data, self.batch_size), serialized):
+                    await write(batch, rows, 0.0)
+            if checkpoint is not None:
+                await self._write_checkpoint(checkpoint)
+
+        if self.bulk_load:
+            await self._bulk_insert(table_name, load, len(data))
+        else:
+            try:
+                await load()
+                with self.instrumentation.phase("commit", table=table_name):
+                    await self.conn.commit()
+            except BaseException:
+                # Otherwise the rows written so far would be committed by the next insert
+                await self.conn.rollback()
+                raise
+
+    async def _write_checkpoint(self, checkpoint: tuple):
+        manifest_table, row = checkpoint
+        await self.conn.execute(
+            f"INSERT INTO {manifest_table} ({', '.join(row)}) VALUES ({', '.join(['?'] * len(row))})",
+            tuple(row.values())
+        )
+
+    async def _sharded_insert(self, table_name, data: pd.DataFrame, columns_and_types: dict, checkpoint: tuple = None):
+        """Writes the rows as shard_workers shard databases in parallel processes, then merges them
+        into the table in one transaction. The shard files are removed in every case."""
+        if self._shard_pool is None:
+            # Spawned, not forked: forking while aiosqlite's and the executor's threads hold locks can
+            # deadlock the workers. The pool is kept across loads, see shutdown().
+            self._shard_pool = ProcessPoolExecutor(max_workers=self.shard_workers,
+                                                   mp_context=multiprocessing.get_context("spawn"))
+            weakref.finalize(self, self._shard_pool.shutdown, wait=False)
+        if self.shard_dir is None and self.db_url != ":memory:":
+            shard_dir = tempfile.mkdtemp(prefix=".stageit_shards_", dir=os.path.dirname(os.path.abspath(self.db_url)))
+        else:
+            shard_dir = tempfile.mkdtemp(prefix=".stageit_shards_", dir=self.shard_dir)
+        bounds = np.linspace(0, len(data), self.shard_workers + 1).astype(int)
+        shards = [(os.path.join(shard_dir, f"shard_{i}.sqlite"), data.iloc[start:end])
+                  for i, (start, end) in enumerate(zip(bounds[:-1], bounds[1:])) if end > start]
+        column_list = ", ".join(data.columns)
+        target = f"{await self._table_schema(table_name)}.{table_name}"
+        loop = asyncio.get_running_loop()
+        try:
+            # Every worker finishes before the directory is removed, also when one of them failed
+            results = await asyncio.gather(*(
+                loop.run_in_executor(self._shard_pool, timed_call, write_shard, path, table_name, rows,
+                                     columns_and_types, self.batch_size)
+                for path, rows in shards
+            ), return_exceptions=True)
+            for result in results:
+                if isinstance(result, BaseException):
+                    raise result
+            for _, seconds in results:
+                self.instrumentation.record_phase("serialization", seconds, table=table_name)
+
+            async def merge():
+                for i in range(len(shards)):
+                    await self.conn.execute(
+                        f"INSERT INTO {target} ({column_list}) SELECT {column_list} FROM shard_{i}.{table_name};"
+                    )
+                if checkpoint is not None:
+                    await self._write_checkpoint(checkpoint)
+
+            # ATTACH is not allowed inside a transaction
+            await self.conn.commit()
+            for i, (path, _) in enumerate(shards):
+                await self.conn.execute(f"ATTACH DATABASE ? AS shard_{i};", (path,))
+            try:
+                with self.instrumentation.phase("transfer", table=table_name):
+                    if self.bulk_load:
+                        await self._bulk_insert(table_name, merge, len(data))
+                    else:
+                        await self.conn.execute("BEGIN")
+                        try:
+                            await merge()
+                            with self.instrumentation.phase("commit", table=table_name):
+                                await self.conn.commit()
+                        except BaseException:
+                            await self.conn.rollback()
+                            raise
+            finally:
+                for i in range(len(shards)):
+                    await self.conn.execute(f"DETACH DATABASE shard_{i};")
+        finally:
+            shutil.rmtree(shard_dir, ignore_errors=True)
+        self.instrumentation.count("rows_staged", len(data), table=table_name)
+        log_event(logging.INFO, "Shards merged", table=table_name, shards=len(shards), rows=len(data))
+
+    async def begin_load(self, table_name: str):
+        """In bulk_load mode, applies the load pragmas once for the whole load."""
+        self._active_loads += 1
+        if self.bulk_load:
+            await self._apply_load_pragmas()
+
+    async def end_load(self, table_name: str):
+        """Restores the pragmas once the last running load ended."""
+        self._active_loads = max(self._active_loads - 1, 0)
+        if self._active_loads == 0:
+            await self._restore_pragmas()
+
+    async def _apply_load_pragmas(self):
+        if self._previous_pragmas is None:
+            self._previous_pragmas = await self._set_pragmas(self.load_pragmas)
+
+    async def _restore_pragmas(self):
+        if self._previous_pragmas is not None:
+            previous, self._previous_pragmas = self._previous_pragmas, None
+            await self._set_pragmas(previous)
+
+    async def _bulk_insert(self, table_name, load, total_rows: int):
+        """Runs load() inside one explicit transaction, with the load pragmas applied. Outside of
+        begin_load/end_load they stay applied until close()."""
+        start = time.perf_counter()
+        await self._apply_load_pragmas()
+        await self.conn.execute("BEGIN")
+        try:
+            await load()
+            with self.instrumentation.phase("commit", table=table_name):
+                await self.conn.commit()
+        except BaseException:
+            await self.conn.rollback()
+            raise
+
+        elapsed = time.perf_counter() - start
+        self.last_load_stats = {
+            "rows": total_rows,
+            "seconds": elapsed,
+            "rows_per_sec": total_rows / elapsed if elapsed > 0 else float("inf"),
+        }
+        log_event(logging.INFO, "Bulk load finished", table=table_name, **self.last_load_stats)
+
+    async def _table_schema(self, table_name: str) -> str:
+        """"temp" for a TEMP table (a merge's scratch table), otherwise "main"."""
+        query = "SELECT 1 FROM temp.sqlite_master WHERE type = 'table' AND name = ?;"
+        async with self.conn.execute(query, (table_name,)) as cursor:
+            return "temp" if await cursor.fetchone() else "main"
+
+    async def _set_pragmas(self, pragmas: dict) -> dict:
+        """Applies the pragmas and returns their previous values."""
+        previous = {}
+        for name, value in pragmas.items():
+            async with self.conn.execute(f"PRAGMA {name};") as cursor:
+                row = await cursor.fetchone()
+            previous[name] = row[0] if row else None
+            await self.conn.execute(f"PRAGMA {name} = {value};")
+        return previous
+
 
 
+    def shutdown(self):
+        """Stops the shard worker processes, which are otherwise kept for the next loads."""
+        if self._shard_pool is not None:
+            self._shard_pool.shutdown()
+            self._shard_pool = None
 
     async def close(self):
-        """Close the SQLite database connection."""
+        """Close the SQLite database connection. The shard workers keep running, see shutdown()."""
+        self._active_loads = 0
         if self.conn:
-            await self.conn.close()
+            try:
+                await self._restore_pragmas()
+            finally:
+                await self.conn.close()
 
     
\ No newline at end of file
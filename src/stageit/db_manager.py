@@ -1,32 +1,263 @@
-from .utils import DB_Enum
+import logging
+import pandas as pd
 from .databases.base_db import BaseDB
+from .config import MANIFEST_TABLE
+from .instrumentation import Instrumentation, log_event
+
+
+def dictionary_table_name(table_name, column):
+    """The lookup table of a dictionary-encoded column."""
+    return f"{table_name}_{column}_dict"
+
 
 class DB_Manager():
 
-    def __init__(self, db:BaseDB):
+    def __init__(self, db:BaseDB, cache_schema:bool = True, instrumentation:Instrumentation = None):
+        """
+        Args:
+            db (BaseDB): The database backend
+            cache_schema (bool, optional): Keep the columns of every table seen in memory, with their
+                types and whether they are dictionary-encoded, so repeated loads do not query the catalog.
+                Defaults to True.
+            instrumentation (Instrumentation, optional): Receives the phase timings and counters of the
+                manager and its backend. Defaults to an Instrumentation without callbacks.
+        """
         self._db:BaseDB = db
-        
+        self.instrumentation = instrumentation or Instrumentation()
+        self._db.instrumentation = self.instrumentation
+        self._cache_schema = cache_schema
+        # (schema, table) -> set of column names, as last seen or changed through this manager
+        self._schema_cache:dict = {}
+        # (schema, table) -> {column: SQL type}, kept like _schema_cache
+        self._type_cache:dict = {}
+        # (schema, table, column) of the columns known to have no dictionary lookup table
+        self._no_dictionaries:set = set()
+        # (schema, table) -> {column: ({value: code}, value type, code type)} of the dictionary-encoded columns
+        self._dictionaries:dict = {}
+
+    def _cache_key(self, table_name):
+        return (self._db.schema, table_name)
+
+    def invalidate_schema_cache(self, table_name=None):
+        """Forgets the cached columns, column types and missing dictionaries of a table, or of every
+        table if no table name is given. Needed when tables are altered outside of this manager.
+        """
+        if table_name is None:
+            self._schema_cache.clear()
+            self._type_cache.clear()
+            self._no_dictionaries.clear()
+        else:
+            key = self._cache_key(table_name)
+            self._schema_cache.pop(key, None)
+            self._type_cache.pop(key, None)
+            self._no_dictionaries = {entry for entry in self._no_dictionaries if entry[:2] != key}
+
     async def connect(self):
         await self._db.connect()
 
     async def create_table(self, table_name, columns):
+        if self._cache_key(table_name) in self._schema_cache:
+            # The table is known to exist, CREATE TABLE IF NOT EXISTS would be a no-op
+            return
         await self._db.create_table(table_name, columns)
-        
+        if self._cache_schema:
+            self._type_cache[self._cache_key(table_name)] = {"id": self._db.id_type, **columns}
+
+    async def create_staging_table(self, table_name, columns):
+        await self._db.create_staging_table(table_name, columns)
+        if self._cache_schema:
+            self._schema_cache[self._cache_key(table_name)] = set(columns)
+            self._type_cache[self._cache_key(table_name)] = dict(columns)
+
+    async def merge(self, source_table, target_table, key_columns, columns):
+        """Adds the columns missing from the target table, then upserts the source table into it on the key columns.
+
+        Args:
+            source_table (str): The table holding the new rows
+            target_table (str): The table to merge into
+            key_columns (list): The columns identifying a row
+            columns (dict): Column name -> SQL type of the columns to merge
+
+        Returns:
+            int: The number of rows inserted or updated
+        """
+        await self.ensure_columns(target_table, columns)
+        await self._db.ensure_unique_index(target_table, key_columns)
+        return await self._db.merge(source_table, target_table, key_columns, list(columns))
+
+    async def drop_partitions_before(self, table_name, value, detach=False):
+        """Drops or detaches the range partitions of the table ending at or before `value` (PostgreSQL)."""
+        return await self._db.drop_partitions_before(table_name, value, detach=detach)
+
     async def drop_table(self, table_name):
         await self._db.drop_table(table_name)
-        
+        self.invalidate_schema_cache(table_name)
+        for column in self._dictionaries.pop(self._cache_key(table_name), {}):
+            await self.drop_table(dictionary_table_name(table_name, column))
+
+    async def get_column_types(self, table_name) -> dict:
+        """Returns the table's columns with their SQL types, cached like get_existing_columns."""
+        key = self._cache_key(table_name)
+        if key in self._type_cache:
+            return dict(self._type_cache[key])
+        with self.instrumentation.phase("ddl", table=table_name):
+            column_types = await self._db.get_column_types(table_name)
+        self.instrumentation.count("catalog_queries", table=table_name)
+        if self._cache_schema and column_types:
+            self._type_cache[key] = dict(column_types)
+            self._schema_cache[key] = set(column_types)
+        return column_types
+
+    async def alter_column_types(self, table_name, column_types):
+        """Changes the types (name -> SQL type) of existing columns of the table."""
+        await self._db.alter_column_types(table_name, column_types)
+        key = self._cache_key(table_name)
+        if key in self._type_cache:
+            self._type_cache[key].update(column_types)
+
+    async def has_dictionary(self, table_name, column) -> bool:
+        """Whether the column was dictionary-encoded by an earlier load, i.e. its lookup table exists.
+        A missing lookup table is remembered too, until add_dictionary creates it."""
+        key = self._cache_key(table_name)
+        if column in self._dictionaries.get(key, {}):
+            return True
+        if (*key, column) in self._no_dictionaries:
+            return False
+        exists = bool(await self.get_existing_columns(dictionary_table_name(table_name, column)))
+        if not exists and self._cache_schema:
+            self._no_dictionaries.add((*key, column))
+        return exists
+
+    async def add_dictionary(self, table_name, column, value_type, code_type):
+        """Dictionary-encodes the column from now on: encode_dictionaries replaces its values by the
+        ids of the lookup table {table}_{column}_dict (id, value), created if missing.
+
+        Args:
+            table_name (str): The table holding the codes
+            column (str): The encoded column
+            value_type (str): SQL type of the values (TEXT)
+            code_type (str): SQL type of the codes
+        """
+        lookup_table = dictionary_table_name(table_name, column)
+        self._no_dictionaries.discard((*self._cache_key(table_name), column))
+        await self.ensure_columns(lookup_table, {"value": value_type})
+        await self._db.ensure_unique_index(lookup_table, ["value"])
+        mapping = await self._db.read_dictionary(lookup_table)
+        self._dictionaries.setdefault(self._cache_key(table_name), {})[column] = (mapping, value_type, code_type)
+
+    async def encode_dictionaries(self, table_name, data: pd.DataFrame) -> pd.DataFrame:
+        """Returns the data with the values of the dictionary-encoded columns replaced by their codes.
+        Values not seen before are added to the lookup tables first."""
+        encoded = self._dictionaries.get(self._cache_key(table_name))
+        if not encoded:
+            return data
+        codes = {}
+        for column in data.columns:
+            if column in encoded:
+                codes[column] = await self._encode_column(table_name, column, data[column], *encoded[column])
+        return data.assign(**codes) if codes else data
+
+    async def _encode_column(self, table_name, column, values: pd.Series, mapping: dict, value_type, code_type) -> pd.Series:
+        values = values.where(values.isna(), values.astype(str))
+        codes = values.map(mapping)
+        new_values = pd.unique(values[codes.isna() & values.notna()])
+        if len(new_values):
+            first_code = max(mapping.values(), default=0) + 1
+            lookup = pd.DataFrame({"id": range(first_code, first_code + len(new_values)), "value": new_values})
+            await self.insert_data(
+                dictionary_table_name(table_name, column), lookup, {"id": code_type, "value": value_type}
+            )
+            mapping.update(zip(lookup["value"], lookup["id"]))
+            codes = values.map(mapping)
+        return codes.astype("Int64")
+
+    async def dictionary_values(self, table_name, column) -> dict:
+        """Returns code -> value of a dictionary-encoded column, read from its lookup table."""
+        mapping = await self._db.read_dictionary(dictionary_table_name(table_name, column))
+        return {code: value for value, code in mapping.items()}
+
+    def read(self, table_name, columns, python_types, where=None, chunk_size=50_000):
+        """Async iterator over the table's rows as DataFrames of at most chunk_size rows, see BaseDB.read."""
+        return self._db.read(table_name, columns, python_types, where=where, chunk_size=chunk_size)
+
     async def get_existing_columns(self, table_name):
-        return await self._db.get_columns(table_name)
+        key = self._cache_key(table_name)
+        if key in self._schema_cache:
+            return set(self._schema_cache[key])
+        with self.instrumentation.phase("ddl", table=table_name):
+            columns = set(await self._db.get_columns(table_name))
+        self.instrumentation.count("catalog_queries", table=table_name)
+        if self._cache_schema and columns:
+            self._schema_cache[key] = columns
+        return set(columns)
 
     async def add_missing_columns(self, table_name, new_columns):
         await self._db.add_columns(table_name, new_columns)
+        key = self._cache_key(table_name)
+        if key in self._schema_cache:
+            self._schema_cache[key].update(new_columns)
+        if key in self._type_cache:
+            self._type_cache[key].update(new_columns)
+
+    async def ensure_columns(self, table_name, columns) -> set:
+        """Creates the table with all the columns (name -> SQL type) in one statement if it does not
+        exist, otherwise adds the missing ones in one ALTER. Returns the table's columns."""
+        existing_columns = await self.get_existing_columns(table_name)
+        if not existing_columns:
+            await self.create_table(table_name, columns)
+            return await self.get_existing_columns(table_name)
+        missing_columns = {col: sql_type for col, sql_type in columns.items() if col not in existing_columns}
+        if missing_columns:
+            await self.add_missing_columns(table_name, missing_columns)
+            existing_columns.update(missing_columns)
+        return existing_columns
 
-    async def insert_data(self, table_name, data, columns):
-        await self._db.insert(table_name, data, columns)
+    async def committed_chunks(self, load_id, table_name, manifest_columns) -> dict:
+        """Creates the manifest table if missing and returns chunk index -> content hash of the chunks
+        the load already committed into the table.
+
+        Args:
+            load_id (str): The load
+            table_name (str): The table loaded
+            manifest_columns (dict): Column name -> SQL type of the manifest table
+        """
+        await self.ensure_columns(MANIFEST_TABLE, manifest_columns)
+        await self._db.ensure_unique_index(MANIFEST_TABLE, ["load_id", "table_name", "chunk_index"])
+        return await self._db.read_checkpoints(MANIFEST_TABLE, load_id, table_name)
+
+    async def analyze(self, table_name):
+        """Refreshes the planner statistics of the table, e.g. after a load into a fresh table."""
+        await self._db.analyze(table_name)
+
+    async def begin_load(self, table_name):
+        await self._db.begin_load(table_name)
+
+    async def end_load(self, table_name, failed=False):
+        """Ends the load started by begin_load. With failed=True the load itself is raising: an error of
+        end_load (e.g. an index that cannot be rebuilt) is logged instead, so it does not replace the load's."""
+        if not failed:
+            await self._db.end_load(table_name)
+            return
+        try:
+            await self._db.end_load(table_name)
+        except Exception as e:
+            log_event(logging.ERROR, "Load not ended after a failed load", table=table_name, error=str(e))
+
+    async def insert_data(self, table_name, data, columns, **insert_options):
+        existing_columns = await self.ensure_columns(
+            table_name, {col: columns[col] for col in data.columns if col in columns}
+        )
+        await self._db.insert(table_name, data, columns, existing_columns=existing_columns, **insert_options)
+
+    async def copy_csv_stream(self, table_name, source, columns, **copy_options):
+        """Adds the missing `columns` (name -> SQL type) to the table and streams the CSV bytes of
+        `source` into it, see PostgresDB.copy_csv_stream. Returns the number of rows copied."""
+        await self.ensure_columns(table_name, columns)
+        return await self._db.copy_csv_stream(table_name, source, list(columns), **copy_options)
 
     async def close(self):
         await self._db.close()
-    
+
     async def __aenter__(self):
         """Handles the asynchronous setup."""
         await self.connect()
@@ -34,4 +265,4 @@ class DB_Manager():
 
     async def __aexit__(self, exc_type, exc_value, traceback):
         """Handles the asynchronous teardown."""
-        await self.close()
\ No newline at end of file
+        await self.close()
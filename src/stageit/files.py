@@ -0,0 +1,131 @@
+import asyncio
+import os
+import re
+from typing import AsyncIterator, Iterator
+import pandas as pd
+from .chunking import default_column_names
+
+CSV_SUFFIXES = (".csv", ".tsv", ".txt")
+PARQUET_SUFFIXES = (".parquet", ".pq")
+# Bytes per read when a file is streamed into COPY
+DEFAULT_BLOCK_SIZE = 1 << 20
+
+# ISO-8601 dates and timestamps without a UTC offset, the text columns read_csv leaves unparsed that
+# are converted before inference. Offsets are left alone: a TIMESTAMP column would silently drop them.
+ISO_DATE = re.compile(r"\d{4}-\d{2}-\d{2}")
+ISO_TIMESTAMP = re.compile(r"\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}(:\d{2}(\.\d{1,9})?)?")
+
+
+def detect_format(path, file_format: str = None) -> str:
+    """Returns "csv" or "parquet", from file_format if given or else from the file's suffix."""
+    if file_format is None:
+        suffix = os.path.splitext(os.fspath(path))[1].lower()
+        if suffix in CSV_SUFFIXES:
+            file_format = "csv"
+        elif suffix in PARQUET_SUFFIXES:
+            file_format = "parquet"
+        else:
+            raise ValueError(f"Cannot tell the format of '{path}', pass file_format='csv' or 'parquet'.")
+    file_format = file_format.lower()
+    if file_format not in ("csv", "parquet"):
+        raise ValueError("file_format must be either 'csv' or 'parquet'.")
+    return file_format
+
+
+def _csv_options(delimiter: str, header: bool, col_names: list, read_options: dict) -> dict:
+    # Nullable dtypes, so integer columns with missing values are not widened to floats
+    options = {"sep": delimiter, "header": 0 if header else None, "dtype_backend": "numpy_nullable", **read_options}
+    if col_names is not None:
+        options["names"] = col_names
+    return options
+
+
+def parse_iso_dates(data: pd.DataFrame) -> pd.DataFrame:
+    """Converts the text columns whose values are all ISO-8601 dates to datetime.date objects and those
+    that are all ISO-8601 timestamps to datetime64, so they are inferred as DATE and TIMESTAMP like the
+    same values in a DataFrame. Other columns are returned as read."""
+    parsed = {}
+    for col in data.columns:
+        values = data[col]
+        if not (values.dtype == object or isinstance(values.dtype, pd.StringDtype)):
+            continue
+        non_null = values.dropna()
+        if len(non_null) == 0 or not isinstance(non_null.iloc[0], str):
+            continue
+        for pattern in (ISO_DATE, ISO_TIMESTAMP):
+            if pattern.fullmatch(non_null.iloc[0]) and non_null.str.fullmatch(pattern.pattern).all():
+                try:
+                    timestamps = pd.to_datetime(values, format="ISO8601")
+                except (TypeError, ValueError, OverflowError):
+                    break
+                if pattern is ISO_DATE:
+                    timestamps = pd.Series(timestamps.dt.date, index=values.index, dtype=object).where(values.notna(), None)
+                parsed[col] = timestamps
+                break
+    return data.assign(**parsed) if parsed else data
+
+
+def read_csv_sample(path, sample_size: int, delimiter: str = ",", header: bool = True, **read_options) -> pd.DataFrame:
+    """Reads the first sample_size rows of a CSV file, see parse_iso_dates. Without a header the columns
+    are named column_0..column_n."""
+    sample = pd.read_csv(path, nrows=sample_size, **_csv_options(delimiter, header, None, read_options))
+    if not header:
+        sample.columns = default_column_names(sample.shape[1])
+    return sample if "parse_dates" in read_options else parse_iso_dates(sample)
+
+
+def iter_csv_chunks(path, chunk_size: int, delimiter: str = ",", header: bool = True,
+                    col_names: list = None, **read_options) -> Iterator[pd.DataFrame]:
+    """Reads a CSV file as DataFrames of at most chunk_size rows, one chunk in memory at a time.
+    Date and timestamp columns are parsed like the sample's, see parse_iso_dates."""
+    options = _csv_options(delimiter, header, col_names, read_options)
+    with pd.read_csv(path, chunksize=chunk_size, **options) as reader:
+        for chunk in reader:
+            yield chunk if "parse_dates" in read_options else parse_iso_dates(chunk)
+
+
+def _parquet_file(path):
+    try:
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("Reading Parquet files needs the pyarrow package.") from e
+    return pq.ParquetFile(path)
+
+
+def iter_parquet_chunks(path, chunk_size: int, columns: list = None) -> Iterator:
+    """Reads a Parquet file as pyarrow RecordBatches of at most chunk_size rows.
+    Needs the optional pyarrow package."""
+    parquet_file = _parquet_file(path)
+    for batch in parquet_file.iter_batches(batch_size=chunk_size, columns=columns):
+        yield batch
+
+
+def read_parquet_schema(path):
+    """Returns the Arrow schema of a Parquet file, read from its footer."""
+    return _parquet_file(path).schema_arrow
+
+
+async def iter_file_blocks(path, block_size: int = DEFAULT_BLOCK_SIZE) -> AsyncIterator[bytes]:
+    """Yields the raw bytes of a file in blocks of block_size, read off the event loop."""
+    loop = asyncio.get_running_loop()
+    f = await loop.run_in_executor(None, open, path, "rb")
+    try:
+        while True:
+            block = await loop.run_in_executor(None, f.read, block_size)
+            if not block:
+                return
+            yield block
+    finally:
+        await loop.run_in_executor(None, f.close)
+
+
+async def read_off_loop(chunks: Iterator) -> AsyncIterator:
+    """Advances a blocking iterator (e.g. a file reader) in the default executor, so reading the
+    next chunk does not stall the event loop."""
+    loop = asyncio.get_running_loop()
+    done = object()
+    while True:
+        chunk = await loop.run_in_executor(None, next, chunks, done)
+        if chunk is done:
+            return
+        yield chunk
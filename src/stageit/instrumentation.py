@@ -0,0 +1,169 @@
+import json
+import logging
+import os
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from . import config
+
+# The phases a load goes through, in order
+PHASES = ("inference", "profile", "ddl", "serialization", "transfer", "merge", "commit", "analyze")
+
+LOGGER_NAME = "stageit"
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats every record as one JSON object, with the record's `fields` merged in."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", {}))
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def get_logger() -> logging.Logger:
+    """Returns the package logger. With config.TURN_LOGGING_ON it writes JSON lines to
+    LOGGING_DIR/stageit.log, or to stderr if LOGGING_DIR is None. Otherwise records only reach
+    the handlers the application configured itself. The config is read on every call, a change
+    replaces the handler added for the previous one.
+    """
+    logger = logging.getLogger(LOGGER_NAME)
+    settings = (config.TURN_LOGGING_ON, config.LOGGING_DIR)
+    previous_settings = getattr(logger, "_stageit_settings", None)
+    if previous_settings == settings:
+        return logger
+    previous = getattr(logger, "_stageit_handler", None)
+    if previous is not None:
+        logger.removeHandler(previous)
+        previous.close()
+    if config.TURN_LOGGING_ON:
+        if config.LOGGING_DIR:
+            os.makedirs(config.LOGGING_DIR, exist_ok=True)
+            handler = logging.FileHandler(os.path.join(config.LOGGING_DIR, "stageit.log"))
+        else:
+            handler = logging.StreamHandler()
+        handler.setFormatter(JsonFormatter())
+        logger.setLevel(logging.INFO)
+    else:
+        handler = logging.NullHandler()
+        if previous_settings is not None and previous_settings[0]:
+            # Undoes the level set while logging was on
+            logger.setLevel(logging.NOTSET)
+    logger.addHandler(handler)
+    logger._stageit_handler = handler
+    logger._stageit_settings = settings
+    return logger
+
+
+def log_event(level: int, message: str, **fields):
+    """Logs a structured event, the fields become keys of the JSON record."""
+    get_logger().log(level, message, extra={"fields": fields})
+
+
+class InstrumentationCallback():
+    """Receives the timings and counters of a load. Subclass it and override what you need."""
+
+    def on_phase(self, phase: str, seconds: float, labels: dict):
+        """Called when a phase ends."""
+        pass
+
+    def on_count(self, name: str, value: float, labels: dict):
+        """Called when a counter is incremented."""
+        pass
+
+
+class InMemoryRecorder(InstrumentationCallback):
+    """Keeps totals per phase and per counter in memory, e.g. for tests or benchmarks."""
+
+    def __init__(self):
+        self.phase_seconds = defaultdict(float)
+        self.phase_calls = defaultdict(int)
+        self.counters = defaultdict(float)
+
+    def on_phase(self, phase, seconds, labels):
+        self.phase_seconds[phase] += seconds
+        self.phase_calls[phase] += 1
+
+    def on_count(self, name, value, labels):
+        self.counters[name] += value
+
+    def summary(self) -> dict:
+        return {
+            "phases": dict(self.phase_seconds),
+            "phase_calls": dict(self.phase_calls),
+            "counters": dict(self.counters),
+        }
+
+    def reset(self):
+        self.phase_seconds.clear()
+        self.phase_calls.clear()
+        self.counters.clear()
+
+
+class PrometheusRecorder(InstrumentationCallback):
+    """Exports phases as a histogram and counters as Prometheus counters.
+    Needs the optional prometheus_client package.
+    """
+
+    def __init__(self, namespace: str = "stageit", registry=None):
+        try:
+            from prometheus_client import Counter, Histogram, REGISTRY
+        except ImportError as e:
+            raise ImportError("PrometheusRecorder needs the prometheus_client package.") from e
+        registry = registry or REGISTRY
+        self._phase_seconds = Histogram(
+            f"{namespace}_phase_seconds", "Time spent per staging phase", ["phase", "table"], registry=registry
+        )
+        self._counter_factory = lambda name: Counter(
+            f"{namespace}_{name}", f"StageIt counter {name}", ["table"], registry=registry
+        )
+        self._counters = {}
+
+    def on_phase(self, phase, seconds, labels):
+        self._phase_seconds.labels(phase=phase, table=labels.get("table", "")).observe(seconds)
+
+    def on_count(self, name, value, labels):
+        if name not in self._counters:
+            self._counters[name] = self._counter_factory(name)
+        self._counters[name].labels(table=labels.get("table", "")).inc(value)
+
+
+class Instrumentation():
+    """Times the phases of a load and forwards timings and counters to the registered callbacks.
+
+    Phases that run concurrently (e.g. the partitions of a parallel COPY) are reported once
+    each, so their sum may exceed the wall-clock time.
+    """
+
+    def __init__(self, callbacks: list = None):
+        self.callbacks:list = list(callbacks or [])
+
+    def add_callback(self, callback: InstrumentationCallback):
+        self.callbacks.append(callback)
+
+    @contextmanager
+    def phase(self, phase: str, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_phase(phase, time.perf_counter() - start, **labels)
+
+    def record_phase(self, phase: str, seconds: float, **labels):
+        """Reports a phase timed elsewhere, e.g. in an executor thread or process."""
+        for callback in self.callbacks:
+            callback.on_phase(phase, seconds, labels)
+        logger = get_logger()
+        if logger.isEnabledFor(logging.DEBUG):
+            log_event(logging.DEBUG, "phase", phase=phase, seconds=seconds, **labels)
+
+    def count(self, name: str, value: float = 1, **labels):
+        for callback in self.callbacks:
+            callback.on_count(name, value, labels)
@@ -0,0 +1,56 @@
+import asyncio
+import time
+from collections import deque
+from concurrent.futures import Executor
+from typing import Awaitable, Callable, Iterable
+
+
+async def pipelined(chunks: Iterable, encode: Callable, consume: Callable[..., Awaitable],
+                    max_in_flight: int = 2, executor: Executor = None):
+    """Encodes chunks in an executor while earlier chunks are being consumed on the event loop.
+
+    While chunk N is consumed, chunks N+1 .. N+max_in_flight-1 are encoded, so serialization and
+    transfer overlap and the event loop never runs the encoder. At most max_in_flight encoded
+    buffers exist at any time. Chunks are consumed in order.
+
+    Args:
+        chunks (Iterable): The chunks, e.g. row slices of a DataFrame.
+        encode (Callable): encode(chunk) -> payload, run in the executor. Must be picklable when
+            the executor is a ProcessPoolExecutor.
+        consume (Callable): async consume(chunk, payload, encode_seconds), run on the event loop.
+        max_in_flight (int, optional): Maximum number of encoded (or encoding) chunks. Defaults to 2.
+        executor (Executor, optional): Where encode runs. Defaults to the loop's default thread pool.
+    """
+    if max_in_flight < 1:
+        raise ValueError("max_in_flight must be at least 1.")
+    loop = asyncio.get_running_loop()
+    pending = deque()
+    try:
+        for chunk in chunks:
+            pending.append((chunk, loop.run_in_executor(executor, timed_call, encode, chunk)))
+            if len(pending) >= max_in_flight:
+                chunk, encoding = pending.popleft()
+                await consume(chunk, *await encoding)
+        while pending:
+            chunk, encoding = pending.popleft()
+            await consume(chunk, *await encoding)
+    finally:
+        # On failure, drop the encodings that were never consumed
+        for _, encoding in pending:
+            encoding.cancel()
+
+
+def timed_call(function: Callable, *args):
+    """Returns function(*args) and the seconds it took. Module level, so it can run in a process pool."""
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def row_slices(data, batch_size: int):
+    """Slices a DataFrame into row ranges of at most batch_size rows (views, not copies)."""
+    if batch_size is None or len(data) <= batch_size:
+        yield data
+        return
+    for start in range(0, len(data), batch_size):
+        yield data.iloc[start:start + batch_size]
@@ -0,0 +1,157 @@
+import numpy as np
+import pandas as pd
+from .chunking import hash_values
+
+# log2 of the number of HyperLogLog registers: 4096 registers, about 1.6% standard error
+SKETCH_PRECISION = 12
+
+
+class DistinctSketch():
+    """A HyperLogLog sketch of the distinct values of a column, updated a whole column at a time.
+    Sketches of different chunks merge into the sketch of their union."""
+
+    def __init__(self, precision:int = SKETCH_PRECISION):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def update(self, values:pd.Series):
+        """Adds the (non-null) values."""
+        if len(values) == 0:
+            return
+        hashes = hash_values(values)
+        width = 64 - self.precision
+        index = (hashes >> np.uint64(width)).astype(np.intp)
+        rest = hashes & np.uint64((1 << width) - 1)
+        # Position of the leftmost 1-bit of the remaining bits, width + 1 when they are all 0
+        _, exponent = np.frexp(rest.astype(np.float64))
+        rank = np.where(rest == 0, width + 1, width + 1 - exponent).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def merge(self, other:"DistinctSketch"):
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self) -> int:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        empty = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and empty > 0:
+            # Small range correction: linear counting
+            estimate = m * np.log(m / empty)
+        return int(round(estimate))
+
+
+def _scalar(value):
+    return value.item() if isinstance(value, np.generic) else value
+
+
+class ColumnProfile():
+    """Row count, null count, min, max and approximate distinct count of one column.
+    min and max are None when the column has no non-null values or they cannot be compared."""
+
+    def __init__(self, name):
+        self.name = name
+        self.rows = 0
+        self.null_count = 0
+        self.min = None
+        self.max = None
+        self.sketch = DistinctSketch()
+        self._comparable = True
+
+    @property
+    def distinct(self) -> int:
+        """Approximate number of distinct non-null values."""
+        return self.sketch.estimate()
+
+    def update(self, values:pd.Series):
+        non_null = values.dropna()
+        self.rows += len(values)
+        self.null_count += len(values) - len(non_null)
+        self.sketch.update(non_null)
+        if len(non_null) and self._comparable:
+            try:
+                self._update_bounds(_scalar(non_null.min()), _scalar(non_null.max()))
+            except TypeError:
+                # Mixed types, e.g. numbers and strings
+                self._comparable = False
+                self.min = self.max = None
+
+    def merge(self, other:"ColumnProfile"):
+        self.rows += other.rows
+        self.null_count += other.null_count
+        self.sketch.merge(other.sketch)
+        if not other._comparable:
+            self._comparable = False
+            self.min = self.max = None
+        elif other.min is not None and self._comparable:
+            try:
+                self._update_bounds(other.min, other.max)
+            except TypeError:
+                self._comparable = False
+                self.min = self.max = None
+
+    def _update_bounds(self, low, high):
+        self.min = low if self.min is None or low < self.min else self.min
+        self.max = high if self.max is None or high > self.max else self.max
+
+    def to_dict(self) -> dict:
+        return {
+            "rows": self.rows,
+            "null_count": self.null_count,
+            "min": self.min,
+            "max": self.max,
+            "distinct": self.distinct,
+        }
+
+    def __repr__(self):
+        return (f"ColumnProfile(name={self.name!r}, rows={self.rows}, null_count={self.null_count}, "
+                f"min={self.min!r}, max={self.max!r}, distinct~{self.distinct})")
+
+
+class TableProfile():
+    """The column profiles of a load, updated chunk by chunk. Columns missing from a chunk count
+    its rows as nulls, like the database does."""
+
+    def __init__(self, table_name):
+        self.table_name = table_name
+        self.rows = 0
+        self.columns:dict = {}
+
+    def update(self, chunk:pd.DataFrame):
+        for col in chunk.columns:
+            if col not in self.columns:
+                profile = self.columns[col] = ColumnProfile(col)
+                # The rows of earlier chunks, which did not have the column
+                profile.rows = profile.null_count = self.rows
+            self.columns[col].update(chunk[col])
+        for col, profile in self.columns.items():
+            if col not in chunk.columns:
+                profile.rows += len(chunk)
+                profile.null_count += len(chunk)
+        self.rows += len(chunk)
+
+    def merge(self, other:"TableProfile"):
+        for col, profile in other.columns.items():
+            if col not in self.columns:
+                self.columns[col] = ColumnProfile(col)
+                self.columns[col].rows = self.columns[col].null_count = self.rows
+            self.columns[col].merge(profile)
+        for col, profile in self.columns.items():
+            if col not in other.columns:
+                profile.rows += other.rows
+                profile.null_count += other.rows
+        self.rows += other.rows
+
+    def __getitem__(self, column) -> ColumnProfile:
+        return self.columns[column]
+
+    def to_dict(self) -> dict:
+        """column -> profile dict (rows, null_count, min, max, distinct)."""
+        return {col: profile.to_dict() for col, profile in self.columns.items()}
+
+    def to_frame(self) -> pd.DataFrame:
+        """The profile as a DataFrame with one row per column."""
+        return pd.DataFrame.from_dict(self.to_dict(), orient="index")
+
+    def __repr__(self):
+        return f"TableProfile(table_name={self.table_name!r}, rows={self.rows}, columns={list(self.columns)})"
@@ -0,0 +1,106 @@
+import datetime
+import numpy as np
+import pandas as pd
+
+OUTPUTS = ("pandas", "numpy", "arrow")
+
+# Integer keys of the type mappings -> the nullable dtype used when a column has nulls
+NULLABLE_INTEGERS = {
+    np.int8: "Int8",
+    np.int16: "Int16",
+    np.int32: "Int32",
+    np.int64: "Int64",
+    int: "Int64",
+}
+FLOATS = (np.float32, np.float64, float)
+
+
+def parse_dtype(python_type):
+    """The dtype a text parser (pandas.read_csv) can decode the column to directly, or object."""
+    if python_type in NULLABLE_INTEGERS:
+        return NULLABLE_INTEGERS[python_type]
+    if python_type in FLOATS:
+        return np.float64
+    return object
+
+
+def _decode_bool(values: pd.Series) -> pd.Series:
+    if values.dtype == object:
+        # PostgreSQL's text output is t/f
+        values = values.map({"t": True, "f": False, True: True, False: False, 1: True, 0: False})
+    return values.astype("boolean") if values.isna().any() else values.astype(bool)
+
+
+def _decode_bytes(values: pd.Series) -> pd.Series:
+    # PostgreSQL's text output of bytea is hex, \x0a0b..., SQLite returns bytes
+    return values.map(lambda v: bytes.fromhex(v[2:]) if isinstance(v, str) and v.startswith("\\x") else v)
+
+
+def decode_column(values: pd.Series, python_type) -> pd.Series:
+    """Converts a column read back from the database to the dtype its type was written from:
+    the python/NumPy type the type mapping maps its Database type from. Integers with nulls become
+    nullable (Int64, ...), timestamps datetime64, dates datetime.date objects and text stays object."""
+    if python_type in NULLABLE_INTEGERS:
+        if values.dtype == object:
+            values = pd.Series(pd.array(values.tolist(), dtype="Int64"), index=values.index, name=values.name)
+        if values.isna().any():
+            return values.astype(NULLABLE_INTEGERS[python_type])
+        return values.astype(np.dtype(np.int64 if python_type is int else python_type))
+    if python_type in FLOATS:
+        return pd.to_numeric(values).astype(np.dtype(np.float64 if python_type is float else python_type))
+    if python_type is np.bool_:
+        return _decode_bool(values)
+    if python_type in (datetime.datetime, np.datetime64, pd.Timestamp):
+        return pd.to_datetime(values, format="ISO8601")
+    if python_type is datetime.date:
+        dates = pd.to_datetime(values, format="ISO8601")
+        return pd.Series(dates.dt.date.where(dates.notna(), None), index=values.index, name=values.name, dtype=object)
+    if python_type is pd.Timedelta:
+        return pd.to_timedelta(values)
+    if python_type is np.bytes_:
+        return _decode_bytes(values)
+    return values
+
+
+def decode_frame(frame: pd.DataFrame, python_types: dict) -> pd.DataFrame:
+    """decode_column for every column. A column that does not decode (e.g. a SQLite column holding
+    values of several types) is returned as read."""
+    decoded = {}
+    for col in frame.columns:
+        try:
+            decoded[col] = decode_column(frame[col], python_types.get(col, str))
+        except (TypeError, ValueError, OverflowError):
+            decoded[col] = frame[col]
+    return pd.DataFrame(decoded, index=frame.index)
+
+
+def decode_rows(rows: list, columns: list, python_types: dict) -> pd.DataFrame:
+    """Decodes fetched row tuples column-wise: one transpose, then a vectorized pass per column."""
+    if not rows:
+        return pd.DataFrame(columns=columns)
+    transposed = zip(*rows)
+    frame = pd.DataFrame({col: pd.Series(values, dtype=object) for col, values in zip(columns, transposed)})
+    return decode_frame(frame, python_types)
+
+
+def convert_output(frame: pd.DataFrame, output: str):
+    """Returns the frame as a DataFrame ("pandas"), a dict of column -> NumPy array ("numpy", nullable
+    integers with nulls become float64 with NaN) or a pyarrow Table ("arrow", needs pyarrow)."""
+    if output == "pandas":
+        return frame
+    if output == "numpy":
+        arrays = {}
+        for col in frame.columns:
+            values = frame[col]
+            if isinstance(values.dtype, pd.api.extensions.ExtensionDtype) and values.dtype.kind in "iuf":
+                arrays[col] = values.to_numpy(dtype=np.float64, na_value=np.nan)
+            else:
+                arrays[col] = values.to_numpy()
+        return arrays
+    if output == "arrow":
+        try:
+            import pyarrow as pa
+        except ImportError as e:
+            raise ImportError("output='arrow' needs the pyarrow package.") from e
+        return pa.Table.from_pandas(frame, preserve_index=False)
+    raise ValueError(f"output must be one of {OUTPUTS}.")
@@ -0,0 +1,200 @@
+import asyncio
+import logging
+import time
+from collections import defaultdict
+from contextlib import nullcontext
+from .chunking import iter_chunks
+from .config import DEFAULT_CHUNK_SIZE
+from .instrumentation import log_event
+from .pipeline import timed_call
+from .profiling import TableProfile
+
+
+class StageJob():
+    """One dataset to stage, with the arguments of stage_data_async."""
+
+    def __init__(self, data, table_name="staging", drop_first=False, chunk_size=None, merge_on=None,
+                 load_id=None, profile=False, schema=None):
+        if load_id is not None and merge_on is not None:
+            raise ValueError("A merge cannot be resumed, load_id and merge_on are exclusive.")
+        self.data = data
+        self.table_name = table_name
+        self.drop_first = drop_first
+        self.chunk_size = chunk_size
+        self.merge_on = merge_on
+        self.load_id = load_id
+        self.profile = profile
+
+    @classmethod
+    def from_spec(cls, spec):
+        """Accepts a StageJob, a (data, table_name) tuple or a dict of StageJob arguments."""
+        if isinstance(spec, StageJob):
+            return spec
+        if isinstance(spec, dict):
+            return cls(**spec)
+        if isinstance(spec, tuple):
+            return cls(*spec)
+        raise ValueError(f"Unsupported job type '{type(spec).__name__}'.")
+
+    def __repr__(self):
+        return f"StageJob(table_name={self.table_name!r}, drop_first={self.drop_first})"
+
+
+class JobResult():
+    """The outcome of a StageJob. A failed job keeps its exception in `error`, its committed
+    chunks stay in the table and are counted in `rows`. A job spec that could not be turned into
+    a StageJob fails with a None job. `profile` holds the TableProfile of a job run with profile=True."""
+
+    def __init__(self, job:StageJob, rows:int = 0, seconds:float = 0.0, error:BaseException = None,
+                 profile:TableProfile = None):
+        self.job = job
+        self.rows = rows
+        self.seconds = seconds
+        self.error = error
+        self.profile = profile
+
+    @property
+    def table_name(self):
+        return self.job.table_name if self.job is not None else None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def __repr__(self):
+        status = "ok" if self.ok else f"failed: {self.error!r}"
+        return f"JobResult(table_name={self.table_name!r}, rows={self.rows}, seconds={self.seconds:.3f}, {status})"
+
+
+class StageScheduler():
+    """Stages several datasets concurrently through one Stager.
+
+    Backends with a single writer (SQLite) get one writer at a time: the chunks of every job are
+    serialized in parallel in the backend's executor and the inserts take turns on the writer.
+    Other backends (PostgreSQL) run up to max_concurrency COPYs at once over a connection pool.
+    Jobs on the same table run one after the other. A failing job does not stop the others.
+    Merges (merge_on) and resumable loads (load_id) hold the single writer for their whole run.
+    """
+
+    def __init__(self, stager, max_concurrency:int = 4):
+        """
+        Args:
+            stager (Stager): The stager whose connection and schema cache the jobs share
+            max_concurrency (int, optional): Maximum number of jobs running at once. Defaults to 4.
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1.")
+        self._stager = stager
+        self._db = stager._db_manager._db
+        self.max_concurrency = max_concurrency
+        self._slots:asyncio.Semaphore = None
+        self._writer:asyncio.Lock = None
+        self._table_locks:dict = None
+
+    def reserve_connections(self):
+        """Sizes the backend for the concurrent jobs, to be called before it connects."""
+        self._db.reserve_connections(self.max_concurrency)
+
+    def release_connections(self):
+        """Undoes reserve_connections, so later loads connect with the backend's own sizing."""
+        self._db.release_connections()
+
+    async def run(self, jobs) -> list:
+        """Runs the jobs on a connected backend and returns a JobResult per job, in job order."""
+        self._slots = asyncio.Semaphore(self.max_concurrency)
+        self._writer = asyncio.Lock() if self._db.single_writer else None
+        self._table_locks = defaultdict(asyncio.Lock)
+        return await asyncio.gather(*(self._run_job(job) for job in jobs))
+
+    def _writing(self):
+        return self._writer if self._writer is not None else nullcontext()
+
+    async def _run_job(self, spec) -> JobResult:
+        # Built here rather than in run, so an invalid spec only fails its own job
+        try:
+            job = StageJob.from_spec(spec)
+        except (TypeError, ValueError) as e:
+            log_event(logging.ERROR, "Job failed", table=None, rows=0, error=repr(e))
+            self._stager.instrumentation.count("jobs_failed")
+            return JobResult(None, error=e)
+        async with self._slots, self._table_locks[job.table_name]:
+            start = time.perf_counter()
+            rows = 0
+            profile = TableProfile(job.table_name) if job.profile else None
+            try:
+                columns = self._stager._initial_columns(job.table_name, job.data)
+                if job.merge_on is not None or job.load_id is not None:
+                    async with self._writing():
+                        rows = await self._stage_exclusive(job, columns, profile)
+                else:
+                    rows = await self._stage_append(job, columns, profile)
+                if profile is not None:
+                    async with self._writing():
+                        await self._stager._db_manager.analyze(job.table_name)
+            except Exception as e:
+                seconds = time.perf_counter() - start
+                log_event(logging.ERROR, "Job failed", table=job.table_name, rows=rows, error=repr(e))
+                self._stager.instrumentation.count("jobs_failed", table=job.table_name)
+                return JobResult(job, rows, seconds, e, profile)
+            seconds = time.perf_counter() - start
+            log_event(logging.INFO, "Job finished", table=job.table_name, rows=rows, seconds=seconds)
+            return JobResult(job, rows, seconds, profile=profile)
+
+    async def _stage_append(self, job:StageJob, columns:dict, profile:TableProfile = None) -> int:
+        """Appends the job's chunks, taking the writer per chunk. Returns the number of rows staged."""
+        rows = 0
+        async with self._writing():
+            await self._stager._prepare_table(job.table_name, job.drop_first, columns)
+            await self._stager._db_manager.begin_load(job.table_name)
+        try:
+            async for chunk in iter_chunks(job.data, job.chunk_size or DEFAULT_CHUNK_SIZE):
+                await self._stage_chunk(job.table_name, chunk, columns, profile)
+                rows += len(chunk)
+            if rows == 0:
+                async with self._writing():
+                    await self._stager._db_manager.ensure_columns(job.table_name, columns)
+        except BaseException:
+            async with self._writing():
+                await self._stager._db_manager.end_load(job.table_name, failed=True)
+            raise
+        async with self._writing():
+            await self._stager._db_manager.end_load(job.table_name)
+        return rows
+
+    async def _stage_exclusive(self, job:StageJob, columns:dict, profile:TableProfile = None) -> int:
+        """Merges or resumably loads the job's data like stage_data_async, the caller holding the writer.
+        Returns the number of rows merged, or of rows in the data for a resumable load."""
+        stager = self._stager
+        chunk_size = job.chunk_size or DEFAULT_CHUNK_SIZE
+        if job.merge_on is not None:
+            await stager._prepare_table(job.table_name, job.drop_first, columns)
+            key_columns = [job.merge_on] if isinstance(job.merge_on, str) else list(job.merge_on)
+            return await stager._stage_merge(job.table_name, job.data, key_columns, chunk_size, columns, profile)
+        committed = await stager._db_manager.committed_chunks(job.load_id, job.table_name, stager._manifest_columns())
+        # A resumed load keeps the chunks it already committed
+        await stager._prepare_table(job.table_name, job.drop_first and not committed, columns)
+        await stager._db_manager.begin_load(job.table_name)
+        try:
+            rows = await stager._stage_checkpointed(
+                job.table_name, job.data, chunk_size, columns, job.load_id, committed, profile
+            )
+            if rows == 0:
+                await stager._db_manager.ensure_columns(job.table_name, columns)
+        except BaseException:
+            await stager._db_manager.end_load(job.table_name, failed=True)
+            raise
+        await stager._db_manager.end_load(job.table_name)
+        return rows
+
+    async def _stage_chunk(self, table_name, chunk, columns, profile:TableProfile = None):
+        serialize = self._db.serializer() if self._writer is not None else None
+        if serialize is None:
+            async with self._writing():
+                await self._stager._stage_chunk(table_name, chunk, columns, profile=profile)
+            return
+        # Converted outside of the writer lock, so other jobs keep writing meanwhile
+        loop = asyncio.get_running_loop()
+        serialized, seconds = await loop.run_in_executor(self._db.executor, timed_call, serialize, chunk)
+        self._stager.instrumentation.record_phase("serialization", seconds, table=table_name)
+        async with self._writing():
+            await self._stager._stage_chunk(table_name, chunk, columns, serialized=serialized, profile=profile)
@@ -1,39 +1,319 @@
+import datetime
 import numpy as np
 import pandas as pd
 from typing import Union
-from .config import PSQL_TYPE_MAPPING, SQLITE_TYPE_MAPPING
+from .chunking import default_column_names, is_arrow, is_column_mapping
+from .backends import get_backend
+from .config import DEFAULT_INFERENCE_SAMPLE_SIZE
 from .utils import DB_Enum
 
-class SchemaManager():        
-    def __init__(self, db_type:DB_Enum):
-        if db_type == DB_Enum.PSQL:
-            self.type_mapping = PSQL_TYPE_MAPPING
-        else:
-            self.type_mapping = SQLITE_TYPE_MAPPING
-    
-    def infer_from_dataframe(self, data:pd.DataFrame) ->dict:
+# pd.api.types.infer_dtype results mapped to the python type used as the type mapping key.
+# infer_dtype already widens mixed values: ints and floats give "mixed-integer-float" (float),
+# numbers and strings give "mixed"/"mixed-integer" (text).
+INFERRED_KIND_TO_TYPE = {
+    "integer": int,
+    "floating": float,
+    "mixed-integer-float": float,
+    "decimal": float,
+    "boolean": np.bool_,
+    "string": str,
+    "datetime": datetime.datetime,
+    "datetime64": datetime.datetime,
+    "date": datetime.date,
+    "timedelta": pd.Timedelta,
+    "timedelta64": pd.Timedelta,
+    "bytes": np.bytes_,
+}
+
+# Fallback keys for NumPy dtypes that are missing from the type mappings, by dtype.kind
+DTYPE_KIND_TO_TYPE = {
+    "b": np.bool_,
+    "i": int,
+    "u": int,
+    "f": float,
+    "M": datetime.datetime,
+    "m": pd.Timedelta,
+    "U": str,
+    "S": np.bytes_,
+}
+
+# The types the compaction pass chooses between, narrowest first. A column is narrowed within the
+# family of its inferred type, and a later chunk that does not fit widens it within the same family.
+COMPACT_FAMILIES = (
+    (np.bool_, np.int16, np.int32, np.int64),
+    (np.float32, np.float64),
+    (datetime.date, datetime.datetime),
+)
+
+# The key a Database type is read back as, when several keys of the type mapping map to it: the widest
+# (SQLite's INTEGER holds np.int16 to np.int64 and booleans), and the canonical key of the other types
+READ_TYPE_PREFERENCE = (
+    np.float64, np.float32, np.int64, np.int32, np.int16, np.bool_, str,
+    datetime.datetime, datetime.date, pd.Timedelta, np.bytes_,
+)
+
+# Text columns are only dictionary-encoded when the first chunk has at least this many values
+DICTIONARY_MIN_ROWS = 100
+
+
+class SchemaManager():
+    def __init__(self, db_type:Union[DB_Enum, str], sample_size:int = DEFAULT_INFERENCE_SAMPLE_SIZE, compact:bool = False,
+                 dictionary_threshold:float = None):
+        """
+        Args:
+            db_type (Union[DB_Enum, str]): The database whose type mapping is used, a DB_Enum member or the
+                name of a registered backend
+            sample_size (int, optional): Number of values per column that are inspected when the type
+                cannot be read from the dtype. Defaults to config.DEFAULT_INFERENCE_SAMPLE_SIZE.
+            compact (bool, optional): Narrow the inferred types of a DataFrame to the smallest type holding
+                all of its values, see compact_types. Defaults to False.
+            dictionary_threshold (float, optional): Text columns whose distinct values are at most this
+                fraction of their values are dictionary-encoded, see dictionary_columns. Defaults to None (off).
+        """
+        self.type_mapping = get_backend(db_type).type_mapping
+        self.sample_size = sample_size
+        self.compact = compact
+        self.dictionary_threshold = dictionary_threshold
+        self._integer_types = {self._map(python_type) for python_type in (np.bool_, np.int16, np.int32, np.int64, int)}
+        self._float_types = {self._map(python_type) for python_type in (np.float32, np.float64, float)}
+        # Families whose types all map to the same Database type (e.g. SQLite's INTEGER) cannot be narrowed
+        self._families = [
+            [(python_type, self._map(python_type)) for python_type in family]
+            for family in COMPACT_FAMILIES
+            if len({self._map(python_type) for python_type in family}) > 1
+        ]
+
+    def _map(self, python_type) -> str:
+        return self.type_mapping.get(python_type, "TEXT")
+
+    def infer_from_dtype(self, dtype) -> str:
+        """Maps a NumPy or pandas extension dtype to a Database type.
+
+        Returns:
+            str: The Database type, or None if the dtype holds python objects that need sampling
+        """
+        if isinstance(dtype, pd.StringDtype):
+            return self._map(str)
+        if isinstance(dtype, pd.DatetimeTZDtype):
+            return self._map(datetime.datetime)
+        if isinstance(dtype, pd.api.extensions.ExtensionDtype):
+            # Nullable Int64/Float64/boolean and friends carry a numpy dtype
+            numpy_dtype = getattr(dtype, "numpy_dtype", None)
+            if numpy_dtype is None or numpy_dtype.kind == "O":
+                return None
+            dtype = numpy_dtype
+        if dtype.kind == "O":
+            return None
+        if dtype.type in self.type_mapping:
+            return self.type_mapping[dtype.type]
+        return self._map(DTYPE_KIND_TO_TYPE.get(dtype.kind))
+
+    def infer_from_values(self, values) -> str:
+        """Infers the Database type of a column of python objects from a sample of its non-null values.
+
+        The sample starts at the first non-null value, so leading Nones do not decide the type.
+        Columns without any non-null value are TEXT.
+
+        Args:
+            values (Union[pd.Series, np.ndarray, list]): The column values
+
+        Returns:
+            str: The Database type
+        """
+        sample = self._non_null_sample(values)
+        if len(sample) == 0:
+            return "TEXT"
+        kind = pd.api.types.infer_dtype(sample, skipna=True)
+        return self._map(INFERRED_KIND_TO_TYPE.get(kind))
+
+    def _non_null_sample(self, values) -> list:
+        """Returns up to sample_size non-null values, starting at the first non-null one."""
+        if isinstance(values, pd.Series):
+            head = values.iloc[:self.sample_size].dropna()
+            if len(head) == 0:
+                mask = values.notna().to_numpy()
+                if not mask.any():
+                    return []
+                start = int(mask.argmax())
+                head = values.iloc[start:start + self.sample_size].dropna()
+            return head.tolist()
+        sample = []
+        for value in values:
+            if value is None or (isinstance(value, float) and value != value) or value is pd.NaT:
+                continue
+            sample.append(value)
+            if len(sample) >= self.sample_size:
+                break
+        return sample
+
+    def infer_from_dataframe(self, data:pd.DataFrame, compact:bool = None) ->dict:
         """Infer Database types from a dataframe
         It is assumed that if someone uses a dataframe they have already provided custom column names.
+        Typed columns are mapped from their dtype, object columns from a sample of their values.
 
         Args:
             data (pd.DataFrame): raw dataframe data
+            compact (bool, optional): Narrow the types with compact_types. Defaults to self.compact.
 
         Returns:
-            dict: _description_
+            dict: A map between the the columns and Database Types
         """
         if data.columns is None:
-            cols = [f"column_{i}" for i in range(data.shape[1])]
+            cols = default_column_names(data.shape[1])
             data.columns = cols
-        return {col: self.type_mapping.get(type(data[col].iloc[0]), "TEXT") for col in data.columns}
-    
-    
-    
-    def infer_from_np_array(self, data:np.ndarray, col_names:list) -> dict:
-        """Infer Database types from numpy array
+        types = {}
+        for col in data.columns:
+            sql_type = self.infer_from_dtype(data[col].dtype)
+            types[col] = sql_type if sql_type is not None else self.infer_from_values(data[col])
+        if self.compact if compact is None else compact:
+            types = self.compact_types(data, types)
+        return types
+
+    def python_type(self, sql_type:str):
+        """The python/NumPy type the values of a column of this Database type are read back as: the
+        inverse of the type mapping, see READ_TYPE_PREFERENCE. Unknown types are read as str."""
+        sql_type = sql_type.upper()
+        for python_type in READ_TYPE_PREFERENCE:
+            if self._map(python_type).upper() == sql_type:
+                return python_type
+        return str
+
+    @property
+    def dictionary_code_type(self) -> str:
+        """The Database type of the codes stored in place of dictionary-encoded text."""
+        return self._map(np.int32)
+
+    @property
+    def text_type(self) -> str:
+        return self._map(str)
+
+    def compact_types(self, data:pd.DataFrame, types:dict) -> dict:
+        """Narrows the types of the dataframe's columns to the smallest type of their family that holds
+        every value: BOOLEAN/SMALLINT/INTEGER for integers (BOOLEAN when they are all 0 or 1), REAL
+        for floats that survive a float32 round trip and DATE for timestamps that are all at midnight.
+        The scans are vectorized min/max and comparisons over the non-null values.
+
+        Args:
+            data (pd.DataFrame): The values
+            types (dict): The inferred types of the columns
+
+        Returns:
+            dict: The types, narrowed where possible
+        """
+        return {
+            col: self.compact_type(data[col], sql_type) if col in data.columns else sql_type
+            for col, sql_type in types.items()
+        }
+
+    def compact_type(self, values:pd.Series, sql_type:str) -> str:
+        """Returns the narrowest type of sql_type's family, no wider than sql_type, holding every value."""
+        family = self._family(sql_type)
+        if family is None:
+            return sql_type
+        return self._narrowest(values, family[:self._rank(family, sql_type) + 1])
+
+    def widen_type(self, values:pd.Series, sql_type:str) -> str:
+        """Returns the type of a column that also holds `values`: sql_type if they fit in it, otherwise the
+        narrowest wider type that does. A compacted column widens within its family (SMALLINT to INTEGER,
+        DATE to TIMESTAMP), integers with fractional values widen to floats, and values of any other
+        type turn the column into text. So the types do not depend on which chunk a value came in."""
+        values = values.dropna()
+        if len(values) == 0 or sql_type == self.text_type:
+            return sql_type
+        inferred = self.infer_from_dtype(values.dtype) or self.infer_from_values(values)
+        family = self._family(sql_type)
+        integral = self._is_integral(values, sql_type, inferred)
+        if family is not None and (integral or inferred == sql_type or inferred in (family_type for _, family_type in family)):
+            if integral:
+                values = pd.to_numeric(values).astype(np.int64)
+            required = self._narrowest(values, family)
+            return required if self._rank(family, required) > self._rank(family, sql_type) else sql_type
+        if inferred == sql_type or integral:
+            return sql_type
+        if sql_type in self._float_types and inferred in self._integer_types:
+            return sql_type
+        if sql_type in self._integer_types and inferred in self._float_types:
+            return self._map(np.float64)
+        return self.text_type
+
+    def _is_integral(self, values:pd.Series, sql_type:str, inferred:str) -> bool:
+        """Whether float values for an integer column are all whole numbers, e.g. integers with NaNs."""
+        if sql_type not in self._integer_types or inferred not in self._float_types:
+            return False
+        try:
+            floats = pd.to_numeric(values).to_numpy(dtype=np.float64)
+        except (TypeError, ValueError):
+            return False
+        return bool(np.all(np.mod(floats, 1) == 0) and np.all(np.abs(floats) < 2.0 ** 63))
+
+    def dictionary_columns(self, data:pd.DataFrame, types:dict) -> list:
+        """Returns the text columns worth dictionary-encoding: those with at least DICTIONARY_MIN_ROWS
+        non-null values of which at most dictionary_threshold are distinct."""
+        if self.dictionary_threshold is None:
+            return []
+        columns = []
+        for col, sql_type in types.items():
+            if sql_type != self.text_type or col not in data.columns:
+                continue
+            values = data[col].dropna()
+            if len(values) >= DICTIONARY_MIN_ROWS and values.nunique() <= self.dictionary_threshold * len(values):
+                columns.append(col)
+        return columns
+
+    def _family(self, sql_type:str) -> list:
+        for family in self._families:
+            if any(family_type == sql_type for _, family_type in family):
+                return family
+        return None
+
+    @staticmethod
+    def _rank(family:list, sql_type:str) -> int:
+        # The last match, since narrower keys may share a type (np.int8 and np.int16 are both SMALLINT)
+        return max(i for i, (_, family_type) in enumerate(family) if family_type == sql_type)
+
+    def _narrowest(self, values:pd.Series, candidates:list) -> str:
+        """The first candidate type holding every non-null value. The widest candidate if none does,
+        or if the values cannot be scanned."""
+        values = values.dropna()
+        if len(values) == 0:
+            return candidates[-1][1]
+        try:
+            for python_type, sql_type in candidates[:-1]:
+                if self._fits(values, python_type):
+                    return sql_type
+        except (TypeError, ValueError, OverflowError):
+            pass
+        return candidates[-1][1]
+
+    @staticmethod
+    def _fits(values:pd.Series, python_type) -> bool:
+        if python_type in (datetime.date, datetime.datetime):
+            times = pd.DatetimeIndex(values)
+            return python_type is datetime.datetime or bool((times == times.normalize()).all())
+        if python_type is np.float32:
+            floats = values.to_numpy(dtype=np.float64)
+            return bool(np.array_equal(floats.astype(np.float32).astype(np.float64), floats))
+        kind = values.dtype.kind
+        if kind not in "iub":
+            values = pd.to_numeric(values)
+            kind = values.dtype.kind
+            if kind not in "iub":
+                return False
+        if kind == "u" and values.max() > np.iinfo(np.int64).max:
+            return False
+        integers = values.to_numpy(dtype=np.int64)
+        low, high = integers.min(), integers.max()
+        if python_type is np.bool_:
+            return bool(low >= 0 and high <= 1)
+        info = np.iinfo(python_type)
+        return bool(info.min <= low and high <= info.max)
+
+    def infer_from_np_array(self, data:np.ndarray, col_names:list = None) -> dict:
+        """Infer Database types from numpy array, without copying it.
 
         Args:
             data (np.ndarray): raw numpy array data
-            cum_col_names (list, optional): Custom names for the columns. Defaults to None.
+            col_names (list, optional): Custom names for the columns. Defaults to None.
 
         Raises:
             ValueError: Raised if the data are not tabular. E.G. dimensions >= 3
@@ -41,54 +321,119 @@ class SchemaManager():
         Returns:
             dict:  A map between the the columns and Database Types
         """
-        if col_names is None:
-            total_columns =  data.shape[data.ndim - 1]
-            col_names = [f"column_{i}" for i in range(0, total_columns)]
-        # Example: Adjusting your code to properly handle column and item iteration
-        col_types = {}
-        for i in range(total_columns):
-            for item in data[:, i]:
-                if item is not None:
-                    col_types[i] = type(item)
-                    break
-                else:
-                    continue
-
-        if data.ndim == 1:
-            # Single-dimensional array case
-            return {col_names[0] : self.type_mapping.get(data.dtype.type, "TEXT")}
-        elif data.ndim == 2:
-            # Multi-dimensional array (assumed to represent columns)                
-            return {
-                # Infer from dtype of each column
-                col_names[i] : self.type_mapping.get(data[:, i].dtype.type, "TEXT")  
-                for i in range(data.shape[1])
-            }
-        else:
+        if data.ndim == 1 and data.dtype.names is None:
+            data = data.reshape(-1, 1)
+        if data.ndim != 2 and data.dtype.names is None:
             raise ValueError("Unsupported array dimension. Provide 1D or 2D array.")
-        
-    def infer_types(self, data: Union[np.ndarray, pd.DataFrame, list, tuple], col_names=None) -> dict:
+
+        if data.dtype.names is not None:
+            # Structured array, every field is a column with its own dtype
+            col_names = col_names or list(data.dtype.names)
+            fields = [data[name] for name in data.dtype.names]
+        else:
+            col_names = col_names or default_column_names(data.shape[1])
+            fields = [data[:, i] for i in range(data.shape[1])]
+
+        types = {}
+        for name, field in zip(col_names, fields):
+            sql_type = self.infer_from_dtype(field.dtype)
+            types[name] = sql_type if sql_type is not None else self.infer_from_values(field)
+        return types
+
+    def infer_from_arrow_schema(self, schema) -> dict:
+        """Infer Database types from the schema of a pyarrow Table or RecordBatch, without reading any values.
+
+        Args:
+            schema (pyarrow.Schema): The Arrow schema
+
+        Returns:
+            dict: A map between the the columns and Database Types
+        """
+        return {field.name: self._map_arrow_type(field.type) for field in schema}
+
+    def _map_arrow_type(self, arrow_type) -> str:
+        import pyarrow.types as pat
+        if pat.is_dictionary(arrow_type):
+            return self._map_arrow_type(arrow_type.value_type)
+        if pat.is_string(arrow_type) or pat.is_large_string(arrow_type):
+            return self._map(str)
+        if pat.is_binary(arrow_type) or pat.is_large_binary(arrow_type) or pat.is_fixed_size_binary(arrow_type):
+            return self._map(np.bytes_)
+        if pat.is_date(arrow_type):
+            return self._map(datetime.date)
+        if pat.is_decimal(arrow_type):
+            return self._map(float)
+        if pat.is_duration(arrow_type):
+            return self._map(pd.Timedelta)
+        if pat.is_integer(arrow_type) or pat.is_floating(arrow_type) or pat.is_boolean(arrow_type) or pat.is_timestamp(arrow_type):
+            dtype = arrow_type.to_pandas_dtype()
+            return self.infer_from_dtype(dtype if isinstance(dtype, pd.api.extensions.ExtensionDtype) else np.dtype(dtype))
+        return "TEXT"
+
+    def infer_from_columns(self, data: dict) -> dict:
+        """Infer Database types from a dict of columns (NumPy arrays, Series or lists), column by column.
+        Typed columns are mapped from their dtype, the rest from a sample of their values.
+
+        Args:
+            data (dict): Column name -> column values
+
+        Returns:
+            dict: A map between the the columns and Database Types
+        """
+        types = {}
+        for name, values in data.items():
+            dtype = getattr(values, "dtype", None)
+            sql_type = self.infer_from_dtype(dtype) if dtype is not None else None
+            types[name] = sql_type if sql_type is not None else self.infer_from_values(values)
+        return types
+
+    def infer_from_rows(self, data: Union[list, tuple], col_names:list = None) -> dict:
+        """Infer Database types from a list or tuple of rows (sequences or dicts), without building a DataFrame.
+        Rows may be ragged, missing trailing values count as nulls.
+
+        Args:
+            data (Union[list, tuple]): The rows
+            col_names (list, optional): Custom names for positional columns. Defaults to None.
+
+        Returns:
+            dict: A map between the the columns and Database Types
+        """
+        if len(data) == 0:
+            return {}
+        if isinstance(data[0], dict):
+            keys = list(dict.fromkeys(key for row in data[:self.sample_size] for key in row))
+            return {key: self.infer_from_values(row.get(key) for row in data) for key in keys}
+
+        total_columns = max(len(row) for row in data[:self.sample_size])
+        col_names = col_names or default_column_names(total_columns)
+        return {
+            col_names[i]: self.infer_from_values(row[i] if i < len(row) else None for row in data)
+            for i in range(total_columns)
+        }
+
+    def infer_types(self, data: Union[np.ndarray, pd.DataFrame, list, tuple, dict], col_names=None) -> dict:
         """Infers the column types of the data provided.
 
         Args:
-            data (Union[np.ndarray, pd.DataFrame, list, tuple]): The data for which we will infer their db data types
+            data (Union[np.ndarray, pd.DataFrame, list, tuple, dict]): The data for which we will infer their
+                db data types. Also a pyarrow Table/RecordBatch or a dict of columns.
 
         Raises:
-            ValueError: Raised if the instance of the date is not np.ndarray, pd.DataFrame, list, tuple
+            ValueError: Raised if the instance of the date is not np.ndarray, pd.DataFrame, list, tuple, a dict of
+                columns or an Arrow table
 
         Returns:
             dict: A map between the the columns and Database Types
         """
-        #TODO: check if np is better with lots of data and use it. Else pd is more convenient   
-
         if isinstance(data, pd.DataFrame):
             return self.infer_from_dataframe(data)
+        elif isinstance(data, np.ndarray):
+            return self.infer_from_np_array(data, col_names)
+        elif isinstance(data, list) or isinstance(data, tuple):
+            return self.infer_from_rows(data, col_names)
+        elif is_arrow(data):
+            return self.infer_from_arrow_schema(data.schema)
+        elif is_column_mapping(data):
+            return self.infer_from_columns(data)
         else:
-            return self.infer_from_dataframe(pd.DataFrame(data, columns=col_names))
-        # elif isinstance(data, np.ndarray):
-        #     return self.infer_from_np_array(data, col_names)
-        # elif isinstance(data, list) or isinstance(data, tuple):
-        #     #works only if the lists are padded so as to be of equal length
-        #     return self.infer_from_np_array(np.array(data, dtype=object), col_names)
-        # else:
-        #     raise ValueError("Unsupported data instance.")
\ No newline at end of file
+            raise ValueError("Unsupported data instance.")
@@ -0,0 +1,203 @@
+import asyncio
+import time
+import pandas as pd
+from .chunking import to_frame
+from .config import DEFAULT_CHUNK_SIZE
+
+
+class StagingSession():
+    """A long-lived staging session over one open connection (or pool).
+
+    Small stage() calls are buffered per table and coalesced into one insert when the table
+    reaches max_rows buffered rows, when its oldest buffered row has waited max_delay seconds,
+    or on an explicit flush(). While max_buffered_rows rows are buffered across all tables,
+    stage() waits for a flush, which bounds the memory held by the session.
+
+    Errors raised by a background (time based) flush are re-raised by the next stage(),
+    flush() or close() call. The batch that failed is not retried.
+    """
+
+    def __init__(self, stager, max_rows:int = None, max_delay:float = 1.0, max_buffered_rows:int = None):
+        """
+        Args:
+            stager (Stager): The stager whose database and schema managers are used
+            max_rows (int, optional): Rows buffered per table before it is flushed. Defaults to config.DEFAULT_CHUNK_SIZE.
+            max_delay (float, optional): Maximum seconds a row waits in the buffer. Defaults to 1.0.
+            max_buffered_rows (int, optional): Rows buffered across all tables before stage() blocks.
+                Defaults to 4 * max_rows.
+        """
+        self._stager = stager
+        self.max_rows = max_rows or DEFAULT_CHUNK_SIZE
+        self.max_delay = max_delay
+        self.max_buffered_rows = max_buffered_rows or 4 * self.max_rows
+        # table -> list of buffered frames, rows buffered and monotonic time of the oldest row
+        self._buffers:dict = {}
+        self._buffered_rows:dict = {}
+        self._oldest:dict = {}
+        # table -> inferred column types, kept for the whole session
+        self._columns:dict = {}
+        self._prepared:set = set()
+        self._lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+        self._flusher:asyncio.Task = None
+        self._error:BaseException = None
+        self._open = False
+
+    @property
+    def buffered_rows(self) -> int:
+        """Rows buffered across all tables."""
+        return sum(self._buffered_rows.values())
+
+    async def start(self):
+        """Connects and starts the background flusher."""
+        if self._open:
+            return self
+        if self._stager._active_session is not None:
+            # The session owns the stager's connection, a second one would replace it
+            raise RuntimeError("The stager already has an open session.")
+        self._stager._active_session = self
+        try:
+            await self._stager._db_manager.connect()
+        except BaseException:
+            self._stager._active_session = None
+            raise
+        self._open = True
+        self._flusher = asyncio.ensure_future(self._flush_periodically())
+        return self
+
+    async def stage(self, data, table_name="staging", drop_first=False):
+        """Buffers the data for the table, flushing it if it reached max_rows.
+
+        Args:
+            data: A DataFrame, ndarray, or list/tuple of rows or dicts.
+            table_name (str, optional): Target table. Defaults to "staging".
+            drop_first (bool, optional): Drop the table before its first flush in this session. Defaults to False.
+        """
+        self._raise_pending_error()
+        if not self._open:
+            raise RuntimeError("The staging session is not started.")
+        frame = to_frame(data)
+        if len(frame) == 0:
+            return
+
+        if table_name not in self._prepared:
+            async with self._lock:
+                if table_name not in self._prepared:
+                    await self._stager._prepare_table(table_name, drop_first)
+                    self._prepared.add(table_name)
+
+        if table_name not in self._buffers:
+            self._buffers[table_name] = []
+            self._buffered_rows[table_name] = 0
+            self._oldest[table_name] = time.monotonic()
+            self._wakeup.set()
+        self._buffers[table_name].append(frame)
+        self._buffered_rows[table_name] += len(frame)
+
+        if self._buffered_rows[table_name] >= self.max_rows:
+            await self.flush(table_name)
+        # Backpressure: the producer waits until the buffers drain below the limit
+        while self.buffered_rows >= self.max_buffered_rows:
+            await self.flush()
+
+    async def drop_table(self, table_name):
+        """Discards the rows buffered for the table, then drops and recreates it."""
+        self._raise_pending_error()
+        async with self._lock:
+            self._buffers.pop(table_name, None)
+            self._buffered_rows.pop(table_name, None)
+            self._oldest.pop(table_name, None)
+            self._columns.pop(table_name, None)
+            await self._stager._prepare_table(table_name, drop_first=True)
+            self._prepared.add(table_name)
+
+    async def flush(self, table_name=None):
+        """Inserts the rows buffered for the table, or for every table if no table name is given."""
+        tables = [table_name] if table_name is not None else list(self._buffers)
+        for table in tables:
+            await self._flush_table(table)
+        self._raise_pending_error()
+
+    async def stage_file(self, path, table_name="staging", drop_first=False, **file_options) -> int:
+        """Flushes the rows buffered for the table, then stages the file into it, see
+        Stager.stage_file_async for the options. Returns the number of rows staged."""
+        self._raise_pending_error()
+        if not self._open:
+            raise RuntimeError("The staging session is not started.")
+        if drop_first:
+            await self.drop_table(table_name)
+        else:
+            await self.flush(table_name)
+        async with self._lock:
+            if table_name not in self._prepared:
+                await self._stager._prepare_table(table_name)
+                self._prepared.add(table_name)
+            columns = self._columns.setdefault(table_name, {})
+            return await self._stager._stage_file(path, table_name, columns, **file_options)
+
+    async def read(self, table_name="staging", columns=None, where=None, chunk_size=None, output="pandas"):
+        """Flushes the rows buffered for the table, then reads it back, see Stager.read_async."""
+        self._raise_pending_error()
+        if not self._open:
+            raise RuntimeError("The staging session is not started.")
+        await self.flush(table_name)
+        async with self._lock:
+            return await self._stager._read(table_name, columns, where, chunk_size, output)
+
+    async def _flush_table(self, table_name):
+        async with self._lock:
+            frames = self._buffers.pop(table_name, None)
+            self._buffered_rows.pop(table_name, None)
+            self._oldest.pop(table_name, None)
+            if not frames:
+                return
+            batch = frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+            columns = self._columns.setdefault(table_name, {})
+            await self._stager._stage_chunk(table_name, batch, columns)
+
+    async def _flush_periodically(self):
+        """Flushes every table whose oldest buffered row has waited max_delay seconds."""
+        while True:
+            if not self._oldest:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            now = time.monotonic()
+            due = [table for table, oldest in self._oldest.items() if now - oldest >= self.max_delay]
+            for table in due:
+                try:
+                    await self._flush_table(table)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    self._error = e
+            if self._oldest:
+                next_due = min(self._oldest.values()) + self.max_delay
+                await asyncio.sleep(max(next_due - time.monotonic(), 0))
+
+    def _raise_pending_error(self):
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    async def close(self):
+        """Flushes every table, stops the background flusher and closes the connection."""
+        if not self._open:
+            return
+        try:
+            await self.flush()
+        finally:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+            self._open = False
+            self._stager._active_session = None
+            await self._stager._db_manager.close()
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
@@ -1,20 +1,54 @@
 from .db_manager import DB_Manager
 from .schema_manager import SchemaManager
-from .databases.postgresql_db import PostgresDB
-from .databases.sqlite_db import SQLiteDB
-from .databases.base_db import BaseDB
+from .backends import get_backend
 from .utils import DB_Enum
+from .instrumentation import Instrumentation, log_event
+from .chunking import content_hash, is_arrow, is_column_mapping, iter_chunks
+from .profiling import TableProfile
+from .readback import OUTPUTS, convert_output
+from .session import StagingSession
+from .background import BackgroundStager
+from .scheduler import StageScheduler
+from .config import DEFAULT_CHUNK_SIZE, MANIFEST_TABLE, MERGE_SEQUENCE_COLUMN
+from .files import (detect_format, iter_csv_chunks, iter_file_blocks, iter_parquet_chunks,
+                    read_csv_sample, read_off_loop, read_parquet_schema)
+from functools import partial
+from typing import Union
+import asyncio
+import logging
+import uuid
+import numpy as np
 import pandas as pd
 
 class Stager():
     
-    def __init__(self, conn_url, db_type:DB_Enum, schema="public"):
-        if db_type == DB_Enum.SQLITE:
-            db = SQLiteDB(conn_url, schema=None)
-        else:
-            db = PostgresDB(conn_url, schema=schema)
-        self._db_manager = DB_Manager(db)
-        self._schema_manager = SchemaManager(db_type)
+    def __init__(self, conn_url, db_type:Union[DB_Enum, str], schema="public", instrumentation:Instrumentation = None,
+                 compact_types=False, dictionary_threshold=None, **db_options):
+        """
+        Args:
+            conn_url: Connection url (PostgreSQL) or database file (SQLite)
+            db_type (Union[DB_Enum, str]): The database backend, a DB_Enum member or the name of a backend
+                registered with backends.register_backend (e.g. "postgresql", "sqlite"). Only the selected
+                backend's module is imported.
+            schema (str, optional): Target schema, ignored by SQLite. Defaults to "public".
+            instrumentation (Instrumentation, optional): Receives the timings of every phase (inference,
+                ddl, serialization, transfer, commit) and the load counters. Defaults to None.
+            compact_types (bool, optional): Create new columns with the narrowest type holding the values of
+                their first chunk (SMALLINT/INTEGER, REAL, DATE, BOOLEAN), see SchemaManager.compact_types.
+                A later chunk that does not fit widens the column with an ALTER TABLE. Types read from an
+                Arrow or Parquet schema are kept as declared. Only PostgreSQL has narrower types. Defaults to False.
+            dictionary_threshold (float, optional): Dictionary-encode new text columns whose first chunk has
+                at most this fraction of distinct values: the table stores integer codes and the values live
+                in a {table}_{column}_dict (id, value) lookup table. Merges and CSV files streamed into COPY do
+                not create dictionaries. Columns an earlier load encoded are always encoded. Defaults to None (off).
+            **db_options: Backend specific options, e.g. copy_format, parallelism and atomic for PostgresDB.
+        """
+        backend = get_backend(db_type)
+        db = backend.create(conn_url, schema=schema, **db_options)
+        self._db_manager = DB_Manager(db, instrumentation=instrumentation)
+        self._schema_manager = SchemaManager(db_type, compact=compact_types, dictionary_threshold=dictionary_threshold)
+        self._background:BackgroundStager = None
+        self._active_session:StagingSession = None
     
     
     async def ensure_schema(self, table_name: str, inferred_types: dict[str, str]):
@@ -38,29 +72,517 @@ class Stager():
         if missing_columns:
             await self._db_manager.add_missing_columns(table_name, missing_columns)
         else:
-            print(f"Schema for table '{table_name}' is already up-to-date.")
+            log_event(logging.INFO, "Schema is already up-to-date", table=table_name)
 
 
-    async def stage_data_async(self, data, table_name="staging", schema=None, drop_first=False):
-        
-        if not isinstance(data, pd.DataFrame):
-            data = pd.DataFrame(data, columns=None)            
-            data.columns = [f"column_{i}" for i in range(data.shape[1])]
-        columns = self._schema_manager.infer_types(data)
-        async with self._db_manager as db:
-            if drop_first:
-                await self._db_manager.drop_table(table_name)
-            #create table if it doesnt exist
-            await self._db_manager.create_table(table_name, None)
-            # Perform data staging or any async database operation
-            await db.insert_data(table_name, data, columns)
+    async def stage_data_async(self, data, table_name="staging", schema=None, drop_first=False, chunk_size=None,
+                               merge_on=None, load_id=None, profile=False):
+        """Stages the data into the table, streaming them in chunks of at most chunk_size rows.
+
+        Args:
+            data: A DataFrame, ndarray, list or tuple of rows, dict of columns, pyarrow Table or
+                RecordBatch, or an iterator / async iterator yielding any of these or single rows.
+            table_name (str, optional): Target table. Defaults to "staging".
+            schema (str, optional): Unused, the schema is set on the Stager. Defaults to None.
+            drop_first (bool, optional): Drop the table before staging. Defaults to False.
+            chunk_size (int, optional): Rows per chunk. Defaults to config.DEFAULT_CHUNK_SIZE.
+            merge_on (Union[str, list], optional): Key column(s). Instead of being appended, the data
+                are loaded into a scratch table (UNLOGGED on PostgreSQL, TEMP on SQLite) and upserted
+                into the table in one statement: rows with an existing key are updated, the others
+                inserted. A unique index on the keys is created if missing. Defaults to None.
+            load_id (str, optional): Makes the load resumable. Every chunk commits on its own, together
+                with its entry (load id, chunk index, row range, content hash) in the config.MANIFEST_TABLE
+                table. Staging again with the same load id skips the chunks already committed, and the
+                table is not dropped again, so a failed load resumes where it stopped and re-running a
+                finished one is a no-op. The data must come in the same chunks (same input and
+                chunk_size), a committed chunk whose content changed raises a ValueError. Cannot be
+                combined with merge_on. Defaults to None.
+            profile (bool, optional): Profile the columns while staging, from the chunks already in memory,
+                and ANALYZE the table after the load so the planner has statistics for it. Defaults to False.
+
+        Returns:
+            TableProfile: With profile=True, the row count, null count, min, max and approximate (HyperLogLog)
+                distinct count of every column, merged over all chunks. Otherwise None.
+        """
+        if self._active_session is not None:
+            raise RuntimeError("The stager has an open session, stage through the session instead.")
+        if load_id is not None and merge_on is not None:
+            raise ValueError("A merge cannot be resumed, load_id and merge_on are exclusive.")
+        chunk_size = chunk_size or DEFAULT_CHUNK_SIZE
+        columns = self._initial_columns(table_name, data)
+        table_profile = TableProfile(table_name) if profile else None
+        async with self._db_manager:
+            committed = None
+            if load_id is not None:
+                committed = await self._db_manager.committed_chunks(load_id, table_name, self._manifest_columns())
+                # A resumed load keeps the chunks it already committed
+                drop_first = drop_first and not committed
+            await self._prepare_table(table_name, drop_first, columns)
+            if merge_on is not None:
+                key_columns = [merge_on] if isinstance(merge_on, str) else list(merge_on)
+                await self._stage_merge(table_name, data, key_columns, chunk_size, columns, table_profile)
+            else:
+                await self._db_manager.begin_load(table_name)
+                try:
+                    rows = 0
+                    if committed is None:
+                        async for chunk in iter_chunks(data, chunk_size):
+                            await self._stage_chunk(table_name, chunk, columns, profile=table_profile)
+                            rows += len(chunk)
+                    else:
+                        rows = await self._stage_checkpointed(
+                            table_name, data, chunk_size, columns, load_id, committed, table_profile
+                        )
+                    if rows == 0:
+                        # Nothing created the table, an empty load still leaves an (ID-only) table behind
+                        await self._db_manager.ensure_columns(table_name, columns)
+                except BaseException:
+                    await self._db_manager.end_load(table_name, failed=True)
+                    raise
+                await self._db_manager.end_load(table_name)
+            if table_profile is not None:
+                # After end_load, so deferred indexes are rebuilt before their statistics are gathered
+                await self._db_manager.analyze(table_name)
+                log_event(logging.INFO, "Load profiled", table=table_name, rows=table_profile.rows,
+                          columns=len(table_profile.columns))
+        return table_profile
+
+    async def _stage_checkpointed(self, table_name, data, chunk_size: int, columns: dict, load_id: str,
+                                  committed: dict, profile: TableProfile = None) -> int:
+        """Stages the chunks not in `committed` (chunk index -> content hash), each with its manifest
+        entry. Skipped chunks are still profiled. Returns the number of rows of the data, skipped ones included."""
+        first_row = 0
+        index = -1
+        async for chunk in iter_chunks(data, chunk_size):
+            index += 1
+            chunk_hash = content_hash(chunk)
+            if index in committed:
+                if committed[index] != chunk_hash:
+                    raise ValueError(
+                        f"Chunk {index} of load '{load_id}' differs from the one committed into '{table_name}', "
+                        "the input or chunk_size changed."
+                    )
+                self.instrumentation.count("chunks_skipped", table=table_name)
+                if profile is not None:
+                    self._profile_chunk(table_name, chunk, profile)
+            else:
+                row = {
+                    "load_id": load_id, "table_name": table_name, "chunk_index": index,
+                    "first_row": first_row, "row_count": len(chunk), "content_hash": chunk_hash,
+                }
+                await self._stage_chunk(table_name, chunk, columns, profile=profile, checkpoint=(MANIFEST_TABLE, row))
+            first_row += len(chunk)
+        if committed:
+            log_event(logging.INFO, "Load resumed", table=table_name, load_id=load_id, skipped=len(committed), chunks=index + 1)
+        return first_row
+
+    def _manifest_columns(self) -> dict:
+        text_type = self._schema_manager.text_type
+        integer_type = self._schema_manager.infer_from_dtype(np.dtype(np.int64))
+        return {
+            "load_id": text_type, "table_name": text_type, "chunk_index": integer_type,
+            "first_row": integer_type, "row_count": integer_type, "content_hash": text_type,
+        }
+
+    async def _stage_merge(self, table_name, data, key_columns: list, chunk_size: int, columns: dict,
+                           profile: TableProfile = None) -> int:
+        """Loads the data into a scratch table, merges it into the table and drops the scratch table.
+        The scratch rows are numbered in MERGE_SEQUENCE_COLUMN, the merge keeps the last row of a key."""
+        staging_table = f"{table_name}_merge_{uuid.uuid4().hex[:8]}"
+        staged_columns = []
+        sequence_type = self._schema_manager.infer_from_dtype(np.dtype(np.int64))
+        loaded = 0
+        try:
+            async for chunk in iter_chunks(data, chunk_size):
+                if not staged_columns:
+                    missing_keys = [col for col in key_columns if col not in chunk.columns]
+                    if missing_keys:
+                        raise ValueError(f"The merge key columns {missing_keys} are not in the data.")
+                if profile is not None:
+                    self._profile_chunk(table_name, chunk, profile)
+                unseen = self._infer_missing(table_name, chunk, columns)
+                if unseen:
+                    # The scratch table holds the codes of the table's dictionary-encoded columns
+                    await self._add_dictionaries(table_name, chunk, columns, unseen, new=False)
+                encoded = await self._db_manager.encode_dictionaries(table_name, chunk)
+                # The table is widened too, the merge would otherwise cast the values back to its types
+                widened = await self._widen_columns(table_name, encoded, columns, unseen)
+                if not staged_columns:
+                    await self._db_manager.create_staging_table(
+                        staging_table, {MERGE_SEQUENCE_COLUMN: sequence_type, **{col: columns[col] for col in chunk.columns}}
+                    )
+                elif any(col in staged_columns for col in widened):
+                    await self._db_manager.alter_column_types(
+                        staging_table, {col: sql_type for col, sql_type in widened.items() if col in staged_columns}
+                    )
+                staged_columns.extend(col for col in chunk.columns if col not in staged_columns)
+                sequence = np.arange(loaded, loaded + len(encoded), dtype=np.int64)
+                loaded += len(encoded)
+                await self._stage_chunk(
+                    staging_table, encoded.assign(**{MERGE_SEQUENCE_COLUMN: sequence}),
+                    {MERGE_SEQUENCE_COLUMN: sequence_type, **columns}
+                )
+            if not staged_columns:
+                return 0
+            merged = await self._db_manager.merge(
+                staging_table, table_name, key_columns, {col: columns[col] for col in staged_columns}
+            )
+        finally:
+            if staged_columns:
+                await self._db_manager.drop_table(staging_table)
+        self.instrumentation.count("rows_merged", merged, table=table_name)
+        log_event(logging.INFO, "Merge finished", table=table_name, keys=key_columns, rows=merged)
+        return merged
+
+    async def stage_many_async(self, jobs, max_concurrency=4) -> list:
+        """Stages several datasets concurrently, see StageScheduler.
+
+        Args:
+            jobs: StageJobs, (data, table_name) tuples or dicts of stage_data_async arguments (merge_on,
+                load_id and profile included). A job whose arguments are invalid fails on its own.
+            max_concurrency (int, optional): Maximum number of jobs running at once. Defaults to 4.
+
+        Returns:
+            list[JobResult]: One result per job, in job order. Failed jobs hold their exception
+                instead of raising it.
+        """
+        if self._active_session is not None:
+            raise RuntimeError("The stager has an open session, stage through the session instead.")
+        scheduler = StageScheduler(self, max_concurrency=max_concurrency)
+        scheduler.reserve_connections()
+        try:
+            async with self._db_manager:
+                return await scheduler.run(jobs)
+        finally:
+            scheduler.release_connections()
+
+    async def drop_partitions_before_async(self, table_name, value, detach=False) -> list:
+        """Retention for a range partitioned table (PostgresDB with partition_by): drops, or with
+        detach=True detaches, the partitions whose upper bound is at or before `value`.
+
+        Returns:
+            list: The names of the dropped or detached partitions
+        """
+        if self._active_session is not None:
+            raise RuntimeError("The stager has an open session, stage through the session instead.")
+        async with self._db_manager:
+            return await self._db_manager.drop_partitions_before(table_name, value, detach=detach)
+
+    async def read_async(self, table_name="staging", columns=None, where=None, chunk_size=None, output="pandas"):
+        """Reads the table back. The rows are streamed out of the database (COPY ... TO STDOUT on
+        PostgreSQL, chunked cursor reads on SQLite) and decoded column-wise, the column types come
+        back as the python/NumPy types the type mapping writes them from: integers with nulls as
+        nullable Int64 & co., timestamps as datetime64, dates as datetime.date. SQLite stores
+        timestamps and dates as TEXT and booleans as INTEGER, so they come back as strings and integers. Dictionary-encoded columns are
+        decoded back to their values.
+
+        Args:
+            table_name (str, optional): The table. Defaults to "staging".
+            columns (Union[str, list], optional): The columns to read. Defaults to every column but the id.
+            where (str, optional): A SQL condition the rows must match, evaluated by the database. It is
+                not escaped, and dictionary-encoded columns hold their codes in it. Defaults to None.
+            chunk_size (int, optional): Rows decoded at a time. Defaults to config.DEFAULT_CHUNK_SIZE.
+            output (str, optional): "pandas" for a DataFrame, "numpy" for a dict of column -> array or
+                "arrow" for a pyarrow Table, see readback.convert_output. Defaults to "pandas".
+
+        Returns:
+            The rows, in the requested output
+        """
+        if self._active_session is not None:
+            raise RuntimeError("The stager has an open session, read through the session instead.")
+        if output not in OUTPUTS:
+            raise ValueError(f"output must be one of {OUTPUTS}.")
+        async with self._db_manager:
+            return await self._read(table_name, columns, where, chunk_size, output)
+
+    async def iter_read_async(self, table_name="staging", columns=None, where=None, chunk_size=None, output="pandas"):
+        """Streaming version of read_async: yields the rows in chunks of at most chunk_size rows, each
+        in the requested output, without holding the whole table in memory. The connection stays
+        open until the iteration ends."""
+        if self._active_session is not None:
+            raise RuntimeError("The stager has an open session, read through the session instead.")
+        if output not in OUTPUTS:
+            raise ValueError(f"output must be one of {OUTPUTS}.")
+        async with self._db_manager:
+            columns, python_types, dictionaries = await self._read_columns(table_name, columns)
+            async for chunk in self._read_chunks(table_name, columns, python_types, dictionaries, where, chunk_size):
+                yield convert_output(chunk, output)
+
+    async def _read(self, table_name, columns=None, where=None, chunk_size=None, output="pandas"):
+        """Reads the table on a connected manager, see read_async."""
+        columns, python_types, dictionaries = await self._read_columns(table_name, columns)
+        chunks = [
+            chunk async for chunk in self._read_chunks(table_name, columns, python_types, dictionaries, where, chunk_size)
+        ]
+        frame = pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame(columns=columns)
+        return convert_output(frame, output)
+
+    async def _read_columns(self, table_name, columns=None) -> tuple:
+        """Returns the columns to read, the python type of each (SchemaManager.python_type of its
+        SQL type) and code -> value of the dictionary-encoded ones."""
+        column_types = await self._db_manager.get_column_types(table_name)
+        if not column_types:
+            raise ValueError(f"Table '{table_name}' does not exist.")
+        if columns is None:
+            columns = [col for col in column_types if col != "id"]
+        else:
+            columns = [columns] if isinstance(columns, str) else list(columns)
+            unknown = [col for col in columns if col not in column_types]
+            if unknown:
+                raise ValueError(f"The columns {unknown} are not in '{table_name}'.")
+        python_types = {col: self._schema_manager.python_type(column_types[col]) for col in columns}
+        dictionaries = {}
+        for col in columns:
+            if column_types[col] == self._schema_manager.dictionary_code_type and await self._db_manager.has_dictionary(table_name, col):
+                dictionaries[col] = await self._db_manager.dictionary_values(table_name, col)
+        return columns, python_types, dictionaries
+
+    async def _read_chunks(self, table_name, columns: list, python_types: dict, dictionaries: dict, where=None,
+                           chunk_size=None):
+        async for chunk in self._db_manager.read(table_name, columns, python_types, where, chunk_size or DEFAULT_CHUNK_SIZE):
+            for col, values in dictionaries.items():
+                chunk[col] = chunk[col].astype(object).map(values).astype(object)
+            yield chunk
+
+    async def stage_file_async(self, path, table_name="staging", drop_first=False, file_format=None,
+                               chunk_size=None, delimiter=",", header=True, **read_options) -> int:
+        """Stages a CSV or Parquet file without reading it whole. The column types are read from
+        the Parquet schema, or inferred from the first rows of a CSV (SchemaManager.sample_size of them).
+
+        On PostgreSQL a CSV file is streamed into COPY block by block, without being parsed
+        client-side, so later rows must fit the types inferred from the sample. Otherwise the file
+        is read in chunks (CSV) or record batches (Parquet) of chunk_size rows.
+
+        Args:
+            path: Path of the file
+            table_name (str, optional): Target table. Defaults to "staging".
+            drop_first (bool, optional): Drop the table before staging. Defaults to False.
+            file_format (str, optional): "csv" or "parquet". Defaults to the format of the file suffix.
+            chunk_size (int, optional): Rows per chunk. Defaults to config.DEFAULT_CHUNK_SIZE.
+            delimiter (str, optional): CSV field delimiter. Defaults to ",".
+            header (bool, optional): The CSV starts with a header line, otherwise the columns are named
+                column_0..column_n. Defaults to True.
+            **read_options: Extra pandas.read_csv options. They need client-side parsing, so they
+                disable the COPY streaming.
+
+        Returns:
+            int: The number of rows staged
+        """
+        if self._active_session is not None:
+            raise RuntimeError("The stager has an open session, stage through the session instead.")
+        async with self._db_manager:
+            await self._prepare_table(table_name, drop_first)
+            await self._db_manager.begin_load(table_name)
+            try:
+                rows = await self._stage_file(path, table_name, {}, file_format, chunk_size, delimiter, header, **read_options)
+            except BaseException:
+                await self._db_manager.end_load(table_name, failed=True)
+                raise
+            await self._db_manager.end_load(table_name)
+            return rows
+
+    async def _stage_file(self, path, table_name, columns: dict, file_format=None, chunk_size=None,
+                          delimiter=",", header=True, **read_options) -> int:
+        """Stages the file into the prepared table, see stage_file_async. The types of the file's
+        columns are added to `columns`."""
+        file_format = detect_format(path, file_format)
+        chunk_size = chunk_size or DEFAULT_CHUNK_SIZE
+        sample_size = self._schema_manager.sample_size
+        loop = asyncio.get_running_loop()
+        stream = file_format == "csv" and self._db_manager._db.streams_csv and not read_options
+        with self.instrumentation.phase("inference", table=table_name):
+            if file_format == "csv":
+                read_sample = partial(read_csv_sample, path, sample_size, delimiter, header, **read_options)
+                sample = await loop.run_in_executor(None, read_sample)
+                # Types compacted on the sample cannot be widened in the middle of a COPY stream
+                file_types = self._schema_manager.infer_from_dataframe(sample, compact=False if stream else None)
+            else:
+                schema = await loop.run_in_executor(None, read_parquet_schema, path)
+                file_types = self._schema_manager.infer_from_arrow_schema(schema)
+            added = [col for col in file_types if col not in columns]
+            columns.update({col: file_types[col] for col in added})
+        # Known before the first chunk, so their dictionaries are looked up here
+        await self._add_dictionaries(table_name, None, columns, added, new=False)
+        if stream:
+            # COPY would get the values of dictionary-encoded columns instead of their codes
+            for col, sql_type in file_types.items():
+                if sql_type == self._schema_manager.text_type and await self._db_manager.has_dictionary(table_name, col):
+                    stream = False
+                    break
+
+        if stream:
+            file_columns = {col: columns[col] for col in file_types}
+            rows = await self._db_manager.copy_csv_stream(
+                table_name, iter_file_blocks(path), file_columns, delimiter=delimiter, header=header
+            )
+        else:
+            if file_format == "csv":
+                col_names = None if header else list(file_types)
+                reader = iter_csv_chunks(path, chunk_size, delimiter, header, col_names, **read_options)
+            else:
+                reader = iter_parquet_chunks(path, chunk_size)
+            rows = 0
+            async for chunk in iter_chunks(read_off_loop(reader), chunk_size):
+                await self._stage_chunk(table_name, chunk, columns)
+                rows += len(chunk)
+        log_event(logging.INFO, "File staged", table=table_name, path=str(path), format=file_format, rows=rows)
+        return rows
+
+    def _initial_columns(self, table_name, data) -> dict:
+        """The column types known before the first chunk: read from the schema of an Arrow table or
+        the dtypes of a dict of columns, so no chunk is sampled for them. Empty for other inputs."""
+        if not (is_arrow(data) or is_column_mapping(data)):
+            return {}
+        with self.instrumentation.phase("inference", table=table_name):
+            return self._schema_manager.infer_types(data)
+
+    async def _prepare_table(self, table_name, drop_first=False, columns=None):
+        """Drops the table if asked to. A missing table is created in one statement, from `columns`
+        when the types are known up front or else with the columns of the first chunk."""
+        if drop_first:
+            await self._db_manager.drop_table(table_name)
+        if columns:
+            # Known up front, so no chunk sees them as new: their dictionaries are looked up here
+            await self._add_dictionaries(table_name, None, columns, list(columns), new=False)
+            await self._db_manager.ensure_columns(table_name, columns)
+
+    async def _stage_chunk(self, table_name, chunk: pd.DataFrame, columns: dict, profile: TableProfile = None,
+                           **insert_options):
+        """Inserts one chunk. The types are inferred only for columns not seen before and are added to `columns`.
+        The chunk's values are added to `profile`, if given. insert_options are passed on to the backend's insert."""
+        if profile is not None:
+            self._profile_chunk(table_name, chunk, profile)
+        unseen = self._infer_missing(table_name, chunk, columns)
+        if unseen:
+            await self._add_dictionaries(table_name, chunk, columns, unseen)
+        if len(chunk) == 0:
+            # Nothing to insert, but the columns are created
+            await self._db_manager.ensure_columns(table_name, {col: columns[col] for col in chunk.columns})
+            return
+        encoded = await self._db_manager.encode_dictionaries(table_name, chunk)
+        if encoded is not chunk:
+            # A pre-serialized chunk still holds the values instead of their codes
+            insert_options.pop("serialized", None)
+        await self._widen_columns(table_name, encoded, columns, unseen)
+        await self._db_manager.insert_data(table_name, encoded, columns, **insert_options)
+        self.instrumentation.count("chunks_staged", table=table_name)
+
+    def _profile_chunk(self, table_name, chunk: pd.DataFrame, profile: TableProfile):
+        with self.instrumentation.phase("profile", table=table_name):
+            profile.update(chunk)
+
+    def _infer_missing(self, table_name, chunk: pd.DataFrame, columns: dict) -> list:
+        """Infers the types of the chunk's columns missing from `columns` and adds them to it.
+        Returns the names of these columns."""
+        unseen = [col for col in chunk.columns if col not in columns]
+        if unseen:
+            with self.instrumentation.phase("inference", table=table_name):
+                columns.update(self._schema_manager.infer_types(chunk[unseen]))
+        return unseen
+
+    async def _add_dictionaries(self, table_name, chunk: pd.DataFrame, columns: dict, unseen: list, new: bool = True):
+        """Dictionary-encodes the new text columns that were encoded by an earlier load, whatever the
+        stager's dictionary_threshold, and with new=True also those worth it."""
+        text_type = self._schema_manager.text_type
+        candidates = set()
+        if new:
+            candidates = set(self._schema_manager.dictionary_columns(chunk[unseen], {col: columns[col] for col in unseen}))
+        for col in unseen:
+            if columns[col] != text_type:
+                continue
+            if col in candidates or await self._db_manager.has_dictionary(table_name, col):
+                code_type = self._schema_manager.dictionary_code_type
+                await self._db_manager.add_dictionary(table_name, col, text_type, code_type)
+                columns[col] = code_type
+                self.instrumentation.count("dictionary_columns", table=table_name)
+
+    async def _widen_columns(self, table_name, chunk: pd.DataFrame, columns: dict, unseen: list) -> dict:
+        """Widens the columns whose type does not hold the chunk's values, see SchemaManager.widen_type,
+        e.g. BIGINT to DOUBLE PRECISION when a later chunk has fractional values. Columns first seen in
+        this load take the type they already have in the table, which an earlier load may have
+        inferred differently. Returns the widened columns, none if the backend cannot alter column types."""
+        if not self._db_manager._db.alters_column_types:
+            return {}
+        existing_columns = await self._db_manager.get_existing_columns(table_name)
+        if unseen and existing_columns:
+            table_types = await self._db_manager.get_column_types(table_name)
+            columns.update({col: table_types[col] for col in unseen if col in table_types})
+        widened = {}
+        for col in chunk.columns:
+            sql_type = self._schema_manager.widen_type(chunk[col], columns[col])
+            if sql_type != columns[col]:
+                widened[col] = sql_type
+        if widened:
+            altered = {col: sql_type for col, sql_type in widened.items() if col in existing_columns}
+            if altered:
+                await self._db_manager.alter_column_types(table_name, altered)
+            columns.update(widened)
+            log_event(logging.INFO, "Columns widened", table=table_name, columns=widened)
+        return widened
+
+    @property
+    def instrumentation(self) -> Instrumentation:
+        """The instrumentation shared by the stager, its DB_Manager and backend."""
+        return self._db_manager.instrumentation
+
+    def session(self, max_rows=None, max_delay=1.0, max_buffered_rows=None):
+        """Opens a long-lived staging session that keeps the connection open and coalesces small
+        stage() calls into larger inserts. Use it as `async with stager.session() as session:`.
+
+        Args:
+            max_rows (int, optional): A table is flushed once this many rows are buffered for it.
+                Defaults to config.DEFAULT_CHUNK_SIZE.
+            max_delay (float, optional): Maximum seconds a row waits in the buffer. Defaults to 1.0.
+            max_buffered_rows (int, optional): stage() blocks while this many rows are buffered across
+                all tables. Defaults to 4 * max_rows.
+
+        Returns:
+            StagingSession: The (not yet started) session
+        """
+        return StagingSession(self, max_rows=max_rows, max_delay=max_delay, max_buffered_rows=max_buffered_rows)
             
             
-    def stage_data():
-        #        asyncio.run(self.async_ingest_data(table_name, df))
-        pass
-        
-        
-        
-    
-    
\ No newline at end of file
+    def background(self, max_pending=64, **session_options):
+        """Returns a BackgroundStager that runs this stager on a dedicated event loop thread, for
+        synchronous callers. Use it for future-returning (submit) and fire-and-forget
+        (stage_data_nowait) submissions. Like a session, only one can be open per stager.
+
+        Args:
+            max_pending (int, optional): Maximum number of submissions queued or running. Defaults to 64.
+            **session_options: Options of the underlying session, see Stager.session().
+
+        Returns:
+            BackgroundStager: The (lazily started) background stager
+        """
+        return BackgroundStager(self, max_pending=max_pending, **session_options)
+
+    def stage_data(self, data, table_name="staging", schema=None, drop_first=False, chunk_size=None):
+        """Synchronous version of stage_data_async. Blocks until the data are written.
+
+        The first call starts a background event loop thread that keeps the connection open
+        for the following calls, close() stops it.
+        """
+        if self._background is None:
+            self._background = self.background()
+        self._background.stage_data(data, table_name, drop_first=drop_first, chunk_size=chunk_size)
+
+    def stage_file(self, path, table_name="staging", drop_first=False, **file_options) -> int:
+        """Synchronous version of stage_file_async, run on the same background event loop as stage_data."""
+        if self._background is None:
+            self._background = self.background()
+        return self._background.stage_file(path, table_name, drop_first=drop_first, **file_options)
+
+    def read(self, table_name="staging", columns=None, where=None, chunk_size=None, output="pandas"):
+        """Synchronous version of read_async, run on the same background event loop as stage_data.
+        Rows still buffered for the table are written first."""
+        if self._background is None:
+            self._background = self.background()
+        return self._background.read(table_name, columns=columns, where=where, chunk_size=chunk_size, output=output)
+
+    def close(self):
+        """Stops the background event loop thread started by stage_data, if any, and the worker
+        processes the backend keeps across loads (SQLite shard workers)."""
+        if self._background is not None:
+            self._background.close()
+            self._background = None
+        self._db_manager._db.shutdown()
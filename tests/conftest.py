@@ -0,0 +1,17 @@
+import os
+import sys
+from pathlib import Path
+import pytest
+
+# The tests import the package as src.stageit, like the examples
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+@pytest.fixture
+def postgres_url():
+    """A PostgreSQL server to test against, given in STAGEIT_TEST_POSTGRES_URL. Skips the test otherwise."""
+    url = os.environ.get("STAGEIT_TEST_POSTGRES_URL")
+    if not url:
+        pytest.skip("STAGEIT_TEST_POSTGRES_URL is not set")
+    pytest.importorskip("asyncpg")
+    return url
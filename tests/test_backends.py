@@ -0,0 +1,57 @@
+import asyncio
+import sqlite3
+import pandas as pd
+import pytest
+
+from src.stageit import backends
+from src.stageit.databases.sqlite_db import SQLiteDB
+from src.stageit.stager import Stager
+
+
+class FixedTypesDB(SQLiteDB):
+    """A backend without the optional column type hooks."""
+    alters_column_types = False
+
+    async def get_column_types(self, table_name):
+        raise NotImplementedError
+
+    async def alter_column_types(self, table_name, column_types):
+        raise NotImplementedError
+
+
+@pytest.fixture
+def registered():
+    names = []
+
+    def register(name, *args, **kwargs):
+        names.extend((name, *kwargs.get("aliases", ())))
+        return backends.register_backend(name, *args, **kwargs)
+
+    yield register
+    for name in names:
+        backends._BACKENDS.pop(name.lower(), None)
+
+
+def test_references_are_imported_on_first_use(registered):
+    spec = registered("lazy", "stageit_no_such_module:Backend", ".config:SQLITE_TYPE_MAPPING", aliases=("Lazy2",))
+    assert backends.get_backend("LAZY2") is spec
+    assert "lazy" in backends.available_backends() and "lazy2" not in backends.available_backends()
+    with pytest.raises(ModuleNotFoundError):
+        spec.backend_class
+
+
+def test_registered_reference_and_alias_stage_data(registered, tmp_path):
+    registered("fixed", f"{__name__}:FixedTypesDB", ".config:SQLITE_TYPE_MAPPING", uses_schema=False,
+               aliases=("fixed-sqlite",))
+    stager = Stager(str(tmp_path / "db.sqlite"), "fixed-sqlite")
+    assert type(stager._db_manager._db).__name__ == "FixedTypesDB"
+    # The second load does not fit the first one's types, which this backend cannot widen
+    asyncio.run(stager.stage_data_async(pd.DataFrame({"x": [1, 2]}), "t"))
+    asyncio.run(stager.stage_data_async(pd.DataFrame({"x": [1.5, 2.5]}), "t"))
+    with sqlite3.connect(str(tmp_path / "db.sqlite")) as conn:
+        assert conn.execute("SELECT x FROM t ORDER BY id;").fetchall() == [(1,), (2,), (1.5,), (2.5,)]
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError, match="Unknown backend"):
+        backends.get_backend("no-such-backend")
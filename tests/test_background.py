@@ -0,0 +1,43 @@
+import threading
+import pandas as pd
+import pytest
+
+from src.stageit.stager import Stager
+
+
+def frame(start, rows=10):
+    return pd.DataFrame({"k": range(start, start + rows)})
+
+
+def test_stage_data_runs_on_one_background_loop(tmp_path):
+    stager = Stager(str(tmp_path / "db.sqlite"), "sqlite")
+    try:
+        stager.stage_data(frame(0), "t", drop_first=True)
+        thread = stager._background._thread
+        stager.stage_data(frame(10), "t")
+        assert stager._background._thread is thread and thread.is_alive()
+        assert sorted(stager.read("t")["k"].tolist()) == list(range(20))
+    finally:
+        stager.close()
+    assert not thread.is_alive()
+
+
+def test_nowait_rows_are_written_by_close(tmp_path):
+    path = str(tmp_path / "db.sqlite")
+    with Stager(path, "sqlite").background(max_delay=60) as background:
+        for i in range(5):
+            background.stage_data_nowait(frame(i * 10), "t")
+    reader = Stager(path, "sqlite")
+    try:
+        assert len(reader.read("t")) == 50
+    finally:
+        reader.close()
+
+
+def test_nowait_errors_are_raised_by_flush(tmp_path):
+    stager = Stager(str(tmp_path / "db.sqlite"), "sqlite")
+    with stager.background(max_delay=60) as background:
+        background.stage_data_nowait(pd.DataFrame({"k": [1]}), "t")
+        background.stage_data_nowait([object()], "t")
+        with pytest.raises(Exception):
+            background.flush()
@@ -0,0 +1,49 @@
+import asyncio
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.stageit.chunking import is_arrow, is_column_mapping
+from src.stageit.instrumentation import InMemoryRecorder, Instrumentation
+from src.stageit.stager import Stager
+
+
+@pytest.fixture
+def columns():
+    return {"n": np.arange(5), "x": np.array([0.5, 1.5, 2.5, 3.5, 4.5]), "s": ["a", "b", "c", "d", "e"]}
+
+
+def test_input_detection(columns):
+    assert is_column_mapping(columns)
+    assert not is_column_mapping({})
+    assert not is_column_mapping({"n": 1})
+    assert not is_arrow(pd.DataFrame(columns))
+
+
+def test_dict_of_columns_types_are_inferred_once(tmp_path, columns):
+    recorder = InMemoryRecorder()
+    stager = Stager(str(tmp_path / "db.sqlite"), "sqlite", instrumentation=Instrumentation([recorder]))
+    asyncio.run(stager.stage_data_async(columns, "cols", chunk_size=2))
+
+    summary = recorder.summary()
+    # The types come from the dtypes up front, not from sampling each of the three chunks
+    assert summary["phase_calls"]["inference"] == 1
+    assert summary["counters"]["chunks_staged"] == 3
+    assert asyncio.run(stager._db_manager.get_column_types("cols")) == {
+        "id": "INTEGER", "n": "INTEGER", "x": "REAL", "s": "TEXT"}
+    pd.testing.assert_frame_equal(asyncio.run(stager.read_async("cols")), pd.DataFrame(columns, dtype=object),
+                                  check_dtype=False)
+
+
+def test_arrow_table_and_batches(tmp_path):
+    pa = pytest.importorskip("pyarrow")
+    table = pa.table({"n": pa.array([1, None, 3]), "s": pa.array(["a", "b", None])})
+    stager = Stager(str(tmp_path / "db.sqlite"), "sqlite")
+    asyncio.run(stager.stage_data_async(table, "arrow_table", chunk_size=2))
+    asyncio.run(stager.stage_data_async(table.to_batches(max_chunksize=1), "arrow_batches"))
+
+    for name in ("arrow_table", "arrow_batches"):
+        out = asyncio.run(stager.read_async(name))
+        assert out["n"].tolist()[::2] == [1, 3] and pd.isna(out["n"][1])
+        assert out["s"].tolist()[:2] == ["a", "b"] and pd.isna(out["s"][2])
+    assert asyncio.run(stager._db_manager.get_column_types("arrow_table"))["n"] == "INTEGER"
@@ -0,0 +1,47 @@
+import asyncio
+import datetime
+import pandas as pd
+
+from src.stageit.files import iter_csv_chunks, parse_iso_dates, read_csv_sample
+from src.stageit.stager import Stager
+
+CSV = "k,day,at,code,note\n1,2024-01-01,2024-01-01 10:30:00,20240101,x\n2,2024-02-29,2024-02-29T23:59,20240229,\n3,,,20240301,y\n"
+
+
+def write_csv(tmp_path):
+    path = tmp_path / "dates.csv"
+    path.write_text(CSV)
+    return path
+
+
+def test_sample_parses_iso_dates_and_timestamps(tmp_path):
+    sample = read_csv_sample(write_csv(tmp_path), 100)
+    assert sample["day"].tolist()[:2] == [datetime.date(2024, 1, 1), datetime.date(2024, 2, 29)]
+    assert sample["day"].iloc[2] is None
+    assert sample["at"].dtype.kind == "M"
+    assert sample["code"].dtype.kind == "i"
+
+
+def test_chunks_parse_like_the_sample(tmp_path):
+    chunk = next(iter_csv_chunks(write_csv(tmp_path), 2))
+    assert chunk["day"].tolist() == [datetime.date(2024, 1, 1), datetime.date(2024, 2, 29)]
+    assert chunk["at"].dtype.kind == "M"
+
+
+def test_mixed_or_offset_values_stay_text():
+    data = pd.DataFrame({"a": ["2024-01-01", "soon"], "b": ["2024-01-01T10:00+02:00", None]}, dtype=object)
+    assert parse_iso_dates(data) is data
+
+
+def test_streamed_file_columns_are_staged_as_dates(tmp_path, postgres_url):
+    stager = Stager(postgres_url, "postgresql")
+    asyncio.run(stager.stage_file_async(write_csv(tmp_path), "stageit_test_csv_dates", drop_first=True))
+
+    types = asyncio.run(_column_types(stager, "stageit_test_csv_dates"))
+    assert types["day"] == "DATE"
+    assert types["at"] == "TIMESTAMP"
+
+
+async def _column_types(stager, table_name):
+    async with stager._db_manager:
+        return await stager._db_manager.get_column_types(table_name)
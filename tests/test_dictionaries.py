@@ -0,0 +1,87 @@
+import asyncio
+import pandas as pd
+
+from src.stageit.instrumentation import InMemoryRecorder, Instrumentation
+from src.stageit.stager import Stager
+
+COLORS = ["red", "green", "blue"]
+
+
+def encoded_stager(path, rows=300):
+    stager = Stager(str(path), "sqlite", dictionary_threshold=0.1)
+    data = pd.DataFrame({"k": range(rows), "color": [COLORS[i % 3] for i in range(rows)]})
+    asyncio.run(stager.stage_data_async(data, "t", drop_first=True))
+    return stager
+
+
+def test_text_column_is_encoded(tmp_path):
+    stager = encoded_stager(tmp_path / "db.sqlite")
+    types = asyncio.run(_column_types(stager, "t"))
+    assert types["color"] == "INTEGER"
+    assert asyncio.run(stager.read_async("t"))["color"].tolist()[:3] == COLORS
+
+
+def test_append_without_threshold_encodes_existing_dictionary(tmp_path):
+    encoded_stager(tmp_path / "db.sqlite")
+    plain = Stager(str(tmp_path / "db.sqlite"), "sqlite")
+    asyncio.run(plain.stage_data_async(pd.DataFrame({"k": [1000], "color": ["purple"]}), "t"))
+    out = asyncio.run(plain.read_async("t", where="k = 1000"))
+    assert out["color"].tolist() == ["purple"]
+
+
+def test_column_mapping_input_encodes_existing_dictionary(tmp_path):
+    encoded_stager(tmp_path / "db.sqlite")
+    plain = Stager(str(tmp_path / "db.sqlite"), "sqlite")
+    asyncio.run(plain.stage_data_async({"k": [1001], "color": ["green"]}, "t"))
+    assert asyncio.run(plain.read_async("t", where="k = 1001"))["color"].tolist() == ["green"]
+
+
+def test_merge_encodes_existing_dictionary(tmp_path):
+    encoded_stager(tmp_path / "db.sqlite")
+    plain = Stager(str(tmp_path / "db.sqlite"), "sqlite")
+    updates = pd.DataFrame({"k": [0, 2000], "color": ["orange", "blue"]})
+    asyncio.run(plain.stage_data_async(updates, "t", merge_on="k"))
+    out = asyncio.run(plain.read_async("t", where="k IN (0, 2000)")).sort_values("k")
+    assert out["color"].tolist() == ["orange", "blue"]
+
+
+def test_csv_file_encodes_existing_dictionary(tmp_path):
+    encoded_stager(tmp_path / "db.sqlite")
+    path = tmp_path / "more.csv"
+    pd.DataFrame({"k": [3000, 3001], "color": ["red", "teal"]}).to_csv(path, index=False)
+    plain = Stager(str(tmp_path / "db.sqlite"), "sqlite")
+    asyncio.run(plain.stage_file_async(path, "t"))
+    out = asyncio.run(plain.read_async("t", where="k >= 3000")).sort_values("k")
+    assert out["color"].tolist() == ["red", "teal"]
+
+
+def test_missing_dictionaries_are_looked_up_once(tmp_path):
+    recorder = InMemoryRecorder()
+    plain = Stager(str(tmp_path / "db.sqlite"), "sqlite", instrumentation=Instrumentation([recorder]))
+    data = pd.DataFrame({"k": [1, 2], "color": ["red", "blue"], "shade": ["dark", "light"]})
+    asyncio.run(plain.stage_data_async(data, "plain"))
+    asyncio.run(plain.read_async("plain"))
+    first = recorder.summary()["counters"]["catalog_queries"]
+    for _ in range(5):
+        asyncio.run(plain.stage_data_async(data, "plain"))
+        asyncio.run(plain.read_async("plain"))
+    assert recorder.summary()["counters"]["catalog_queries"] == first
+
+
+def test_created_dictionary_replaces_the_cached_miss(tmp_path):
+    stager = Stager(str(tmp_path / "db.sqlite"), "sqlite")
+
+    async def lookups():
+        manager = stager._db_manager
+        async with manager:
+            missing = await manager.has_dictionary("t", "color")
+            await manager.add_dictionary("t", "color", "TEXT", "INTEGER")
+            manager._dictionaries.clear()
+            return missing, await manager.has_dictionary("t", "color")
+
+    assert asyncio.run(lookups()) == (False, True)
+
+
+async def _column_types(stager, table_name):
+    async with stager._db_manager:
+        return await stager._db_manager.get_column_types(table_name)
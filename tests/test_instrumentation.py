@@ -0,0 +1,72 @@
+import asyncio
+import json
+import logging
+import pandas as pd
+
+from src.stageit import config
+from src.stageit.instrumentation import (PHASES, InMemoryRecorder, Instrumentation, InstrumentationCallback,
+                                         JsonFormatter, get_logger, log_event)
+from src.stageit.stager import Stager
+
+
+class LabelRecorder(InstrumentationCallback):
+    def __init__(self):
+        self.phases = []
+        self.counts = []
+
+    def on_phase(self, phase, seconds, labels):
+        self.phases.append((phase, labels.get("table")))
+
+    def on_count(self, name, value, labels):
+        self.counts.append((name, value, labels.get("table")))
+
+
+def test_load_reports_its_phases_and_counters(tmp_path):
+    recorder = InMemoryRecorder()
+    labels = LabelRecorder()
+    stager = Stager(str(tmp_path / "db.sqlite"), "sqlite", instrumentation=Instrumentation([recorder, labels]))
+    asyncio.run(stager.stage_data_async(pd.DataFrame({"k": range(250)}), "t", chunk_size=100))
+    summary = recorder.summary()
+    assert {"inference", "ddl", "transfer"} <= set(summary["phases"])
+    assert set(summary["phases"]) <= set(PHASES)
+    assert summary["counters"]["rows_staged"] == 250
+    assert summary["counters"]["chunks_staged"] == 3
+    assert {table for _, table in labels.phases} == {"t"}
+    assert ("rows_staged", 100, "t") in labels.counts
+
+
+def test_recorder_reset():
+    recorder = InMemoryRecorder()
+    instrumentation = Instrumentation([recorder])
+    with instrumentation.phase("transfer", table="t"):
+        pass
+    instrumentation.count("rows_staged", 5, table="t")
+    assert recorder.summary()["phase_calls"] == {"transfer": 1}
+    recorder.reset()
+    assert recorder.summary() == {"phases": {}, "phase_calls": {}, "counters": {}}
+
+
+def test_json_formatter_merges_the_fields():
+    record = logging.LogRecord("stageit", logging.INFO, __file__, 1, "Load finished", None, None)
+    record.fields = {"table": "t", "rows": 3}
+    entry = json.loads(JsonFormatter().format(record))
+    assert entry["message"] == "Load finished" and entry["level"] == "INFO"
+    assert entry["table"] == "t" and entry["rows"] == 3
+
+
+def test_logger_follows_config_changes(tmp_path, monkeypatch):
+    log_event(logging.INFO, "Before logging is on")
+    monkeypatch.setattr(config, "TURN_LOGGING_ON", True)
+    monkeypatch.setattr(config, "LOGGING_DIR", str(tmp_path / "first"))
+    log_event(logging.INFO, "First dir", n=1)
+    monkeypatch.setattr(config, "LOGGING_DIR", str(tmp_path / "second"))
+    log_event(logging.INFO, "Second dir", n=2)
+    monkeypatch.setattr(config, "TURN_LOGGING_ON", False)
+    log_event(logging.INFO, "After logging is off")
+
+    logger = get_logger()
+    assert not any(isinstance(handler, logging.FileHandler) for handler in logger.handlers)
+    assert logger.level == logging.NOTSET
+    for name, message in (("first", "First dir"), ("second", "Second dir")):
+        lines = (tmp_path / name / "stageit.log").read_text().splitlines()
+        assert [json.loads(line)["message"] for line in lines] == [message]
@@ -0,0 +1,33 @@
+import asyncio
+import numpy as np
+import pandas as pd
+
+from src.stageit.stager import Stager
+
+# Keys 0..9 repeated five times, the last row of each key holds its highest version
+UPDATES = pd.DataFrame({"k": np.tile(np.arange(10), 5), "version": np.repeat(np.arange(5), 10)})
+
+
+def merged_versions(stager, table_name):
+    out = asyncio.run(stager.read_async(table_name)).sort_values("k", ignore_index=True)
+    return dict(zip(out["k"].tolist(), out["version"].tolist()))
+
+
+def test_last_row_of_a_key_wins_within_a_chunk(tmp_path):
+    stager = Stager(str(tmp_path / "db.sqlite"), "sqlite")
+    asyncio.run(stager.stage_data_async(pd.DataFrame({"k": [0, 100], "version": [-1, -1]}), "m", drop_first=True))
+    asyncio.run(stager.stage_data_async(UPDATES, "m", merge_on="k"))
+    assert merged_versions(stager, "m") == {**{k: 4 for k in range(10)}, 100: -1}
+
+
+def test_last_row_of_a_key_wins_across_chunks(tmp_path):
+    stager = Stager(str(tmp_path / "db.sqlite"), "sqlite")
+    asyncio.run(stager.stage_data_async(UPDATES, "m", drop_first=True, merge_on="k", chunk_size=15))
+    assert merged_versions(stager, "m") == {k: 4 for k in range(10)}
+
+
+def test_postgresql_parallel_scratch_load_keeps_load_order(postgres_url):
+    data = pd.DataFrame({"k": np.tile(np.arange(100), 40), "version": np.repeat(np.arange(40), 100)})
+    stager = Stager(postgres_url, "postgresql", parallelism=4, min_rows_per_partition=100)
+    asyncio.run(stager.stage_data_async(data, "stageit_test_merge", drop_first=True, merge_on="k", chunk_size=1500))
+    assert merged_versions(stager, "stageit_test_merge") == {k: 39 for k in range(100)}
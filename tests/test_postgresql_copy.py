@@ -0,0 +1,69 @@
+import asyncio
+import pandas as pd
+import pytest
+
+from src.stageit.stager import Stager
+
+
+async def _execute(url, *statements):
+    import asyncpg
+    conn = await asyncpg.connect(url)
+    try:
+        results = [await conn.fetch(statement) for statement in statements]
+    finally:
+        await conn.close()
+    return results[-1] if results else None
+
+
+@pytest.fixture
+def checked_table(postgres_url):
+    # The rows of the last COPY batch break the CHECK constraint
+    asyncio.run(_execute(
+        postgres_url,
+        "DROP TABLE IF EXISTS cp;",
+        "CREATE TABLE cp (id SERIAL, v BIGINT CHECK (v < 900));",
+    ))
+    yield postgres_url
+    asyncio.run(_execute(postgres_url, "DROP TABLE IF EXISTS cp;"))
+
+
+@pytest.mark.parametrize("copy_format", ["binary", "csv"])
+def test_failed_batch_rolls_back_the_whole_chunk(checked_table, copy_format):
+    import asyncpg
+    stager = Stager(checked_table, "postgresql", copy_format=copy_format, serialize_batch_size=100)
+    with pytest.raises(asyncpg.exceptions.CheckViolationError):
+        asyncio.run(stager.stage_data_async(pd.DataFrame({"v": range(1000)}), "cp"))
+    assert asyncio.run(_execute(checked_table, "SELECT count(*) FROM cp;"))[0][0] == 0
+
+
+@pytest.mark.parametrize("atomic, committed", [(True, 0), (False, 500)])
+def test_parallel_insert_commits_all_partitions_or_none(checked_table, atomic, committed):
+    import asyncpg
+    # Two partitions of 500 rows, the second breaks the CHECK constraint
+    data = pd.DataFrame({"v": [0] * 500 + [1000] * 500})
+    stager = Stager(checked_table, "postgresql", parallelism=2, min_rows_per_partition=100, atomic=atomic)
+    with pytest.raises(asyncpg.exceptions.CheckViolationError):
+        asyncio.run(stager.stage_data_async(data, "cp"))
+    assert asyncio.run(_execute(checked_table, "SELECT count(*) FROM cp;"))[0][0] == committed
+
+
+def test_atomic_inserts_take_their_connections_one_insert_at_a_time(postgres_url):
+    from src.stageit.databases.postgresql_db import PostgresDB
+
+    async def acquire_twice():
+        db = PostgresDB(postgres_url, parallelism=2, atomic=True)
+        await db.connect()
+        try:
+            first = await db._acquire_connections(2)
+            second = asyncio.ensure_future(db._acquire_connections(2))
+            await asyncio.sleep(0.2)
+            waited = not second.done()
+            for conn in first:
+                await db.pool.release(conn)
+            for conn in await asyncio.wait_for(second, timeout=10):
+                await db.pool.release(conn)
+            return waited
+        finally:
+            await db.close()
+
+    assert asyncio.run(acquire_twice())
@@ -0,0 +1,72 @@
+import asyncio
+import pandas as pd
+import pytest
+
+from src.stageit.config import DEFERRED_INDEXES_TABLE
+from src.stageit.stager import Stager
+
+
+async def _execute(url, *statements):
+    import asyncpg
+    conn = await asyncpg.connect(url)
+    try:
+        results = [await conn.fetch(statement) for statement in statements]
+    finally:
+        await conn.close()
+    return results[-1] if results else None
+
+
+@pytest.fixture
+def deferred_table(postgres_url):
+    asyncio.run(_execute(
+        postgres_url,
+        "DROP TABLE IF EXISTS di, di_parent CASCADE;",
+        f"DROP TABLE IF EXISTS {DEFERRED_INDEXES_TABLE};",
+        "CREATE TABLE di_parent (p INT PRIMARY KEY);",
+        "INSERT INTO di_parent VALUES (1);",
+        "CREATE TABLE di (id SERIAL, k INT PRIMARY KEY, v INT, p INT REFERENCES di_parent (p));",
+        "CREATE INDEX di_v_idx ON di (v);",
+    ))
+    yield postgres_url
+    asyncio.run(_execute(postgres_url, "DROP TABLE IF EXISTS di, di_parent CASCADE;"))
+
+
+def _indexes_and_constraints(url):
+    indexes = asyncio.run(_execute(url, "SELECT indexname FROM pg_indexes WHERE tablename = 'di';"))
+    constraints = asyncio.run(_execute(url, "SELECT conname FROM pg_constraint WHERE conrelid = 'di'::regclass;"))
+    return {row[0] for row in indexes} | {row[0] for row in constraints}
+
+
+def test_duplicate_keys_are_rejected_and_indexes_kept(deferred_table):
+    stager = Stager(deferred_table, "postgresql", defer_indexes=True)
+    asyncio.run(stager.stage_data_async(pd.DataFrame({"k": [1, 2], "v": [1, 2], "p": [1, 1]}), "di"))
+    with pytest.raises(Exception, match="duplicate key"):
+        asyncio.run(stager.stage_data_async(pd.DataFrame({"k": [1, 3], "v": [1, 2], "p": [1, 1]}), "di"))
+    assert {"di_pkey", "di_v_idx", "di_p_fkey"} <= _indexes_and_constraints(deferred_table)
+
+
+def test_failed_rebuild_is_reported_kept_and_retried(deferred_table):
+    stager = Stager(deferred_table, "postgresql", defer_indexes=True)
+    with pytest.raises(RuntimeError, match="di_p_fkey"):
+        asyncio.run(stager.stage_data_async(pd.DataFrame({"k": [5], "v": [1], "p": [9]}), "di"))
+    restored = _indexes_and_constraints(deferred_table)
+    assert "di_v_idx" in restored and "di_p_fkey" not in restored
+    assert len(asyncio.run(_execute(deferred_table, f"SELECT * FROM {DEFERRED_INDEXES_TABLE};"))) == 1
+
+    asyncio.run(_execute(deferred_table, "INSERT INTO di_parent VALUES (9);"))
+    asyncio.run(stager.stage_data_async(pd.DataFrame({"k": [6], "v": [1], "p": [1]}), "di"))
+    assert "di_p_fkey" in _indexes_and_constraints(deferred_table)
+    assert asyncio.run(_execute(deferred_table, f"SELECT * FROM {DEFERRED_INDEXES_TABLE};")) == []
+
+
+def test_failed_rebuild_does_not_mask_the_load_error(deferred_table):
+    def chunks():
+        # The orphan row makes the rebuild of the foreign key fail after the source does
+        yield pd.DataFrame({"k": [5], "v": [1], "p": [9]})
+        raise ValueError("source failed")
+
+    stager = Stager(deferred_table, "postgresql", defer_indexes=True)
+    with pytest.raises(ValueError, match="source failed"):
+        asyncio.run(stager.stage_data_async(chunks(), "di"))
+    assert "di_v_idx" in _indexes_and_constraints(deferred_table)
+    assert len(asyncio.run(_execute(deferred_table, f"SELECT * FROM {DEFERRED_INDEXES_TABLE};"))) == 1
@@ -0,0 +1,42 @@
+import datetime
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("asyncpg")
+
+from src.stageit.databases.postgresql_db import encode_binary_columns
+
+
+def test_integral_floats_encode_as_integers():
+    data = pd.DataFrame({"x": [1.0, 2.0, np.nan]})
+    assert encode_binary_columns(data, {"x": "BIGINT"}) == [[1.0, 2.0, None]]
+
+
+def test_fractional_floats_are_rejected_for_integer_columns():
+    data = pd.DataFrame({"x": [1.5, 2.5]})
+    with pytest.raises(ValueError, match="non-integral"):
+        encode_binary_columns(data, {"x": "BIGINT"})
+
+
+def test_fractional_objects_are_rejected_for_integer_columns():
+    data = pd.DataFrame({"x": pd.Series([1, 2.5, None], dtype=object)})
+    with pytest.raises(ValueError, match="non-integral"):
+        encode_binary_columns(data, {"x": "INTEGER"})
+
+
+def test_midnight_timestamps_encode_as_dates():
+    data = pd.DataFrame({"d": pd.to_datetime(["2024-01-01", None, "2024-01-03"])})
+    assert encode_binary_columns(data, {"d": "DATE"}) == [[datetime.date(2024, 1, 1), None, datetime.date(2024, 1, 3)]]
+
+
+def test_timestamps_with_a_time_of_day_are_rejected_for_date_columns():
+    data = pd.DataFrame({"d": pd.Series([pd.Timestamp("2024-01-01"), pd.Timestamp("2024-01-02 10:30")])})
+    with pytest.raises(ValueError, match="time of day"):
+        encode_binary_columns(data, {"d": "DATE"})
+
+
+def test_datetime_objects_with_a_time_of_day_are_rejected_for_date_columns():
+    data = pd.DataFrame({"d": pd.Series([datetime.date(2024, 1, 1), datetime.datetime(2024, 1, 2, 10, 30)], dtype=object)})
+    with pytest.raises(ValueError, match="time of day"):
+        encode_binary_columns(data, {"d": "DATE"})
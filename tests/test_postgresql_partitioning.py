@@ -0,0 +1,50 @@
+import asyncio
+import pandas as pd
+import pytest
+
+from src.stageit.stager import Stager
+
+TABLES = ["pt_a", "pt_b"]
+
+
+async def _execute(url, *statements):
+    import asyncpg
+    conn = await asyncpg.connect(url)
+    try:
+        results = [await conn.fetch(statement) for statement in statements]
+    finally:
+        await conn.close()
+    return results[-1] if results else None
+
+
+@pytest.fixture
+def partitioned_url(postgres_url):
+    drop = f"DROP TABLE IF EXISTS {', '.join(TABLES)} CASCADE;"
+    asyncio.run(_execute(postgres_url, drop))
+    yield postgres_url
+    asyncio.run(_execute(postgres_url, drop))
+
+
+def months(count, rows_per_month=100):
+    ts = pd.date_range("2024-01-01", periods=count, freq="MS").repeat(rows_per_month)
+    return pd.DataFrame({"ts": ts, "v": range(len(ts))})
+
+
+def test_rows_are_routed_to_month_partitions(partitioned_url):
+    stager = Stager(partitioned_url, "postgresql", partition_by="ts", parallelism=2)
+    asyncio.run(stager.stage_data_async(months(3), "pt_a", drop_first=True))
+    partitions = asyncio.run(_execute(
+        partitioned_url, "SELECT inhrelid::regclass::text FROM pg_inherits WHERE inhparent = 'pt_a'::regclass;"
+    ))
+    assert sorted(row[0] for row in partitions) == ["pt_a_p202401", "pt_a_p202402", "pt_a_p202403"]
+    assert len(asyncio.run(stager.read_async("pt_a"))) == 300
+
+
+def test_concurrent_atomic_inserts_do_not_deadlock(partitioned_url):
+    # Two jobs of three partitions each, over a pool of four COPY connections
+    stager = Stager(partitioned_url, "postgresql", partition_by="ts", parallelism=2, atomic=True)
+    jobs = [{"data": months(3), "table_name": table, "drop_first": True} for table in TABLES]
+    results = asyncio.run(asyncio.wait_for(stager.stage_many_async(jobs, max_concurrency=2), timeout=60))
+    assert all(result.ok for result in results), results
+    for table in TABLES:
+        assert len(asyncio.run(stager.read_async(table))) == 300
@@ -0,0 +1,56 @@
+import asyncio
+import sqlite3
+import numpy as np
+import pandas as pd
+
+from src.stageit.instrumentation import InMemoryRecorder, Instrumentation
+from src.stageit.profiling import DistinctSketch, TableProfile
+from src.stageit.stager import Stager
+
+
+def test_distinct_estimate_is_within_the_sketch_error():
+    sketch = DistinctSketch()
+    for start in range(0, 50000, 10000):
+        # Every value twice, across chunks
+        sketch.update(pd.Series(np.arange(start, start + 10000) % 20000))
+    assert abs(sketch.estimate() - 20000) / 20000 < 0.05
+
+
+def test_streamed_profile_matches_the_whole_data(tmp_path):
+    data = pd.DataFrame({
+        "n": [5, None, 3, 8, None, 1, 3],
+        "s": ["b", "a", None, "c", "a", "b", "a"],
+    }, dtype=object)
+    recorder = InMemoryRecorder()
+    db_path = str(tmp_path / "db.sqlite")
+    stager = Stager(db_path, "sqlite", instrumentation=Instrumentation([recorder]))
+    profile = asyncio.run(stager.stage_data_async(data, "t", chunk_size=3, profile=True))
+
+    assert profile.rows == 7
+    assert profile.to_dict() == {
+        "n": {"rows": 7, "null_count": 2, "min": 1, "max": 8, "distinct": 4},
+        "s": {"rows": 7, "null_count": 1, "min": "a", "max": "c", "distinct": 3},
+    }
+    summary = recorder.summary()
+    assert summary["phase_calls"]["profile"] == 3
+    assert summary["phase_calls"]["analyze"] == 1
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("SELECT stat FROM sqlite_stat1 WHERE tbl = 't';").fetchone() == ("7",)
+
+
+def test_unprofiled_load_is_not_analyzed(tmp_path):
+    recorder = InMemoryRecorder()
+    stager = Stager(str(tmp_path / "db.sqlite"), "sqlite", instrumentation=Instrumentation([recorder]))
+    assert asyncio.run(stager.stage_data_async(pd.DataFrame({"n": [1, 2]}), "t")) is None
+    assert "analyze" not in recorder.summary()["phase_calls"]
+
+
+def test_merged_profiles_count_missing_columns_as_nulls():
+    first, second = TableProfile("t"), TableProfile("t")
+    first.update(pd.DataFrame({"n": [1, 2]}))
+    second.update(pd.DataFrame({"n": [7], "s": ["x"]}))
+    first.merge(second)
+
+    assert first.rows == 3
+    assert first["n"].to_dict() == {"rows": 3, "null_count": 0, "min": 1, "max": 7, "distinct": 3}
+    assert first["s"].to_dict() == {"rows": 3, "null_count": 2, "min": "x", "max": "x", "distinct": 1}
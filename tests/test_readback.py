@@ -0,0 +1,70 @@
+import asyncio
+import datetime
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.stageit.stager import Stager
+
+DATA = pd.DataFrame({
+    "i": np.arange(50, dtype=np.int64),
+    "n": pd.array([None if i % 5 == 0 else i for i in range(50)], dtype="Int64"),
+    "f": np.linspace(0, 1, 50),
+    "s": pd.Series([None if i % 7 == 0 else f"s{i}" for i in range(50)], dtype=object),
+})
+
+
+@pytest.fixture
+def stager(tmp_path):
+    stager = Stager(str(tmp_path / "db.sqlite"), "sqlite")
+    asyncio.run(stager.stage_data_async(DATA, "rb", drop_first=True))
+    return stager
+
+
+def test_round_trip_keeps_values_and_types(stager):
+    out = asyncio.run(stager.read_async("rb")).sort_values("i").reset_index(drop=True)
+    assert list(out.columns) == list(DATA.columns)
+    assert out["i"].dtype == np.int64
+    assert str(out["n"].dtype) == "Int64" and out["n"].isna().sum() == 10
+    assert np.allclose(out["f"], DATA["f"])
+    assert out["s"].where(out["s"].notna(), None).tolist() == DATA["s"].tolist()
+
+
+def test_projection_and_where(stager):
+    out = asyncio.run(stager.read_async("rb", columns=["i", "s"], where="i >= 40"))
+    assert list(out.columns) == ["i", "s"]
+    assert sorted(out["i"].tolist()) == list(range(40, 50))
+
+
+def test_streamed_read_in_chunks(stager):
+    async def read_chunks():
+        return [chunk async for chunk in stager.iter_read_async("rb", chunk_size=20)]
+
+    sizes = [len(chunk) for chunk in asyncio.run(read_chunks())]
+    assert sizes == [20, 20, 10]
+
+
+def test_numpy_output(stager):
+    arrays = asyncio.run(stager.read_async("rb", columns=["i", "n"], output="numpy"))
+    assert arrays["i"].dtype == np.int64
+    assert arrays["n"].dtype == np.float64 and np.isnan(arrays["n"]).sum() == 10
+
+
+def test_unknown_output_is_rejected(stager):
+    with pytest.raises(ValueError):
+        asyncio.run(stager.read_async("rb", output="polars"))
+
+
+def test_postgresql_round_trip_decodes_copy_text(postgres_url):
+    data = DATA.assign(
+        ts=pd.date_range("2024-01-01", periods=50, freq="h"),
+        d=[datetime.date(2024, 1, 1 + i % 28) for i in range(50)],
+        s=DATA["s"].where(DATA["s"].isna(), DATA["s"] + "\t\\,\n"),
+    )
+    stager = Stager(postgres_url, "postgresql")
+    asyncio.run(stager.stage_data_async(data, "stageit_test_readback", drop_first=True))
+    out = asyncio.run(stager.read_async("stageit_test_readback")).sort_values("i").reset_index(drop=True)
+    assert str(out["n"].dtype) == "Int64" and out["n"].isna().sum() == 10
+    assert out["ts"].tolist() == data["ts"].tolist()
+    assert out["d"].tolist() == data["d"].tolist()
+    assert out["s"].where(out["s"].notna(), None).tolist() == data["s"].tolist()
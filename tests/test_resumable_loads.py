@@ -0,0 +1,53 @@
+import asyncio
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.stageit.instrumentation import InMemoryRecorder, Instrumentation
+from src.stageit.stager import Stager
+
+DATA = pd.DataFrame({"a": np.arange(100), "s": [f"x{i}" for i in range(100)]})
+
+
+def chunks(fail_at=None, chunk_size=10):
+    for start in range(0, len(DATA), chunk_size):
+        if fail_at is not None and start >= fail_at:
+            raise RuntimeError("boom")
+        yield DATA.iloc[start:start + chunk_size]
+
+
+def stage(stager, data, **options):
+    return asyncio.run(stager.stage_data_async(data, "res", drop_first=True, chunk_size=10, load_id="L1", **options))
+
+
+def test_failed_load_resumes_where_it_stopped(tmp_path):
+    recorder = InMemoryRecorder()
+    stager = Stager(str(tmp_path / "db.sqlite"), "sqlite", instrumentation=Instrumentation([recorder]))
+    with pytest.raises(RuntimeError):
+        stage(stager, chunks(fail_at=60))
+    assert len(asyncio.run(stager.read_async("res"))) == 60
+
+    stage(stager, chunks())
+    out = asyncio.run(stager.read_async("res"))
+    assert sorted(out["a"].tolist()) == list(range(100))
+    assert recorder.summary()["counters"]["chunks_skipped"] == 6
+
+
+def test_finished_load_is_not_staged_again(tmp_path):
+    stager = Stager(str(tmp_path / "db.sqlite"), "sqlite")
+    stage(stager, DATA)
+    stage(stager, DATA)
+    assert len(asyncio.run(stager.read_async("res"))) == 100
+
+
+def test_changed_chunk_is_rejected(tmp_path):
+    stager = Stager(str(tmp_path / "db.sqlite"), "sqlite")
+    stage(stager, DATA)
+    with pytest.raises(ValueError, match="Chunk 0 of load 'L1'"):
+        stage(stager, DATA.assign(s="changed"))
+
+
+def test_merge_cannot_be_resumed(tmp_path):
+    stager = Stager(str(tmp_path / "db.sqlite"), "sqlite")
+    with pytest.raises(ValueError):
+        stage(stager, DATA, merge_on="a")
@@ -0,0 +1,57 @@
+import asyncio
+import pandas as pd
+
+from src.stageit.stager import Stager
+
+
+def frame(start, rows=10):
+    return pd.DataFrame({"k": range(start, start + rows), "v": [f"v{i}" for i in range(start, start + rows)]})
+
+
+def test_jobs_take_stage_data_arguments(tmp_path):
+    stager = Stager(str(tmp_path / "db.sqlite"), "sqlite")
+    asyncio.run(stager.stage_data_async(frame(0), "merged", drop_first=True))
+    changed = frame(5).assign(v="new")
+    results = asyncio.run(stager.stage_many_async([
+        {"data": changed, "table_name": "merged", "merge_on": "k"},
+        {"data": frame(0, 100), "table_name": "resumed", "drop_first": True, "chunk_size": 30, "load_id": "l1"},
+        {"data": frame(0), "table_name": "profiled", "drop_first": True, "profile": True},
+    ]))
+    assert all(result.ok for result in results), results
+    merged = asyncio.run(stager.read_async("merged"))
+    assert len(merged) == 15 and (merged.sort_values("k")["v"].tolist()[5:] == ["new"] * 10)
+    assert results[1].rows == 100
+    assert results[2].profile.rows == 10
+
+    # Resuming the finished load skips every chunk
+    rerun = asyncio.run(stager.stage_many_async([
+        {"data": frame(0, 100), "table_name": "resumed", "drop_first": True, "chunk_size": 30, "load_id": "l1"},
+    ]))
+    assert rerun[0].ok and len(asyncio.run(stager.read_async("resumed"))) == 100
+
+
+def test_invalid_spec_fails_only_its_job(tmp_path):
+    stager = Stager(str(tmp_path / "db.sqlite"), "sqlite")
+    results = asyncio.run(stager.stage_many_async([
+        {"data": frame(0), "table_name": "good"},
+        {"data": frame(0), "table_name": "bad", "unknown_option": 1},
+        {"data": frame(0), "table_name": "both", "merge_on": "k", "load_id": "l"},
+    ]))
+    assert results[0].ok and results[0].rows == 10
+    assert isinstance(results[1].error, TypeError) and results[1].job is None
+    assert isinstance(results[2].error, ValueError)
+
+
+def test_reserved_connections_are_released_after_the_jobs(postgres_url):
+    stager = Stager(postgres_url, "postgresql", parallelism=2)
+    db = stager._db_manager._db
+    results = asyncio.run(stager.stage_many_async([
+        {"data": frame(0), "table_name": "reserved_a", "drop_first": True},
+        {"data": frame(10), "table_name": "reserved_b", "drop_first": True},
+    ], max_concurrency=3))
+    assert all(result.ok for result in results), results
+    assert db._copy_connections == 6
+    # A later load sizes its pool from the backend's own settings again
+    asyncio.run(stager.stage_data_async(frame(20), "reserved_a"))
+    assert db.pool_size is None and db._copy_connections == 2
+    assert len(asyncio.run(stager.read_async("reserved_a"))) == 20
@@ -0,0 +1,54 @@
+import asyncio
+import pandas as pd
+import pytest
+
+from src.stageit.instrumentation import InMemoryRecorder, Instrumentation
+from src.stageit.stager import Stager
+
+DATA = pd.DataFrame({"k": [1, 2], "x": [0.5, 1.5], "s": ["a", "b"]})
+
+
+@pytest.fixture
+def recorded(tmp_path):
+    recorder = InMemoryRecorder()
+    stager = Stager(str(tmp_path / "db.sqlite"), "sqlite", instrumentation=Instrumentation([recorder]))
+
+    def catalog_queries():
+        return recorder.summary()["counters"].get("catalog_queries", 0)
+
+    return stager, catalog_queries
+
+
+@pytest.mark.parametrize("calls", [1, 10])
+def test_repeated_loads_query_the_catalog_once(recorded, calls):
+    stager, catalog_queries = recorded
+    asyncio.run(stager.stage_data_async(DATA, "t"))
+    first = catalog_queries()
+    for _ in range(calls):
+        asyncio.run(stager.stage_data_async(DATA, "t"))
+        asyncio.run(stager.read_async("t"))
+    # The first read looks the column types up once
+    assert catalog_queries() <= first + 1
+
+
+def test_session_micro_batches_do_not_query_the_catalog(recorded):
+    stager, catalog_queries = recorded
+
+    async def stage(batches):
+        async with stager.session(max_rows=2) as session:
+            for _ in range(batches):
+                await session.stage(DATA, "t")
+        return catalog_queries()
+
+    once = asyncio.run(stage(1))
+    assert asyncio.run(stage(20)) == once
+
+
+def test_invalidated_table_is_looked_up_again(recorded):
+    stager, catalog_queries = recorded
+    asyncio.run(stager.stage_data_async(DATA, "t"))
+    before = catalog_queries()
+    stager._db_manager.invalidate_schema_cache("t")
+    asyncio.run(stager.stage_data_async(DATA.assign(extra=1), "t"))
+    assert catalog_queries() > before
+    assert "extra" in asyncio.run(stager.read_async("t")).columns
@@ -0,0 +1,47 @@
+import datetime
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.stageit.schema_manager import SchemaManager
+
+
+@pytest.fixture
+def postgres_types():
+    return SchemaManager("postgresql", sample_size=3)
+
+
+def test_typed_columns_are_mapped_from_their_dtype(postgres_types):
+    data = pd.DataFrame({
+        "i": [1, 2],
+        "n": pd.array([1, None], dtype="Int64"),
+        "f": [1.5, 2.0],
+        "b": pd.array([True, None], dtype="boolean"),
+        "t": pd.to_datetime(["2024-01-01", "2024-01-02"]),
+        "tz": pd.to_datetime(["2024-01-01", "2024-01-02"]).tz_localize("UTC"),
+        "s": pd.Series(["a", "b"], dtype="string"),
+    })
+    assert postgres_types.infer_from_dataframe(data) == {
+        "i": "BIGINT", "n": "BIGINT", "f": "DOUBLE PRECISION", "b": "BOOLEAN",
+        "t": "TIMESTAMP", "tz": "TIMESTAMP", "s": "TEXT",
+    }
+
+
+def test_object_columns_are_sampled_from_the_first_value(postgres_types):
+    assert postgres_types.infer_from_values(pd.Series([None] * 5 + [1, 2], dtype=object)) == "BIGINT"
+    assert postgres_types.infer_from_values(pd.Series([datetime.date(2024, 1, 1)], dtype=object)) == "DATE"
+    assert postgres_types.infer_from_values([None, None]) == "TEXT"
+
+
+def test_only_sample_size_values_are_inspected(postgres_types):
+    # The string after the first three values is outside of the sample
+    assert postgres_types.infer_from_values(pd.Series([1, 2, 3, "x"], dtype=object)) == "BIGINT"
+    assert SchemaManager("postgresql").infer_from_values(pd.Series([1, 2, 3, "x"], dtype=object)) == "TEXT"
+
+
+def test_rows_columns_and_arrays(postgres_types):
+    assert postgres_types.infer_from_rows([(1, "a", 1.5), (2, "b", None)], ["a", "b", "c"]) == {
+        "a": "BIGINT", "b": "TEXT", "c": "DOUBLE PRECISION",
+    }
+    assert postgres_types.infer_from_columns({"a": [1, 2], "b": ["x", "y"]}) == {"a": "BIGINT", "b": "TEXT"}
+    assert postgres_types.infer_from_np_array(np.array([[1, 2], [3, 4]])) == {"column_0": "BIGINT", "column_1": "BIGINT"}
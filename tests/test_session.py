@@ -0,0 +1,54 @@
+import asyncio
+import sqlite3
+import pandas as pd
+import pytest
+
+from src.stageit.instrumentation import InMemoryRecorder, Instrumentation
+from src.stageit.stager import Stager
+
+
+def batch(start, rows=10):
+    return pd.DataFrame({"k": range(start, start + rows)})
+
+
+def count_rows(path, table_name):
+    with sqlite3.connect(str(path)) as conn:
+        return conn.execute(f"SELECT COUNT(*) FROM {table_name};").fetchone()[0]
+
+
+def test_small_batches_are_coalesced(tmp_path):
+    recorder = InMemoryRecorder()
+    stager = Stager(str(tmp_path / "db.sqlite"), "sqlite", instrumentation=Instrumentation([recorder]))
+
+    async def stage():
+        async with stager.session(max_rows=50, max_delay=60) as session:
+            for i in range(10):
+                await session.stage(batch(i * 10), "t")
+            return len(await session.read("t"))
+
+    assert asyncio.run(stage()) == 100
+    assert recorder.summary()["counters"]["chunks_staged"] == 2
+
+
+def test_buffered_rows_are_flushed_after_max_delay(tmp_path):
+    path = tmp_path / "db.sqlite"
+    stager = Stager(str(path), "sqlite")
+
+    async def stage():
+        async with stager.session(max_rows=1000, max_delay=0.05) as session:
+            await session.stage(batch(0), "t")
+            await asyncio.sleep(0.5)
+            return session.buffered_rows, count_rows(path, "t")
+
+    assert asyncio.run(stage()) == (0, 10)
+
+
+def test_stager_is_owned_by_its_open_session(tmp_path):
+    stager = Stager(str(tmp_path / "db.sqlite"), "sqlite")
+
+    async def stage_outside():
+        async with stager.session():
+            await stager.stage_data_async(batch(0), "t")
+
+    with pytest.raises(RuntimeError, match="open session"):
+        asyncio.run(stage_outside())
@@ -0,0 +1,62 @@
+import asyncio
+import sqlite3
+import numpy as np
+import pandas as pd
+
+from src.stageit.stager import Stager
+
+
+def _journal_mode(path):
+    with sqlite3.connect(path) as conn:
+        return conn.execute("PRAGMA journal_mode;").fetchone()[0]
+
+
+def test_pragmas_are_applied_once_per_load(tmp_path):
+    path = str(tmp_path / "db.sqlite")
+    stager = Stager(path, "sqlite", bulk_load=True)
+    db = stager._db_manager._db
+    calls = []
+    set_pragmas = db._set_pragmas
+
+    async def counting_set_pragmas(pragmas):
+        calls.append(dict(pragmas))
+        return await set_pragmas(pragmas)
+
+    db._set_pragmas = counting_set_pragmas
+    data = pd.DataFrame({"a": np.arange(1000), "b": np.random.rand(1000)})
+    asyncio.run(stager.stage_data_async(data, "t", chunk_size=100))
+    assert len(calls) == 2
+    assert calls[0]["journal_mode"] == "WAL"
+    assert _journal_mode(path) == "delete"
+    with sqlite3.connect(path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM t;").fetchone()[0] == 1000
+
+
+def test_pragmas_are_restored_when_a_load_fails(tmp_path):
+    path = str(tmp_path / "db.sqlite")
+    stager = Stager(path, "sqlite", bulk_load=True)
+
+    def chunks():
+        yield pd.DataFrame({"a": [1, 2]})
+        raise RuntimeError("source failed")
+
+    try:
+        asyncio.run(stager.stage_data_async(chunks(), "t"))
+    except RuntimeError:
+        pass
+    assert _journal_mode(path) == "delete"
+
+
+def test_session_keeps_pragmas_until_close(tmp_path):
+    path = str(tmp_path / "db.sqlite")
+    stager = Stager(path, "sqlite", bulk_load=True)
+
+    async def stage():
+        async with stager.session() as session:
+            for i in range(3):
+                await session.stage(pd.DataFrame({"a": [i]}), "t")
+                await session.flush()
+            assert stager._db_manager._db._previous_pragmas is not None
+
+    asyncio.run(stage())
+    assert _journal_mode(path) == "delete"
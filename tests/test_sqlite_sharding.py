@@ -0,0 +1,56 @@
+import asyncio
+import glob
+import sqlite3
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.stageit.stager import Stager
+
+
+@pytest.fixture
+def sharded_stager(tmp_path):
+    stager = Stager(str(tmp_path / "db.sqlite"), "sqlite", shard_workers=2, shard_min_rows=100)
+    yield stager
+    stager.close()
+
+
+def test_sharded_load_matches_the_data(tmp_path, sharded_stager):
+    data = pd.DataFrame({"a": np.arange(1000), "b": np.arange(1000) / 4, "c": pd.Series(["x", None] * 500, dtype=object)})
+    asyncio.run(sharded_stager.stage_data_async(data, "t"))
+    out = asyncio.run(sharded_stager.read_async("t")).sort_values("a", ignore_index=True)
+    assert out["a"].tolist() == data["a"].tolist()
+    assert out["b"].tolist() == data["b"].tolist()
+    assert out["c"].tolist() == ["x", None] * 500
+    assert glob.glob(str(tmp_path / ".stageit_shards_*")) == []
+
+
+def test_workers_are_spawned_and_kept_across_loads(sharded_stager):
+    data = pd.DataFrame({"a": np.arange(500)})
+    asyncio.run(sharded_stager.stage_data_async(data, "t"))
+    pool = sharded_stager._db_manager._db._shard_pool
+    assert pool is not None and pool._mp_context.get_start_method() == "spawn"
+    asyncio.run(sharded_stager.stage_data_async(data, "t"))
+    assert sharded_stager._db_manager._db._shard_pool is pool
+    sharded_stager.close()
+    assert sharded_stager._db_manager._db._shard_pool is None
+
+
+def test_failed_shard_merge_leaves_no_rows(tmp_path, sharded_stager):
+    data = pd.DataFrame({"a": np.arange(500)})
+    asyncio.run(sharded_stager.stage_data_async(data, "t"))
+    bad = pd.DataFrame({"a": np.arange(500), "b": [object()] * 500})
+    with pytest.raises(Exception):
+        asyncio.run(sharded_stager.stage_data_async(bad, "t"))
+    with sqlite3.connect(str(tmp_path / "db.sqlite")) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM t;").fetchone()[0] == 500
+    assert glob.glob(str(tmp_path / ".stageit_shards_*")) == []
+
+
+def test_sharded_merge_into_temp_scratch_table(sharded_stager):
+    data = pd.DataFrame({"k": np.arange(300), "v": np.zeros(300)})
+    asyncio.run(sharded_stager.stage_data_async(data, "m", drop_first=True))
+    asyncio.run(sharded_stager.stage_data_async(data.assign(k=data["k"] + 150, v=1.0), "m", merge_on="k"))
+    out = asyncio.run(sharded_stager.read_async("m")).sort_values("k", ignore_index=True)
+    assert out["k"].tolist() == list(range(450))
+    assert out["v"].tolist() == [0.0] * 150 + [1.0] * 300
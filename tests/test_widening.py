@@ -0,0 +1,82 @@
+import asyncio
+import datetime
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.stageit.instrumentation import InMemoryRecorder, Instrumentation
+from src.stageit.schema_manager import SchemaManager
+from src.stageit.stager import Stager
+
+
+@pytest.fixture
+def postgres_types():
+    return SchemaManager("postgresql")
+
+
+@pytest.mark.parametrize("values, sql_type, expected", [
+    ([1.5, 2.5], "BIGINT", "DOUBLE PRECISION"),
+    ([1.0, np.nan, 3.0], "BIGINT", "BIGINT"),
+    (["a", 1], "BIGINT", "TEXT"),
+    (["a", "b"], "DOUBLE PRECISION", "TEXT"),
+    ([1, 2], "DOUBLE PRECISION", "DOUBLE PRECISION"),
+    ([True, False], "BIGINT", "BIGINT"),
+    ([5, 6], "BOOLEAN", "SMALLINT"),
+    ([70000.0, np.nan], "SMALLINT", "INTEGER"),
+    ([pd.Timestamp("2024-01-01 10:00")], "DATE", "TIMESTAMP"),
+    ([pd.Timestamp("2024-01-01")], "DATE", "DATE"),
+    ([datetime.date(2024, 1, 1)], "TIMESTAMP", "TIMESTAMP"),
+    ([1, 2], "TEXT", "TEXT"),
+    ([None, None], "BIGINT", "BIGINT"),
+])
+def test_widen_type(postgres_types, values, sql_type, expected):
+    assert postgres_types.widen_type(pd.Series(values), sql_type) == expected
+
+
+def test_sqlite_integer_column_widens_to_real():
+    assert SchemaManager("sqlite").widen_type(pd.Series([0.5]), "INTEGER") == "REAL"
+
+
+def test_later_chunks_widen_the_inferred_types(tmp_path):
+    stager = Stager(str(tmp_path / "db.sqlite"), "sqlite")
+    columns = {}
+
+    async def stage():
+        async with stager._db_manager:
+            await stager._stage_chunk("t", pd.DataFrame({"x": [1, 2], "y": [1, 2]}), columns)
+            await stager._stage_chunk("t", pd.DataFrame({"x": [1.5, 2.5], "y": ["a", "b"]}), columns)
+
+    asyncio.run(stage())
+    assert columns == {"x": "REAL", "y": "TEXT"}
+    out = asyncio.run(stager.read_async("t"))
+    assert out["x"].tolist() == [1, 2, 1.5, 2.5]
+    assert out["y"].tolist()[2:] == ["a", "b"]
+
+
+def test_widening_keeps_the_catalog_queries_flat(tmp_path):
+    recorder = InMemoryRecorder()
+    stager = Stager(str(tmp_path / "db.sqlite"), "sqlite", instrumentation=Instrumentation([recorder]))
+
+    def catalog_queries():
+        return recorder.summary()["counters"].get("catalog_queries", 0)
+
+    asyncio.run(stager.stage_data_async(pd.DataFrame({"x": [1, 2]}), "t"))
+    first = catalog_queries()
+    for _ in range(10):
+        asyncio.run(stager.stage_data_async(pd.DataFrame({"x": [1.5, 2.5]}), "t"))
+    assert catalog_queries() == first
+    # The cached types follow the ALTER of the first widening load
+    assert asyncio.run(stager.read_async("t"))["x"].tolist()[-2:] == [1.5, 2.5]
+    assert asyncio.run(stager._db_manager.get_column_types("t"))["x"] == "REAL"
+
+
+def test_postgresql_types_do_not_depend_on_chunk_boundaries(postgres_url):
+    data = pd.DataFrame({"x": [1, 2, 3, 4.5], "d": [pd.Timestamp("2024-01-01")] * 3 + [pd.Timestamp("2024-01-02 10:00")]})
+    data["d"] = data["d"].astype(object).map(lambda v: v.date() if v == v.normalize() else v)
+    stager = Stager(postgres_url, "postgresql")
+    asyncio.run(stager.stage_data_async(data, "widen_whole", drop_first=True))
+    asyncio.run(stager.stage_data_async(data, "widen_chunked", drop_first=True, chunk_size=2))
+    whole = asyncio.run(stager.read_async("widen_whole"))
+    chunked = asyncio.run(stager.read_async("widen_chunked"))
+    pd.testing.assert_frame_equal(whole, chunked)
+    assert chunked["x"].tolist() == [1, 2, 3, 4.5]